@@ -0,0 +1,106 @@
+"""
+Caché en memoria de las alertas activas.
+
+La deduplicación vive en la base: `crud.create_alert` agrupa las
+repeticiones de una misma condición (edificio, piso, tipo, severidad) con
+un INSERT ... ON CONFLICT DO UPDATE sobre el índice único parcial de
+alertas activas, así que varios procesos no pueden duplicar una alerta.
+
+Este índice solo responde las lecturas de alertas activas sin consultar la
+base. Se actualiza al instante con los eventos ALERTS del propio proceso y
+`sync` lo reconcilia periódicamente con la base para incorporar lo que
+crearon, repitieron o resolvieron otros workers.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app import crud, events, schemas
+from app.ml_predictor import to_epoch
+
+
+def _last_seen(alerta: Dict) -> float:
+    return to_epoch(alerta.get("ultima_vez") or alerta["timestamp"])
+
+
+class OpenAlertIndex:
+    """Alertas no resueltas por id"""
+
+    def __init__(self, suppression_seconds: float = 900):
+        self.suppression_seconds = suppression_seconds
+        self._by_id: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self, alerts):
+        """Carga las alertas activas existentes (arranque)"""
+        for alert in alerts:
+            self.on_alert({"accion": "creada", "alerta": crud.alert_row(alert)})
+
+    # ========== ESCRITURA ==========
+
+    def raise_alert(self, db: Session, alert: schemas.AlertCreate) -> Dict:
+        """
+        Registra una alerta. Si la misma condición sigue activa dentro de la
+        ventana de supresión, la base agrupa la repetición en la alerta
+        existente; si no, crea una nueva. Retorna la alerta como dict.
+        """
+        return crud.create_alert(db, alert, self.suppression_seconds)
+
+    # ========== SINCRONIZACIÓN ==========
+
+    def sync(self, db: Session) -> int:
+        """
+        Reconcilia el índice con las alertas activas de la base y publica
+        como eventos ALERTS las diferencias (así también se invalidan las
+        cachés y se notifican los clientes de este proceso). Retorna la
+        cantidad de cambios.
+        """
+        # Primero la copia local: un cambio propio que ocurra durante la
+        # consulta a lo sumo se publica dos veces, nunca se pierde
+        with self._lock:
+            cached = dict(self._by_id)
+        current = {a.id: crud.alert_row(a) for a in crud.get_open_alerts(db)}
+
+        changes = []
+        for alert_id, alerta in current.items():
+            old = cached.get(alert_id)
+            if old is None:
+                changes.append(("creada", alerta))
+            elif (old["ocurrencias"], _last_seen(old)) != (alerta["ocurrencias"], _last_seen(alerta)):
+                changes.append(("actualizada", alerta))
+        closed = [alert_id for alert_id in cached if alert_id not in current]
+        if closed:
+            rows = {a.id: crud.alert_row(a) for a in crud.get_alerts(db, closed)}
+            for alert_id in closed:
+                alerta = rows.get(alert_id, {**cached[alert_id], "resuelta": True})
+                changes.append(("expirada" if alerta.get("expirada") else "resuelta", alerta))
+
+        for accion, alerta in changes:
+            events.publish(events.ALERTS, {"accion": accion, "alerta": alerta})
+        return len(changes)
+
+    # ========== LISTENER DEL EVENTO ALERTS ==========
+
+    def on_alert(self, payload: Dict):
+        """Mantiene el índice al día con las alertas creadas, repetidas y cerradas"""
+        alerta = payload["alerta"]
+        with self._lock:
+            if payload["accion"] in ("resuelta", "expirada") or alerta.get("resuelta"):
+                self._by_id.pop(alerta["id"], None)
+            else:
+                self._by_id[alerta["id"]] = alerta
+
+    # ========== LECTURA ==========
+
+    def active(self, edificio: str = "A", piso: Optional[int] = None) -> List[Dict]:
+        """Alertas activas de un edificio/piso, de la más reciente a la más antigua"""
+        with self._lock:
+            alerts = [
+                a for a in self._by_id.values()
+                if a["edificio"] == edificio and (piso is None or a["piso"] == piso)
+            ]
+        return sorted(alerts, key=lambda a: to_epoch(a["timestamp"]), reverse=True)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
@@ -0,0 +1,152 @@
+"""
+Detección de anomalías en línea sobre la ingesta.
+
+`AnomalyDetector` escucha el evento `SENSOR_DATA` y mantiene por
+(edificio, piso, variable) una media y una varianza con promedio móvil
+exponencial (EWMA); cada lectura se evalúa con su z-score contra esos
+valores y luego los actualiza, en O(1) por lectura y sin consultar la
+base. Así un pico de `energia_kw` o `temp_c` genera una alerta con la
+siguiente lectura, sin esperar a que alguien llame a /predict.
+
+Las alertas se registran con `OpenAlertIndex.raise_alert` (que a su vez
+agrupa repeticiones de la misma condición) en un hilo propio, fuera del
+camino de la ingesta, y con un tiempo de espera por variable para no
+insertar una alerta por cada lectura de un mismo episodio.
+"""
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+from app import metrics, schemas
+from app.alert_index import OpenAlertIndex
+from app.ml_predictor import VARIABLES
+
+logger = logging.getLogger(__name__)
+
+# Desviación estándar mínima por variable: evita z-scores enormes cuando
+# una señal estuvo constante y luego varía lo normal
+MIN_STD = {"temp_c": 0.2, "humedad_pct": 0.5, "energia_kw": 0.1}
+
+RECOMENDACIONES = {
+    "temp_c": "Verificar HVAC y posibles fuentes de calor o ventanas abiertas",
+    "humedad_pct": "Revisar ventilación y posibles filtraciones",
+    "energia_kw": "Revisar equipos encendidos y posibles fallas eléctricas",
+}
+
+FloorKey = Tuple[str, int]
+
+
+class _FloorStats:
+    """Media y varianza EWMA de las variables de un piso"""
+
+    __slots__ = ("count", "mean", "var", "last_alert")
+
+    def __init__(self, values: Tuple[float, ...]):
+        self.count = 1
+        self.mean = list(values)
+        self.var = [0.0] * len(values)
+        self.last_alert = [0.0] * len(values)
+
+
+class AnomalyDetector:
+    """z-score sobre EWMA por (edificio, piso, variable), con alertas diferidas"""
+
+    def __init__(
+        self,
+        session_factory,
+        alerts: OpenAlertIndex,
+        alpha: float = 0.05,
+        threshold: float = 4.0,
+        warmup: int = 30,
+        cooldown: float = 300.0
+    ):
+        self.session_factory = session_factory
+        self.alerts = alerts
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.cooldown = cooldown
+        self._stats: Dict[FloorKey, _FloorStats] = {}
+        self._lock = threading.Lock()
+        # Un solo hilo: las alertas se registran en orden y sin competir entre sí
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="anomalies")
+
+    def stop(self):
+        self._executor.shutdown(wait=True)
+
+    def prime(self, rows: Iterable[Dict]):
+        """Inicializa las estadísticas con lecturas previas sin generar alertas"""
+        self._update(rows, emit=False)
+
+    def on_sensor_data(self, rows: List[Dict]):
+        """Evalúa las lecturas nuevas (listener del evento SENSOR_DATA)"""
+        anomalies = self._update(rows, emit=True)
+        if anomalies:
+            self._executor.submit(self._raise, anomalies)
+
+    def _update(self, rows: Iterable[Dict], emit: bool) -> List[Dict]:
+        alpha, threshold = self.alpha, self.threshold
+        now = time.time()
+        anomalies = []
+        with self._lock:
+            for row in rows:
+                key = (row["edificio"], row["piso"])
+                values = (row["temp_c"], row["humedad_pct"], row["energia_kw"])
+                stats = self._stats.get(key)
+                if stats is None:
+                    self._stats[key] = _FloorStats(values)
+                    continue
+
+                warm = emit and stats.count >= self.warmup
+                stats.count += 1
+                for i, x in enumerate(values):
+                    mean, var = stats.mean[i], stats.var[i]
+                    diff = x - mean
+                    if warm:
+                        std = max(math.sqrt(var), MIN_STD[VARIABLES[i]])
+                        z = diff / std
+                        if abs(z) >= threshold and now - stats.last_alert[i] >= self.cooldown:
+                            stats.last_alert[i] = now
+                            anomalies.append({
+                                "edificio": key[0],
+                                "piso": key[1],
+                                "variable": VARIABLES[i],
+                                "valor": x,
+                                "esperado": mean,
+                                "std": std,
+                                "z": z,
+                            })
+                    # Actualización incremental de media y varianza (West, 1979)
+                    incr = alpha * diff
+                    stats.mean[i] = mean + incr
+                    stats.var[i] = (1 - alpha) * (var + diff * incr)
+        return anomalies
+
+    def _raise(self, anomalies: List[Dict]):
+        """Registra las alertas (en el hilo del detector)"""
+        db = self.session_factory()
+        try:
+            for a in anomalies:
+                metrics.ANOMALIES.inc(1, (a["variable"],))
+                direccion = "por encima" if a["z"] > 0 else "por debajo"
+                self.alerts.raise_alert(db, schemas.AlertCreate(
+                    edificio=a["edificio"],
+                    piso=a["piso"],
+                    tipo=f"anomalia_{a['variable']}",
+                    severidad="high" if abs(a["z"]) >= 2 * self.threshold else "medium",
+                    mensaje=(
+                        f"Lectura anómala de {a['variable']}: {a['valor']:.2f} "
+                        f"({abs(a['z']):.1f} desviaciones {direccion} de {a['esperado']:.2f})"
+                    ),
+                    recomendacion=RECOMENDACIONES[a["variable"]]
+                ))
+        except Exception:
+            logger.exception("Error al registrar alertas de anomalías")
+        finally:
+            db.close()
+
+    def __len__(self) -> int:
+        return len(self._stats)
@@ -0,0 +1,59 @@
+"""
+Tareas periódicas en segundo plano.
+
+Un `PeriodicWorker` ejecuta una función cada `interval` segundos en un hilo
+propio; también puede despertarse antes con `trigger()`.
+"""
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """Ejecuta `task` de forma periódica en un hilo daemon"""
+
+    def __init__(self, name: str, interval: float, task: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self._task = task
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, run_final: bool = True, timeout: float = 30.0):
+        """Detiene el hilo; con run_final ejecuta la tarea una última vez"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+        if run_final:
+            self._run_once()
+
+    def trigger(self):
+        """Adelanta la próxima ejecución"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self._run_once()
+
+    def _run_once(self):
+        try:
+            self._task()
+        except Exception:
+            logger.exception("Error en la tarea periódica '%s'", self.name)
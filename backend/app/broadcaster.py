@@ -0,0 +1,123 @@
+"""
+Difusión en tiempo real de lecturas, predicciones y cambios de alertas.
+
+Un único `Broadcaster` por proceso recibe los eventos internos y reparte
+a cada cliente conectado (SSE o WebSocket) solo lo de su edificio/piso.
+Cada mensaje se serializa una vez y se encola en todos los suscriptores,
+así el costo crece con el volumen de datos y no con la cantidad de
+clientes × frecuencia de polling.
+"""
+import asyncio
+import json
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+
+class Subscription:
+    """Cola de mensajes de un cliente conectado"""
+
+    def __init__(self, edificio: str, piso: Optional[int], queue_size: int):
+        self.edificio = edificio
+        self.piso = piso
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.descartados = 0
+
+    def offer(self, message: str):
+        """Encola sin bloquear; un cliente lento pierde los mensajes más antiguos"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.descartados += 1
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Próximo mensaje; None si vence el timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broadcaster:
+    """Reparte eventos a los suscriptores de cada edificio"""
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subs: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Event loop donde viven las colas de los suscriptores"""
+        self._loop = loop
+
+    # ========== SUSCRIPCIÓN ==========
+
+    def subscribe(self, edificio: str, piso: Optional[int] = None) -> Subscription:
+        sub = Subscription(edificio, piso, self.queue_size)
+        with self._lock:
+            self._subs.setdefault(edificio, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._subs.get(sub.edificio)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.edificio]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subs.values())
+
+    # ========== PUBLICACIÓN ==========
+
+    def publish(self, tipo: str, edificio: str, piso: Optional[int], data):
+        """
+        Publica un mensaje para un edificio/piso. Se puede llamar desde
+        cualquier hilo; la entrega ocurre en el event loop.
+        """
+        if self._loop is None or edificio not in self._subs:
+            return
+
+        message = json.dumps(jsonable_encoder({
+            "tipo": tipo,
+            "edificio": edificio,
+            "piso": piso,
+            "data": data
+        }))
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, edificio, piso, message)
+        except RuntimeError:
+            pass  # Event loop cerrado (apagado)
+
+    def _deliver(self, edificio: str, piso: Optional[int], message: str):
+        with self._lock:
+            subs = list(self._subs.get(edificio, ()))
+        for sub in subs:
+            if sub.piso is None or piso is None or sub.piso == piso:
+                sub.offer(message)
+
+    # ========== LISTENERS DE EVENTOS ==========
+
+    def on_sensor_data(self, rows: Iterable[Dict]):
+        """Agrupa las lecturas por piso y publica un mensaje por grupo"""
+        if not self._subs:
+            return
+        groups: Dict = {}
+        for row in rows:
+            if row["edificio"] in self._subs:
+                groups.setdefault((row["edificio"], row["piso"]), []).append(row)
+        for (edificio, piso), lecturas in groups.items():
+            self.publish("sensor_data", edificio, piso, lecturas)
+
+    def on_alert(self, payload: Dict):
+        alerta = payload["alerta"]
+        self.publish(f"alerta_{payload['accion']}", alerta["edificio"], alerta["piso"], alerta)
+
+    def on_predictions(self, payload: Dict):
+        self.publish(
+            "predicciones", payload["edificio"], payload["piso"], payload["predicciones"]
+        )
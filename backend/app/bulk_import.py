@@ -0,0 +1,174 @@
+"""
+Importación masiva de histórico a `sensor_data` desde CSV o Parquet.
+
+El archivo se lee por bloques (sin cargarlo completo), cada bloque se
+valida de forma vectorizada con pandas y se escribe por la vía más rápida
+del motor: `COPY ... FROM STDIN` en PostgreSQL o `executemany` por lotes
+en SQLite. Cada bloque se confirma por separado.
+"""
+import io
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Engine
+
+from app import models, partitions, rollups
+from app.ml_predictor import VARIABLES
+
+COLUMNS = ["timestamp", "edificio", "piso"] + list(VARIABLES)
+
+
+def read_chunks(path: str, chunk_size: int = 50000, formato: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Bloques de filas de un archivo CSV o Parquet (según la extensión)"""
+    formato = formato or ("parquet" if path.endswith(".parquet") else "csv")
+    if formato == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def validate(df: pd.DataFrame, max_piso: Optional[int] = None) -> Tuple[pd.DataFrame, int]:
+    """
+    Normaliza tipos y descarta filas inválidas: piso entero desde 1 (hasta
+    `max_piso` si se indica), humedad entre 0 y 100 y energía no negativa.
+    Retorna (filas válidas, cantidad rechazada).
+    """
+    missing = [c for c in COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas: {', '.join(missing)}")
+
+    out = pd.DataFrame({
+        "timestamp": pd.to_datetime(df["timestamp"], utc=True, errors="coerce"),
+        "edificio": df["edificio"].astype("string"),
+        "piso": pd.to_numeric(df["piso"], errors="coerce"),
+    })
+    for var in VARIABLES:
+        out[var] = pd.to_numeric(df[var], errors="coerce").astype("float64")
+
+    ok = out.notna().all(axis=1)
+    ok &= out["edificio"].str.len() > 0
+    ok &= (out["piso"] >= 1) & (out["piso"] % 1 == 0)
+    if max_piso is not None:
+        ok &= out["piso"] <= max_piso
+    ok &= out["humedad_pct"].between(0, 100)
+    ok &= out["energia_kw"] >= 0
+
+    valid = out[ok.fillna(False)].copy()
+    valid["piso"] = valid["piso"].astype("int64")
+    return valid, int(len(out) - len(valid))
+
+
+# ========== ESCRITURA ==========
+
+def _copy_postgres(engine: Engine, df: pd.DataFrame):
+    """COPY del bloque como CSV en memoria"""
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, date_format="%Y-%m-%dT%H:%M:%S.%f%z")
+    buffer.seek(0)
+
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {models.SensorData.__tablename__} ({', '.join(COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _executemany(engine: Engine, df: pd.DataFrame, batch_size: int = 10000):
+    """INSERT por lotes con executemany"""
+    # Mismo formato que la ingesta: UTC sin zona horaria en SQLite
+    timestamps = df["timestamp"].dt.tz_convert("UTC").dt.tz_localize(None).dt.to_pydatetime()
+    columns = [timestamps] + [df[c].tolist() for c in COLUMNS[1:]]
+    records = [dict(zip(COLUMNS, row)) for row in zip(*columns)]
+
+    with engine.begin() as conn:
+        for i in range(0, len(records), batch_size):
+            conn.execute(insert(models.SensorData), records[i:i + batch_size])
+
+
+def write_chunk(engine: Engine, df: pd.DataFrame):
+    """Escribe un bloque ya validado por la vía más rápida del motor"""
+    if df.empty:
+        return
+    if engine.dialect.name == "postgresql":
+        _copy_postgres(engine, df[COLUMNS])
+    else:
+        _executemany(engine, df)
+
+
+def refresh_after_load(
+    session_factory,
+    desde: Optional[datetime],
+    hasta: Optional[datetime],
+    rebuild_rollups: bool = True
+) -> int:
+    """
+    Recalcula los agregados del rango cargado y actualiza las estadísticas
+    del planificador (ANALYZE). Retorna los buckets recalculados.
+    """
+    db = session_factory()
+    try:
+        buckets = rollups.rebuild(db, desde=desde, hasta=hasta) if rebuild_rollups else 0
+        db.execute(text(f"ANALYZE {models.SensorData.__tablename__}"))
+        db.commit()
+        return buckets
+    finally:
+        db.close()
+
+
+def import_file(
+    engine: Engine,
+    session_factory,
+    path: str,
+    chunk_size: int = 50000,
+    formato: Optional[str] = None,
+    rebuild_rollups: bool = True,
+    max_piso: Optional[int] = None,
+    progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Importa un archivo completo. Al final recalcula los agregados del rango
+    importado y actualiza las estadísticas del planificador (ANALYZE).
+    Retorna un resumen con filas leídas, insertadas, rechazadas y velocidad.
+    """
+    stats = {"leidas": 0, "insertadas": 0, "rechazadas": 0, "segundos": 0.0}
+    desde: Optional[datetime] = None
+    hasta: Optional[datetime] = None
+    start = time.perf_counter()
+
+    for chunk in read_chunks(path, chunk_size, formato):
+        valid, rejected = validate(chunk, max_piso)
+        if not valid.empty:
+            lo, hi = valid["timestamp"].min().to_pydatetime(), valid["timestamp"].max().to_pydatetime()
+            # Meses históricos con partición propia en lugar de la DEFAULT
+            partitions.ensure(engine, lo, hi)
+            desde = lo if desde is None else min(desde, lo)
+            hasta = hi if hasta is None else max(hasta, hi)
+        write_chunk(engine, valid)
+
+        stats["leidas"] += len(chunk)
+        stats["insertadas"] += len(valid)
+        stats["rechazadas"] += rejected
+
+        stats["segundos"] = time.perf_counter() - start
+        stats["filas_por_segundo"] = stats["insertadas"] / max(stats["segundos"], 1e-9)
+        if progress:
+            progress(stats)
+
+    if stats["insertadas"]:
+        stats["buckets"] = refresh_after_load(session_factory, desde, hasta, rebuild_rollups)
+
+    stats["desde"], stats["hasta"] = desde, hasta
+    stats["segundos"] = time.perf_counter() - start
+    return stats
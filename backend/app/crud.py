@@ -1,8 +1,209 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from datetime import datetime, timedelta
-from typing import List, Optional
-from app import models, schemas
+import base64
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import desc, func, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from app import events, models, schemas
+
+# ========== CONSULTAS ==========
+# Las sentencias se construyen aquí y se ejecutan tanto con la sesión
+# síncrona (este módulo) como con la asíncrona (`crud_async`).
+
+def sensor_data_query(
+    edificio: str = "A",
+    piso: Optional[int] = None,
+    limit: int = 100,
+    before: Optional[Tuple[datetime, int]] = None
+):
+    """Lecturas de un edificio/piso de la más reciente a la más antigua"""
+    query = select(models.SensorData).where(
+        models.SensorData.edificio == edificio
+    )
+
+    if piso is not None:
+        query = query.where(models.SensorData.piso == piso)
+
+    if before is not None:
+        query = query.where(
+            tuple_(models.SensorData.timestamp, models.SensorData.id) < tuple_(*before)
+        )
+
+    return query.order_by(
+        desc(models.SensorData.timestamp), desc(models.SensorData.id)
+    ).limit(limit)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """
+    Cursor de paginación opaco para la posición (timestamp, id): base64
+    URL-safe de `<microsegundos epoch>,<id>`, sin `+` ni `=` que haya que
+    escapar en la URL.
+    """
+    if timestamp.tzinfo is None:
+        # La base de datos guarda UTC; los datetime naive se asumen UTC
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    micros = (timestamp - _EPOCH) // timedelta(microseconds=1)
+    raw = f"{micros},{row_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverso de `encode_cursor`. ValueError si el cursor no es válido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        micros, row_id = raw.split(",")
+        return _EPOCH + timedelta(microseconds=int(micros)), int(row_id)
+    except (ValueError, OverflowError) as e:
+        raise ValueError(f"Cursor inválido: {cursor!r}") from e
+
+
+def latest_per_floor_query(edificio: Optional[str] = "A"):
+    """
+    Última lectura de cada piso (row_number() particionado por piso).
+    Con edificio None, de cada piso de todos los edificios.
+    """
+    ranked = select(
+        models.SensorData,
+        func.row_number().over(
+            partition_by=(models.SensorData.edificio, models.SensorData.piso),
+            order_by=(desc(models.SensorData.timestamp), desc(models.SensorData.id))
+        ).label("rn")
+    )
+    if edificio is not None:
+        ranked = ranked.where(models.SensorData.edificio == edificio)
+    ranked = ranked.subquery()
+
+    latest = aliased(models.SensorData, ranked)
+    return select(latest).where(ranked.c.rn == 1).order_by(latest.edificio, latest.piso)
+
+
+def recent_data_query(edificio: str, piso: int, minutes: int = 60):
+    """Lecturas de la última ventana de un piso, en orden cronológico"""
+    cutoff_time = datetime.utcnow() - timedelta(minutes=minutes)
+
+    return select(models.SensorData).where(
+        models.SensorData.edificio == edificio,
+        models.SensorData.piso == piso,
+        models.SensorData.timestamp >= cutoff_time
+    ).order_by(models.SensorData.timestamp)
+
+
+def recent_rows_query(minutes: int = 60, edificio: Optional[str] = None):
+    """Lecturas recientes de todos los pisos como columnas planas"""
+    cutoff_time = datetime.utcnow() - timedelta(minutes=minutes)
+
+    query = select(
+        models.SensorData.id,
+        models.SensorData.timestamp,
+        models.SensorData.edificio,
+        models.SensorData.piso,
+        models.SensorData.temp_c,
+        models.SensorData.humedad_pct,
+        models.SensorData.energia_kw
+    ).where(models.SensorData.timestamp >= cutoff_time)
+
+    if edificio is not None:
+        query = query.where(models.SensorData.edificio == edificio)
+
+    return query.order_by(models.SensorData.timestamp)
+
+
+def chart_average_query(edificio: str = "A", limit: int = 60):
+    """Promedio de todos los pisos por timestamp, del más reciente al más antiguo"""
+    return select(
+        models.SensorData.timestamp,
+        func.avg(models.SensorData.temp_c).label('temp_c'),
+        func.avg(models.SensorData.humedad_pct).label('humedad_pct'),
+        func.avg(models.SensorData.energia_kw).label('energia_kw')
+    ).where(
+        models.SensorData.edificio == edificio
+    ).group_by(
+        models.SensorData.timestamp
+    ).order_by(
+        models.SensorData.timestamp.desc()
+    ).limit(limit)
+
+
+def rollup_chart_query(
+    edificio: str,
+    granularidad: str,
+    piso: Optional[int] = None,
+    limit: int = 60
+):
+    """Últimos buckets agregados; sin piso combina todos los pisos"""
+    r = models.SensorRollup
+    columns = [r.bucket, func.sum(r.muestras).label("muestras")]
+    for var in ("temp_c", "humedad_pct", "energia_kw"):
+        columns += [
+            (func.sum(getattr(r, f"{var}_sum")) / func.sum(r.muestras)).label(var),
+            func.min(getattr(r, f"{var}_min")).label(f"{var}_min"),
+            func.max(getattr(r, f"{var}_max")).label(f"{var}_max"),
+        ]
+
+    query = select(*columns).where(
+        r.granularidad == granularidad,
+        r.edificio == edificio
+    )
+    if piso is not None:
+        query = query.where(r.piso == piso)
+
+    return query.group_by(r.bucket).order_by(desc(r.bucket)).limit(limit)
+
+
+def active_alerts_query(edificio: str = "A", piso: Optional[int] = None):
+    """Alertas no resueltas, de la más reciente a la más antigua"""
+    query = select(models.Alert).where(
+        models.Alert.edificio == edificio,
+        models.Alert.resuelta == False
+    )
+
+    if piso is not None:
+        query = query.where(models.Alert.piso == piso)
+
+    return query.order_by(desc(models.Alert.timestamp))
+
+
+# Condición de una alerta: a lo sumo una activa por clave
+ALERT_KEY = ("edificio", "piso", "tipo", "severidad")
+
+
+def open_alerts_query():
+    """Alertas no resueltas de todos los edificios"""
+    return select(models.Alert).where(models.Alert.resuelta == False)
+
+
+def sensor_row(db_data: models.SensorData) -> Dict:
+    """Lectura como dict para el evento de ingesta"""
+    return {
+        "id": db_data.id,
+        "timestamp": db_data.timestamp,
+        "edificio": db_data.edificio,
+        "piso": db_data.piso,
+        "temp_c": db_data.temp_c,
+        "humedad_pct": db_data.humedad_pct,
+        "energia_kw": db_data.energia_kw
+    }
+
+
+def alert_row(alert: models.Alert) -> Dict:
+    """Alerta como dict para el evento de alertas"""
+    return {
+        column.name: getattr(alert, column.name)
+        for column in models.Alert.__table__.columns
+    }
+
+
+def stamp_rows(rows: List[Dict]) -> List[Dict]:
+    """Asigna el timestamp de recepción a las filas que no lo traen"""
+    now = datetime.now(timezone.utc)
+    for row in rows:
+        row.setdefault("timestamp", now)
+    return rows
+
 
 # ========== SENSOR DATA ==========
 
@@ -12,24 +213,67 @@ def create_sensor_data(db: Session, data: schemas.SensorDataCreate):
     db.add(db_data)
     db.commit()
     db.refresh(db_data)
+
+    events.publish(events.SENSOR_DATA, [sensor_row(db_data)])
     return db_data
 
 
+def create_sensor_data_bulk(
+    db: Session,
+    rows: List[Dict],
+    notify: bool = True
+) -> int:
+    """
+    Inserta muchas lecturas en un solo INSERT y una sola transacción.
+    No recarga las filas insertadas; retorna la cantidad insertada.
+    Con notify=False no se publica el evento de ingesta.
+    """
+    if not rows:
+        return 0
+
+    db.execute(insert(models.SensorData), stamp_rows(rows))
+    db.commit()
+
+    if notify:
+        events.publish(events.SENSOR_DATA, rows)
+    return len(rows)
+
+
 def get_sensor_data(
     db: Session,
     edificio: str = "A",
     piso: Optional[int] = None,
-    limit: int = 100
+    limit: int = 100,
+    before: Optional[Tuple[datetime, int]] = None
 ) -> List[models.SensorData]:
-    """Obtiene datos de sensores con filtros opcionales"""
-    query = db.query(models.SensorData).filter(
-        models.SensorData.edificio == edificio
+    """
+    Obtiene datos de sensores con filtros opcionales.
+    `before=(timestamp, id)` pagina por cursor: retorna solo las filas
+    anteriores a esa posición, con el mismo costo que la primera página.
+    """
+    return db.execute(sensor_data_query(edificio, piso, limit, before)).scalars().all()
+
+
+def get_sensor_data_rows(
+    db: Session,
+    edificio: str = "A",
+    piso: Optional[int] = None,
+    limit: int = 100,
+    before: Optional[Tuple[datetime, int]] = None
+):
+    """Como `get_sensor_data`, pero como filas planas (sin objetos ORM)"""
+    query = sensor_data_query(edificio, piso, limit, before).with_only_columns(
+        *models.SensorData.__table__.columns
     )
-    
-    if piso is not None:
-        query = query.filter(models.SensorData.piso == piso)
-    
-    return query.order_by(desc(models.SensorData.timestamp)).limit(limit).all()
+    return db.execute(query).all()
+
+
+def get_latest_per_floor(db: Session, edificio: Optional[str] = "A") -> List[models.SensorData]:
+    """
+    Obtiene la lectura más reciente de cada piso de un edificio en una sola
+    consulta (row_number() particionado por piso).
+    """
+    return db.execute(latest_per_floor_query(edificio)).scalars().all()
 
 
 def get_recent_data_for_prediction(
@@ -39,24 +283,114 @@ def get_recent_data_for_prediction(
     minutes: int = 60
 ) -> List[models.SensorData]:
     """Obtiene datos recientes para predicción"""
-    cutoff_time = datetime.utcnow() - timedelta(minutes=minutes)
-    
-    return db.query(models.SensorData).filter(
-        models.SensorData.edificio == edificio,
-        models.SensorData.piso == piso,
-        models.SensorData.timestamp >= cutoff_time
-    ).order_by(models.SensorData.timestamp).all()
+    return db.execute(recent_data_query(edificio, piso, minutes)).scalars().all()
+
+
+def get_recent_rows_for_prediction(
+    db: Session,
+    minutes: int = 60,
+    edificio: Optional[str] = None
+):
+    """
+    Obtiene las lecturas recientes de todos los pisos como filas planas
+    (sin objetos ORM), ordenadas por timestamp.
+    """
+    return db.execute(recent_rows_query(minutes, edificio)).all()
+
+
+def get_chart_average(db: Session, edificio: str = "A", limit: int = 60):
+    """Obtiene el promedio de todos los pisos por timestamp para gráficas"""
+    return db.execute(chart_average_query(edificio, limit)).all()
+
+
+def get_rollup_chart(
+    db: Session,
+    edificio: str,
+    granularidad: str,
+    piso: Optional[int] = None,
+    limit: int = 60
+):
+    """
+    Obtiene los últimos `limit` buckets agregados de una granularidad.
+    Sin piso combina todos los pisos (promedio ponderado por muestras).
+    """
+    return db.execute(rollup_chart_query(edificio, granularidad, piso, limit)).all()
 
 
 # ========== ALERTS ==========
 
-def create_alert(db: Session, alert: schemas.AlertCreate):
-    """Crea una nueva alerta"""
-    db_alert = models.Alert(**alert.model_dump())
-    db.add(db_alert)
+def _insert_alert(db: Session):
+    """INSERT con soporte de ON CONFLICT según el dialecto"""
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert(models.Alert)
+    return sqlite.insert(models.Alert)
+
+
+def create_alert(
+    db: Session,
+    alert: schemas.AlertCreate,
+    suppression_seconds: Optional[float] = None
+) -> Dict:
+    """
+    Registra una alerta. Si ya hay una activa para la misma condición
+    (edificio, piso, tipo, severidad), la repetición se agrupa en ella:
+    incrementa `ocurrencias` y actualiza `ultima_vez` en el mismo
+    INSERT ... ON CONFLICT DO UPDATE (índice único parcial
+    `uq_alerts_abierta`), así dos procesos no pueden duplicarla.
+
+    Con `suppression_seconds`, la alerta activa que no se repite hace más
+    de ese tiempo se cierra antes como expirada (`expirada=True`, evento
+    "expirada", distinto de la resolución por un operador) y la condición
+    abre una alerta nueva. Retorna la alerta como dict.
+    """
+    alerts = models.Alert
+    now = datetime.now(timezone.utc)
+    key = [getattr(alerts, column) == getattr(alert, column) for column in ALERT_KEY]
+
+    closed = []
+    if suppression_seconds is not None:
+        closed = [dict(row._mapping) for row in db.execute(
+            update(alerts)
+            .where(
+                *key,
+                alerts.resuelta == False,
+                func.coalesce(alerts.ultima_vez, alerts.timestamp) < now - timedelta(seconds=suppression_seconds)
+            )
+            .values(resuelta=True, expirada=True)
+            .returning(*alerts.__table__.columns)
+        )]
+
+    stmt = _insert_alert(db).values(
+        **alert.model_dump(), timestamp=now, ultima_vez=now, ocurrencias=1, resuelta=False
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[getattr(alerts, column) for column in ALERT_KEY],
+        index_where=alerts.resuelta == False,
+        set_={
+            "ocurrencias": alerts.ocurrencias + 1,
+            "ultima_vez": now,
+            "mensaje": stmt.excluded.mensaje,
+            "recomendacion": stmt.excluded.recomendacion
+        }
+    ).returning(*alerts.__table__.columns)
+    alerta = dict(db.execute(stmt).first()._mapping)
     db.commit()
-    db.refresh(db_alert)
-    return db_alert
+
+    for expirada in closed:
+        events.publish(events.ALERTS, {"accion": "expirada", "alerta": expirada})
+    accion = "creada" if alerta["ocurrencias"] == 1 else "actualizada"
+    events.publish(events.ALERTS, {"accion": accion, "alerta": alerta})
+    return alerta
+
+
+def get_open_alerts(db: Session) -> List[models.Alert]:
+    """Obtiene las alertas activas de todos los edificios"""
+    return db.execute(open_alerts_query()).scalars().all()
+
+
+def get_alerts(db: Session, ids: List[int]) -> List[models.Alert]:
+    """Obtiene alertas por id (activas o cerradas)"""
+    return db.execute(select(models.Alert).where(models.Alert.id.in_(ids))).scalars().all()
 
 
 def get_active_alerts(
@@ -65,25 +399,58 @@ def get_active_alerts(
     piso: Optional[int] = None
 ) -> List[models.Alert]:
     """Obtiene alertas activas (no resueltas)"""
-    query = db.query(models.Alert).filter(
-        models.Alert.edificio == edificio,
-        models.Alert.resuelta == False
+    return db.execute(active_alerts_query(edificio, piso)).scalars().all()
+
+
+def _resolve(db: Session, *conditions) -> List[Dict]:
+    """UPDATE ... RETURNING de las alertas que cumplen las condiciones"""
+    result = db.execute(
+        update(models.Alert)
+        .where(*conditions)
+        .values(resuelta=True)
+        .returning(*models.Alert.__table__.columns)
     )
-    
-    if piso is not None:
-        query = query.filter(models.Alert.piso == piso)
-    
-    return query.order_by(desc(models.Alert.timestamp)).all()
+    alertas = [dict(row._mapping) for row in result]
+    db.commit()
+
+    for alerta in alertas:
+        events.publish(events.ALERTS, {"accion": "resuelta", "alerta": alerta})
+    return alertas
+
+
+def mark_alert_resolved(db: Session, alert_id: int) -> Optional[Dict]:
+    """Marca una alerta como resuelta. Retorna la alerta como dict o None."""
+    alertas = _resolve(db, models.Alert.id == alert_id)
+    return alertas[0] if alertas else None
 
 
-def mark_alert_resolved(db: Session, alert_id: int):
-    """Marca una alerta como resuelta"""
-    alert = db.query(models.Alert).filter(models.Alert.id == alert_id).first()
-    if alert:
-        alert.resuelta = True
-        db.commit()
-        db.refresh(alert)
-    return alert
+def resolve_alerts(
+    db: Session,
+    ids: Optional[List[int]] = None,
+    edificio: Optional[str] = None,
+    piso: Optional[int] = None,
+    tipo: Optional[str] = None,
+    severidad: Optional[str] = None,
+    antes_de: Optional[datetime] = None
+) -> List[Dict]:
+    """
+    Resuelve en un solo UPDATE las alertas activas que cumplen todos los
+    filtros indicados. Retorna las alertas resueltas como dicts.
+    """
+    conditions = [models.Alert.resuelta == False]
+    if ids is not None:
+        conditions.append(models.Alert.id.in_(ids))
+    if edificio is not None:
+        conditions.append(models.Alert.edificio == edificio)
+    if piso is not None:
+        conditions.append(models.Alert.piso == piso)
+    if tipo is not None:
+        conditions.append(models.Alert.tipo == tipo)
+    if severidad is not None:
+        conditions.append(models.Alert.severidad == severidad)
+    if antes_de is not None:
+        conditions.append(models.Alert.timestamp < antes_de)
+    return _resolve(db, *conditions)
 
 
 def get_all_alerts(
@@ -94,4 +461,4 @@ def get_all_alerts(
     """Obtiene todas las alertas (resueltas y activas)"""
     return db.query(models.Alert).filter(
         models.Alert.edificio == edificio
-    ).order_by(desc(models.Alert.timestamp)).limit(limit).all()
\ No newline at end of file
+    ).order_by(desc(models.Alert.timestamp)).limit(limit).all()
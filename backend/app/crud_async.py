@@ -0,0 +1,108 @@
+"""
+Versiones asíncronas de las operaciones de `crud` para los endpoints
+`async def`. Reutilizan las mismas sentencias que `crud` y solo cambian
+la forma de ejecutarlas (AsyncSession).
+"""
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app import crud, events, models, schemas
+
+# ========== SENSOR DATA ==========
+
+async def create_sensor_data(db: AsyncSession, data: schemas.SensorDataCreate):
+    """Crea un nuevo registro de datos de sensor"""
+    db_data = models.SensorData(**data.model_dump())
+    db.add(db_data)
+    await db.commit()
+    await db.refresh(db_data)
+
+    events.publish(events.SENSOR_DATA, [crud.sensor_row(db_data)])
+    return db_data
+
+
+async def create_sensor_data_bulk(
+    db: AsyncSession,
+    rows: List[Dict],
+    notify: bool = True
+) -> int:
+    """Inserta muchas lecturas en un solo INSERT y una sola transacción"""
+    if not rows:
+        return 0
+
+    await db.execute(insert(models.SensorData), crud.stamp_rows(rows))
+    await db.commit()
+
+    if notify:
+        events.publish(events.SENSOR_DATA, rows)
+    return len(rows)
+
+
+async def get_sensor_data(
+    db: AsyncSession,
+    edificio: str = "A",
+    piso: Optional[int] = None,
+    limit: int = 100,
+    before: Optional[Tuple[datetime, int]] = None
+) -> List[models.SensorData]:
+    """Obtiene datos de sensores con filtros opcionales y cursor"""
+    result = await db.execute(crud.sensor_data_query(edificio, piso, limit, before))
+    return result.scalars().all()
+
+
+async def get_latest_per_floor(db: AsyncSession, edificio: str = "A") -> List[models.SensorData]:
+    """Obtiene la lectura más reciente de cada piso de un edificio"""
+    result = await db.execute(crud.latest_per_floor_query(edificio))
+    return result.scalars().all()
+
+
+async def get_recent_data_for_prediction(
+    db: AsyncSession,
+    edificio: str,
+    piso: int,
+    minutes: int = 60
+) -> List[models.SensorData]:
+    """Obtiene datos recientes para predicción"""
+    result = await db.execute(crud.recent_data_query(edificio, piso, minutes))
+    return result.scalars().all()
+
+
+async def get_recent_rows_for_prediction(
+    db: AsyncSession,
+    minutes: int = 60,
+    edificio: Optional[str] = None
+):
+    """Obtiene las lecturas recientes de todos los pisos como filas planas"""
+    result = await db.execute(crud.recent_rows_query(minutes, edificio))
+    return result.all()
+
+
+async def get_chart_average(db: AsyncSession, edificio: str = "A", limit: int = 60):
+    """Obtiene el promedio de todos los pisos por timestamp para gráficas"""
+    result = await db.execute(crud.chart_average_query(edificio, limit))
+    return result.all()
+
+
+async def get_rollup_chart(
+    db: AsyncSession,
+    edificio: str,
+    granularidad: str,
+    piso: Optional[int] = None,
+    limit: int = 60
+):
+    """Obtiene los últimos `limit` buckets agregados de una granularidad"""
+    result = await db.execute(crud.rollup_chart_query(edificio, granularidad, piso, limit))
+    return result.all()
+
+
+# ========== ALERTS ==========
+
+async def get_active_alerts(
+    db: AsyncSession,
+    edificio: str = "A",
+    piso: Optional[int] = None
+) -> List[models.Alert]:
+    """Obtiene alertas activas (no resueltas)"""
+    result = await db.execute(crud.active_alerts_query(edificio, piso))
+    return result.scalars().all()
@@ -1,9 +1,18 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+import logging
 import os
+import ssl
 from dotenv import load_dotenv
 
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -24,11 +33,24 @@ CA_CERT_PATH = os.getenv("DB_CA_CERT_PATH")
 if CA_CERT_PATH and os.path.exists(CA_CERT_PATH):
     connect_args["sslmode"] = "require"
     connect_args["sslrootcert"] = CA_CERT_PATH
-    print(f"✅ Usando certificado CA: {CA_CERT_PATH}")
+    logger.info("Usando certificado CA: %s", CA_CERT_PATH)
 elif "sslmode=require" in DATABASE_URL:
     # Aiven y otros proveedores modernos no necesitan cert explícito
     # Solo verifican vía SSL estándar
-    print("✅ SSL habilitado (modo require)")
+    logger.info("SSL habilitado (modo require)")
+
+
+def _pool_class(url: str, name: str, is_async: bool = False):
+    """
+    Pool por defecto del dialecto; si es un pool con cola se usa una
+    subclase que mide la espera de checkout (ver `app.metrics`).
+    """
+    parsed = make_url(url)
+    pool_class = parsed.get_dialect(_is_async=is_async).get_pool_class(parsed)
+    if issubclass(pool_class, QueuePool):
+        return metrics.timed_pool(pool_class, name)
+    return pool_class
+
 
 # Crear engine con configuración para PostgreSQL remoto
 engine = create_engine(
@@ -36,8 +58,10 @@ engine = create_engine(
     pool_pre_ping=True,      # Verifica conexiones antes de usar
     pool_recycle=3600,       # Recicla conexiones cada hora
     echo=False,              # No imprimir SQL queries (cambiar a True para debug)
-    connect_args=connect_args if connect_args else {}
+    connect_args=connect_args if connect_args else {},
+    poolclass=_pool_class(DATABASE_URL, "sync")
 )
+metrics.instrument_engine(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -50,3 +74,56 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ========== ASYNC ==========
+
+def _async_url_and_args(url: str):
+    """
+    Deriva la URL asíncrona (asyncpg / aiosqlite) a partir de DATABASE_URL.
+    asyncpg no acepta `sslmode` en la URL: se traduce a `ssl` en connect_args.
+    """
+    parsed = make_url(url)
+    args = {}
+
+    if parsed.get_backend_name() in ("postgres", "postgresql"):
+        sslmode = parsed.query.get("sslmode")
+        parsed = parsed.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+        if CA_CERT_PATH and os.path.exists(CA_CERT_PATH):
+            args["ssl"] = ssl.create_default_context(cafile=CA_CERT_PATH)
+        elif sslmode and sslmode != "disable":
+            args["ssl"] = "require"
+    elif parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+
+    return parsed.render_as_string(hide_password=False), args
+
+
+# Se puede indicar explícitamente con ASYNC_DATABASE_URL
+ASYNC_DATABASE_URL, async_connect_args = _async_url_and_args(
+    os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL
+)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    echo=False,
+    connect_args=async_connect_args,
+    poolclass=_pool_class(ASYNC_DATABASE_URL, "async", is_async=True)
+)
+metrics.instrument_engine(async_engine.sync_engine, "async")
+
+# expire_on_commit=False: los objetos se serializan después del commit
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+async def get_async_db():
+    """Dependency para obtener una sesión asíncrona de base de datos"""
+    async with AsyncSessionLocal() as db:
+        yield db
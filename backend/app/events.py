@@ -0,0 +1,44 @@
+"""
+Eventos internos del backend.
+
+Los componentes en memoria (ventanas recientes, cachés, difusión) se
+suscriben a estos eventos en lugar de consultar la base de datos; `crud`
+los publica después de cada escritura confirmada.
+"""
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Nuevas lecturas: lista de dicts con timestamp, edificio, piso y variables
+SENSOR_DATA = "sensor_data"
+# Cambios de alertas: {"accion": "creada" | "actualizada" | "resuelta" | "expirada", "alerta": dict}
+# ("expirada": cerrada por inactividad, sin intervención de un operador)
+ALERTS = "alerts"
+# Predicciones que cambiaron: {"edificio", "piso", "predicciones": {variable: dict},
+# "anteriores": las publicadas antes para ese piso, o None}
+PREDICTIONS = "predictions"
+
+_listeners: Dict[str, List[Callable[[Any], None]]] = defaultdict(list)
+
+
+def subscribe(evento: str, listener: Callable[[Any], None]):
+    """Registra un listener para un evento"""
+    if listener not in _listeners[evento]:
+        _listeners[evento].append(listener)
+
+
+def unsubscribe(evento: str, listener: Callable[[Any], None]):
+    """Elimina un listener registrado"""
+    if listener in _listeners[evento]:
+        _listeners[evento].remove(listener)
+
+
+def publish(evento: str, payload: Any):
+    """Notifica a los listeners; un listener con error no afecta a los demás"""
+    for listener in list(_listeners[evento]):
+        try:
+            listener(payload)
+        except Exception:
+            logger.exception("Error en listener de '%s'", evento)
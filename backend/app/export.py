@@ -0,0 +1,165 @@
+"""
+Exportación masiva de `sensor_data` y `alerts`.
+
+Las filas se leen con un cursor del lado del servidor (`yield_per`) y se
+escriben por bloques, así la memoria usada no depende del tamaño del rango
+exportado. CSV y NDJSON se generan como un iterador de bloques de bytes;
+Parquet (requiere pyarrow) escribe un row group por bloque.
+"""
+import csv
+import io
+import json
+from importlib.util import find_spec
+from datetime import datetime
+from typing import IO, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import Boolean, DateTime, Float, Integer, select
+
+from app import models
+from app.ml_predictor import to_epoch
+
+# pyarrow se importa solo al exportar Parquet (es lento de cargar)
+HAS_PARQUET = find_spec("pyarrow") is not None
+
+TABLAS = {
+    "sensor_data": models.SensorData,
+    "alerts": models.Alert,
+}
+
+FORMATOS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def columns(tabla: str) -> List[str]:
+    """Nombres de las columnas exportadas de una tabla"""
+    return [column.name for column in TABLAS[tabla].__table__.columns]
+
+
+def export_query(
+    tabla: str,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    edificio: Optional[str] = None,
+    pisos: Optional[Sequence[int]] = None
+):
+    """Filas de la tabla en un rango [desde, hasta), ordenadas por timestamp"""
+    model = TABLAS[tabla]
+    query = select(*model.__table__.columns)
+
+    if desde is not None:
+        query = query.where(model.timestamp >= desde)
+    if hasta is not None:
+        query = query.where(model.timestamp < hasta)
+    if edificio is not None:
+        query = query.where(model.edificio == edificio)
+    if pisos:
+        query = query.where(model.piso.in_(pisos))
+
+    return query.order_by(model.timestamp, model.id)
+
+
+def iter_chunks(session_factory, query, chunk_size: int = 5000) -> Iterator[list]:
+    """Bloques de filas leídos con un cursor del lado del servidor"""
+    db = session_factory()
+    try:
+        result = db.execute(query.execution_options(yield_per=chunk_size))
+        for chunk in result.partitions():
+            yield chunk
+    finally:
+        db.close()
+
+
+# ========== CSV / NDJSON ==========
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def iter_csv(names: List[str], chunks: Iterable[list]) -> Iterator[bytes]:
+    """CSV con encabezado, un bloque de bytes por bloque de filas"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for chunk in chunks:
+        writer.writerows([_plain(v) for v in row] for row in chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_ndjson(names: List[str], chunks: Iterable[list]) -> Iterator[bytes]:
+    """Un objeto JSON por línea, un bloque de bytes por bloque de filas"""
+    for chunk in chunks:
+        lines = [
+            json.dumps(dict(zip(names, (_plain(v) for v in row))), ensure_ascii=False)
+            for row in chunk
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# ========== PARQUET ==========
+
+def _arrow_type(column):
+    import pyarrow as pa
+
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    return pa.string()
+
+
+def _arrow_array(values: list, type_):
+    import pyarrow as pa
+
+    if pa.types.is_timestamp(type_):
+        micros = np.array(
+            [np.nan if v is None else to_epoch(v) * 1e6 for v in values], dtype=np.float64
+        )
+        mask = np.isnan(micros)
+        return pa.array(np.round(np.nan_to_num(micros)).astype(np.int64), type=type_, mask=mask)
+    return pa.array(values, type=type_)
+
+
+def write_parquet(tabla: str, chunks: Iterable[list], sink: IO[bytes]) -> int:
+    """Escribe un archivo Parquet con un row group por bloque. Retorna las filas."""
+    if not HAS_PARQUET:
+        raise RuntimeError("La exportación a Parquet requiere pyarrow")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table_columns = list(TABLAS[tabla].__table__.columns)
+    schema = pa.schema([(c.name, _arrow_type(c)) for c in table_columns])
+
+    total = 0
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in chunks:
+            arrays = [
+                _arrow_array([row[i] for row in chunk], field.type)
+                for i, field in enumerate(schema)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            total += len(chunk)
+    return total
+
+
+def iter_file(f: IO[bytes], block_size: int = 1 << 20) -> Iterator[bytes]:
+    """Lee un archivo por bloques y lo cierra al terminar"""
+    try:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            yield block
+    finally:
+        f.close()
@@ -0,0 +1,153 @@
+"""
+Pronósticos precalculados en segundo plano.
+
+`ForecastScheduler` recalcula las predicciones de todos los pisos activos
+(los que tienen lecturas en la ventana reciente) en una sola pasada de
+`predict_many`, cada `interval` segundos o antes si llegaron suficientes
+lecturas nuevas. El resultado se guarda en un `ForecastCache` versionado
+del que leen los endpoints, así la latencia de una petición no depende
+del costo del modelo.
+
+Con el predictor incremental (PREDICTOR_STREAMING) cada pasada toma las
+predicciones de su estado en O(1) por piso en lugar de recorrer la
+ventana reciente.
+
+El evento PREDICTIONS solo se publica para los pisos cuyo pronóstico
+cambió desde la última publicación: una pasada sin cambios no invalida
+cachés de respuestas ni envía marcos a los clientes SSE/WS.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app import events, metrics
+from app.background import PeriodicWorker
+from app.ml_predictor import SimplePredictor, StreamingPredictor
+from app.recent_window import RecentWindowStore
+
+FloorKey = Tuple[str, int]
+
+
+class ForecastCache:
+    """Último pronóstico de cada (edificio, piso) con su versión y hora de cálculo"""
+
+    def __init__(self):
+        self.version = 0
+        self._entries: Dict[FloorKey, Dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, edificio: str, piso: int) -> Optional[Dict]:
+        """
+        Entrada del piso: {"predicciones", "version", "calculado"}; None si
+        no hay pronóstico para ese piso.
+        """
+        with self._lock:
+            return self._entries.get((edificio, piso))
+
+    def put(self, predictions: Dict[FloorKey, Dict], replace: bool = False) -> int:
+        """
+        Guarda pronósticos con una nueva versión. Con replace=True se
+        descartan los pisos que no vienen en `predictions` (ya sin lecturas
+        recientes). Retorna la versión asignada.
+        """
+        calculado = time.time()
+        with self._lock:
+            self.version += 1
+            entries = {} if replace else dict(self._entries)
+            for key, predicciones in predictions.items():
+                entries[key] = {
+                    "predicciones": predicciones,
+                    "version": self.version,
+                    "calculado": calculado
+                }
+            self._entries = entries
+            return self.version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ForecastScheduler:
+    """Recalcula el `ForecastCache` por cadencia o por volumen de datos nuevos"""
+
+    def __init__(
+        self,
+        predictor: SimplePredictor,
+        window: RecentWindowStore,
+        cache: ForecastCache,
+        streaming: Optional[StreamingPredictor] = None,
+        interval: float = 30.0,
+        min_new_rows: int = 500,
+        minutes: int = 60
+    ):
+        self.predictor = predictor
+        self.window = window
+        self.cache = cache
+        self.streaming = streaming
+        self.min_new_rows = min_new_rows
+        self.minutes = minutes
+        self._new_rows = 0
+        self._lock = threading.Lock()
+        # Últimas predicciones publicadas por piso (solo las usa `run`)
+        self._published: Dict[FloorKey, Dict] = {}
+        self._worker = PeriodicWorker("forecast-scheduler", interval, self.run)
+
+    def start(self):
+        self._worker.start()
+
+    def stop(self):
+        self._worker.stop(run_final=False)
+
+    def on_sensor_data(self, rows):
+        """Cuenta lecturas nuevas y adelanta el recálculo al llegar al umbral"""
+        with self._lock:
+            self._new_rows += len(rows)
+            ready = self._new_rows >= self.min_new_rows
+        if ready:
+            self._worker.trigger()
+
+    def run(self) -> int:
+        """
+        Recalcula todos los pisos activos y publica los que cambiaron.
+        Retorna cuántos pisos se calcularon.
+        """
+        with self._lock:
+            self._new_rows = 0
+
+        with metrics.PREDICTOR_SECONDS.time(("scheduler",)):
+            active = self._predict_streaming() if self.streaming else self._predict_window()
+        metrics.PREDICTOR_FLOORS.inc(len(active), ("scheduler",))
+        self.cache.put(active, replace=True)
+
+        published = self._published
+        self._published = active
+        for (edificio, piso), predicciones in active.items():
+            anteriores = published.get((edificio, piso))
+            if predicciones == anteriores:
+                continue
+            events.publish(events.PREDICTIONS, {
+                "edificio": edificio,
+                "piso": piso,
+                "predicciones": predicciones,
+                "anteriores": anteriores
+            })
+        return len(active)
+
+    def _predict_window(self) -> Dict[FloorKey, Dict]:
+        """Una pasada de `predict_many` sobre la ventana de todos los pisos"""
+        keys = self.window.keys()
+        group_idx, timestamps, values = self.window.block(keys, self.minutes)
+        counts = np.bincount(group_idx, minlength=len(keys))
+        predictions = self.predictor.predict_many(keys, group_idx, timestamps, values)
+        return {key: predictions[key] for g, key in enumerate(keys) if counts[g]}
+
+    def _predict_streaming(self) -> Dict[FloorKey, Dict]:
+        """Predicciones del estado incremental de cada piso"""
+        active = {}
+        for edificio, piso in self.streaming.keys():
+            predicciones = self.streaming.predict_floor(edificio, piso)
+            if predicciones is not None:
+                active[(edificio, piso)] = predicciones
+        return active
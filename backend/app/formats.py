@@ -0,0 +1,160 @@
+"""
+Formatos de respuesta para las series de tiempo (negociados por `Accept`).
+
+- application/json: formato original, una lista de objetos por fila.
+- application/vnd.smartfloors.columnar+json: un arreglo por campo.
+- application/msgpack: la misma forma columnar en MessagePack.
+- application/vnd.apache.arrow.stream: tabla Arrow IPC (requiere pyarrow).
+
+En los formatos columnares `timestamp` va en segundos epoch UTC y el
+resto de los campos del encabezado (piso, bucket, ...) acompaña a `data`.
+orjson, msgpack y pyarrow son opcionales: sin orjson se usa `json`, y un
+formato binario cuya librería no está instalada responde 406. Cualquier
+otro tipo que la API no genera recibe JSON.
+"""
+import json
+from importlib.util import find_spec
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.ml_predictor import to_epoch
+from app.response_cache import serialize
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# pyarrow tarda en importarse: solo se verifica que exista y se carga en el
+# primer uso (ver `_arrow`)
+HAS_ARROW = find_spec("pyarrow") is not None
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.smartfloors.columnar+json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+_ALIASES = {
+    "*/*": JSON,
+    "application/*": JSON,
+    JSON: JSON,
+    COLUMNAR_JSON: COLUMNAR_JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    ARROW: ARROW,
+}
+
+
+def available() -> List[str]:
+    """Formatos que se pueden generar con las librerías instaladas"""
+    formats = [JSON, COLUMNAR_JSON]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    if HAS_ARROW:
+        formats.append(ARROW)
+    return formats
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Elige el formato según el header Accept (con sus valores q)"""
+    if not accept:
+        return JSON
+
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            candidates.append((-q, position, media_type.lower()))
+
+    supported = available()
+    missing = []
+    for _, _, media_type in sorted(candidates):
+        fmt = _ALIASES.get(media_type)
+        if fmt in supported:
+            return fmt
+        if fmt is not None:
+            missing.append(fmt)
+
+    # Tipos que la API no genera (text/html, application/xml...) reciben JSON;
+    # 406 solo si se pidió un formato binario sin su librería instalada
+    if missing:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Formato no disponible. Use: {', '.join(supported)}"
+        )
+    return JSON
+
+
+# ========== SERIALIZACIÓN ==========
+
+def _epochs(timestamps) -> np.ndarray:
+    return np.array([to_epoch(ts) for ts in timestamps], dtype=np.float64)
+
+
+def _columnar(columns: Dict[str, list]) -> Dict[str, list]:
+    """Columnas con el timestamp en segundos epoch"""
+    data = dict(columns)
+    if "timestamp" in data:
+        data["timestamp"] = _epochs(data["timestamp"]).tolist()
+    return data
+
+
+def _rows(columns: Dict[str, list]) -> List[Dict]:
+    """Columnas → lista de objetos (formato JSON original)"""
+    names = list(columns)
+    values = [
+        [ts.isoformat() for ts in col] if name == "timestamp" else col
+        for name, col in columns.items()
+    ]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def _arrow(meta: Dict, columns: Dict[str, list]) -> bytes:
+    import pyarrow as pa
+
+    arrays = {}
+    for name, col in columns.items():
+        if name == "timestamp":
+            micros = np.round(_epochs(col) * 1e6).astype(np.int64)
+            arrays[name] = pa.array(micros, type=pa.timestamp("us", tz="UTC"))
+        else:
+            arrays[name] = pa.array(col)
+
+    table = pa.table(arrays).replace_schema_metadata({"meta": json.dumps(meta)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def render(fmt: str, meta: Dict, columns: Dict[str, list]) -> bytes:
+    """
+    Serializa una serie en el formato pedido.
+    meta: campos del encabezado (piso, bucket, ...)
+    columns: {campo: lista de valores}, con `timestamp` como datetimes
+    """
+    if fmt == COLUMNAR_JSON:
+        payload = {**meta, "data": _columnar(columns)}
+        if orjson is not None:
+            return orjson.dumps(payload)
+        return serialize(payload)
+    if fmt == MSGPACK:
+        return msgpack.packb({**meta, "data": _columnar(columns)}, use_bin_type=True)
+    if fmt == ARROW:
+        return _arrow(meta, columns)
+    return serialize({**meta, "data": _rows(columns)})
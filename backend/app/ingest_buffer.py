@@ -0,0 +1,226 @@
+"""
+Buffer de escritura diferida (write-behind) para lecturas de sensores.
+
+Las lecturas recibidas por POST /sensor-data/ se encolan en memoria, se
+confirman de inmediato al cliente y un hilo de fondo las escribe en
+`sensor_data` con un INSERT masivo cuando se alcanza un tamaño de lote o
+un intervalo de tiempo. El evento de ingesta se publica al confirmar cada
+lote, de modo que ventanas, agregados y métricas solo ven lecturas
+guardadas.
+
+Si la base no responde, el lote vuelve a la cola y los reintentos se
+espacian con espera exponencial (hasta `max_backoff`). Las lecturas que
+ya no caben en la cola se descartan y se cuentan en `descartados`.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app import crud
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Cola acotada de lecturas que se vacía en lotes hacia la base de datos"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_size: int = 50000,
+        flush_size: int = 1000,
+        flush_interval: float = 1.0,
+        max_backoff: float = 30.0
+    ):
+        self._session_factory = session_factory
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+
+        # Cada elemento es (instante de encolado, fila)
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        # Espera exponencial tras un lote fallido
+        self._backoff = 0.0
+        self._retry_at = 0.0
+
+        self._encolados = 0
+        self._escritos = 0
+        self._lotes = 0
+        self._fallos = 0
+        self._descartados = 0
+        self._ultimo_flush: Optional[datetime] = None
+        self._ultima_duracion = 0.0
+
+    # ========== CICLO DE VIDA ==========
+
+    def start(self):
+        """Inicia el hilo de vaciado"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="ingest-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        """Detiene el hilo y escribe todo lo pendiente"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    # ========== ENCOLADO ==========
+
+    def submit(self, row: Dict) -> bool:
+        """
+        Encola una lectura. Retorna False si el buffer está lleno para que
+        el llamador escriba directamente (contrapresión).
+        El evento de ingesta se publica al escribir el lote, no al encolar.
+        """
+        with self._cond:
+            if len(self._queue) >= self.max_size:
+                return False
+            self._queue.append((time.monotonic(), row))
+            self._encolados += 1
+            if len(self._queue) >= self.flush_size:
+                self._cond.notify()
+        return True
+
+    # ========== VACIADO ==========
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                if len(self._queue) < self.flush_size or self._backing_off():
+                    self._cond.wait(self._wait_time())
+            self._flush_due()
+
+    def _wait_time(self) -> float:
+        """
+        Tiempo restante hasta que la lectura más antigua deba escribirse, o
+        hasta el próximo reintento si el último lote falló
+        """
+        now = time.monotonic()
+        if self._backing_off(now):
+            return self._retry_at - now
+        if not self._queue:
+            return self.flush_interval
+        oldest = self._queue[0][0]
+        return max(0.0, oldest + self.flush_interval - now)
+
+    def _backing_off(self, now: Optional[float] = None) -> bool:
+        return (now or time.monotonic()) < self._retry_at
+
+    def _flush_due(self):
+        with self._cond:
+            if not self._queue:
+                return
+            if self._running and self._backing_off():
+                return
+            due = (
+                len(self._queue) >= self.flush_size
+                or time.monotonic() - self._queue[0][0] >= self.flush_interval
+                or not self._running
+            )
+        if due:
+            self.flush()
+
+    def _take_batch(self) -> List:
+        with self._cond:
+            n = min(self.flush_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _requeue(self, batch: List):
+        """Devuelve un lote fallido al frente de la cola, sin exceder el límite"""
+        with self._cond:
+            space = self.max_size - len(self._queue)
+            keep = batch[:max(space, 0)]
+            dropped = len(batch) - len(keep)
+            self._descartados += dropped
+            self._queue.extendleft(reversed(keep))
+        if dropped:
+            logger.error("Buffer de ingesta lleno: se descartaron %d lecturas sin guardar", dropped)
+
+    def flush(self) -> int:
+        """Escribe en lotes todo lo pendiente. Retorna filas escritas."""
+        total = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+
+                start = time.perf_counter()
+                db = self._session_factory()
+                try:
+                    # Publica el evento de ingesta después del commit
+                    crud.create_sensor_data_bulk(db, [row for _, row in batch])
+                except Exception:
+                    db.rollback()
+                    self._fallos += 1
+                    self._requeue(batch)
+                    self._fail()
+                    break
+                finally:
+                    db.close()
+
+                self._backoff = self._retry_at = 0.0
+                self._escritos += len(batch)
+                self._lotes += 1
+                self._ultimo_flush = datetime.now(timezone.utc)
+                self._ultima_duracion = time.perf_counter() - start
+                total += len(batch)
+        return total
+
+    def _fail(self):
+        """Programa el próximo reintento con espera exponencial"""
+        first = self._backoff == 0.0
+        self._backoff = min(
+            self.max_backoff, self._backoff * 2 if not first else self.flush_interval
+        )
+        self._retry_at = time.monotonic() + self._backoff
+        if first:
+            logger.exception("Error al vaciar el buffer de ingesta")
+        else:
+            logger.warning(
+                "El buffer de ingesta sigue sin poder escribir (%d fallos); reintento en %.1fs",
+                self._fallos, self._backoff
+            )
+
+    # ========== OBSERVABILIDAD ==========
+
+    def stats(self) -> Dict:
+        """Profundidad de la cola, retraso de escritura y contadores"""
+        with self._cond:
+            depth = len(self._queue)
+            lag = time.monotonic() - self._queue[0][0] if self._queue else 0.0
+        return {
+            "activo": self._running,
+            "profundidad": depth,
+            "capacidad": self.max_size,
+            "retraso_segundos": round(lag, 3),
+            "encolados": self._encolados,
+            "escritos": self._escritos,
+            "lotes": self._lotes,
+            "fallos": self._fallos,
+            "descartados": self._descartados,
+            "reintento_en_segundos": round(max(0.0, self._retry_at - time.monotonic()), 3),
+            "ultimo_flush": self._ultimo_flush.isoformat() if self._ultimo_flush else None,
+            "ultima_duracion_flush_ms": round(self._ultima_duracion * 1000, 2),
+        }
@@ -1,20 +1,376 @@
-from fastapi import FastAPI, Depends, HTTPException
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
+from pydantic import ValidationError
+
+from app.database import engine, get_db, SessionLocal, async_engine, get_async_db
+from app import schemas, crud, crud_async, events, export, formats, metrics, migrations, retention
+from app.ingest_buffer import WriteBehindBuffer
+from app.ml_predictor import SimplePredictor, StreamingPredictor, VARIABLES, to_epoch
+from app.prophet_predictor import HAS_PROPHET, ProphetPredictor
+from app.recent_window import RecentWindowStore
+from app.shared_window import SharedWindowStore, generation_id
+from app.rollups import GRANULARIDADES, RollupAccumulator
+from app.background import PeriodicWorker
+from app.broadcaster import Broadcaster
+from app.alert_index import OpenAlertIndex
+from app.anomalies import AnomalyDetector
+from app.forecasts import ForecastCache, ForecastScheduler
+from app.response_cache import ResponseCache, request_key, to_response
+
+logger = logging.getLogger(__name__)
+
+# Arranque rápido (escalado a cero): la precarga de memoria corre en segundo
+# plano y el esquema no se migra al arrancar (usar `python migrate.py`)
+FAST_STARTUP = os.getenv("FAST_STARTUP", "0").lower() in ("1", "true", "yes")
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "0" if FAST_STARTUP else "1").lower() in ("1", "true", "yes")
+
+# Duración de cada fase del último arranque (segundos)
+startup_timings = {}
+
+# Buffer de escritura diferida (opcional) para POST /sensor-data/
+ingest_buffer = None
+if os.getenv("INGEST_WRITE_BEHIND", "0").lower() in ("1", "true", "yes"):
+    ingest_buffer = WriteBehindBuffer(
+        SessionLocal,
+        max_size=int(os.getenv("INGEST_BUFFER_MAX", "50000")),
+        flush_size=int(os.getenv("INGEST_FLUSH_SIZE", "1000")),
+        flush_interval=float(os.getenv("INGEST_FLUSH_INTERVAL", "1.0"))
+    )
+
+# Inicializar predictor. Con PREDICTOR_BACKEND=prophet los pronósticos salen
+# de modelos Prophet ajustados en segundo plano (requirements-ml.txt); los
+# pisos aún sin modelo usan el predictor simple
+simple_predictor = SimplePredictor()
+predictor = simple_predictor
+prophet_predictor = None
+if os.getenv("PREDICTOR_BACKEND", "simple").lower() == "prophet":
+    if HAS_PROPHET:
+        prophet_predictor = predictor = ProphetPredictor(
+            SessionLocal,
+            simple_predictor,
+            workers=int(os.getenv("PROPHET_WORKERS", "2")),
+            max_models=int(os.getenv("PROPHET_MAX_MODELS", "512")),
+            max_age=float(os.getenv("PROPHET_MAX_AGE", "3600")),
+            min_new_rows=int(os.getenv("PROPHET_MIN_NEW_ROWS", "300")),
+            granularidad=os.getenv("PROPHET_GRANULARIDAD", "15m"),
+            dias=float(os.getenv("PROPHET_DIAS", "14"))
+        )
+        events.subscribe(events.SENSOR_DATA, prophet_predictor.on_sensor_data)
+    else:
+        logger.warning("PREDICTOR_BACKEND=prophet pero prophet no está instalado; se usa el predictor simple")
+
+# Ventana reciente en memoria por (edificio, piso) para /predict y /dashboard.
+# Con SHARED_WINDOW_PATH (p. ej. /dev/shm/smartfloors-window) la ventana vive
+# en memoria compartida y todos los workers de gunicorn ven las mismas lecturas
+SHARED_WINDOW_PATH = os.getenv("SHARED_WINDOW_PATH")
+if SHARED_WINDOW_PATH:
+    recent_window = SharedWindowStore(
+        SHARED_WINDOW_PATH,
+        capacity=int(os.getenv("RECENT_WINDOW_CAPACITY", "3600")),
+        max_slots=int(os.getenv("SHARED_WINDOW_SLOTS", "256"))
+    )
+else:
+    recent_window = RecentWindowStore(
+        capacity=int(os.getenv("RECENT_WINDOW_CAPACITY", "3600"))
+    )
+events.subscribe(events.SENSOR_DATA, recent_window.add_rows)
+
+# Predictor incremental (opcional): responde /predict en tiempo constante
+streaming_predictor = None
+if os.getenv("PREDICTOR_STREAMING", "0").lower() in ("1", "true", "yes"):
+    streaming_predictor = StreamingPredictor(simple_predictor)
+    events.subscribe(events.SENSOR_DATA, streaming_predictor.update)
+
+# Agregados por intervalo de tiempo para /sensor-data/chart?bucket=...
+rollup_accumulator = RollupAccumulator(SessionLocal)
+events.subscribe(events.SENSOR_DATA, rollup_accumulator.add_rows)
+rollup_worker = PeriodicWorker(
+    "rollup-flush",
+    float(os.getenv("ROLLUP_FLUSH_INTERVAL", "10")),
+    rollup_accumulator.flush
+)
+
+# Retención (opcional): compacta y elimina lecturas más antiguas que RETENTION_DAYS
+retention_worker = None
+RETENTION_DAYS = float(os.getenv("RETENTION_DAYS", "0"))
+if RETENTION_DAYS > 0:
+    retention_worker = PeriodicWorker(
+        "retention",
+        float(os.getenv("RETENTION_INTERVAL", "21600")),
+        lambda: retention.run(engine, SessionLocal, RETENTION_DAYS)
+    )
+
+# Alertas activas en memoria (la deduplicación por edificio, piso, tipo y
+# severidad la hace la base); se reconcilia con la base cada
+# ALERT_SYNC_INTERVAL segundos para ver los cambios de otros workers
+open_alerts = OpenAlertIndex(
+    suppression_seconds=float(os.getenv("ALERT_SUPPRESSION_SECONDS", "900"))
+)
+events.subscribe(events.ALERTS, open_alerts.on_alert)
+
+
+def _sync_alerts():
+    db = SessionLocal()
+    try:
+        open_alerts.sync(db)
+    finally:
+        db.close()
+
+
+alert_sync_worker = PeriodicWorker(
+    "alert-sync",
+    float(os.getenv("ALERT_SYNC_INTERVAL", "5")),
+    _sync_alerts
+)
+
+# Detección de anomalías en la ingesta: alerta con la siguiente lectura atípica
+anomaly_detector = None
+if os.getenv("ANOMALY_DETECTION", "1").lower() in ("1", "true", "yes"):
+    anomaly_detector = AnomalyDetector(
+        SessionLocal,
+        open_alerts,
+        alpha=float(os.getenv("ANOMALY_ALPHA", "0.05")),
+        threshold=float(os.getenv("ANOMALY_THRESHOLD", "4")),
+        warmup=int(os.getenv("ANOMALY_WARMUP", "30")),
+        cooldown=float(os.getenv("ANOMALY_COOLDOWN", "300"))
+    )
+    events.subscribe(events.SENSOR_DATA, anomaly_detector.on_sensor_data)
+
+
+def _alert_on_high_risk(payload):
+    """
+    Registra una alerta por cada variable cuyo riesgo pronosticado pasa a
+    alto. Mientras el riesgo sigue alto no se repite: `ocurrencias` cuenta
+    episodios, no pasadas del scheduler.
+    """
+    anteriores = payload.get("anteriores") or {}
+    altas = {
+        var: p for var, p in payload["predicciones"].items()
+        if p["riesgo"] == "alto" and anteriores.get(var, {}).get("riesgo") != "alto"
+    }
+    if not altas:
+        return
+    db = SessionLocal()
+    try:
+        for variable, prediction in altas.items():
+            open_alerts.raise_alert(db, schemas.AlertCreate(
+                edificio=payload["edificio"],
+                piso=payload["piso"],
+                tipo=variable,
+                severidad="high",
+                mensaje=f"Predicción de riesgo alto en {variable}",
+                recomendacion="; ".join(prediction["recomendaciones"])
+            ))
+    finally:
+        db.close()
+
+
+# Pronósticos precalculados en segundo plano para /predict y /dashboard
+forecast_cache = ForecastCache()
+forecast_scheduler = ForecastScheduler(
+    predictor,
+    recent_window,
+    forecast_cache,
+    # El modo incremental reemplaza la pasada por lotes (salvo con Prophet)
+    streaming=streaming_predictor if prophet_predictor is None else None,
+    interval=float(os.getenv("FORECAST_INTERVAL", "30")),
+    min_new_rows=int(os.getenv("FORECAST_MIN_NEW_ROWS", "500"))
+)
+events.subscribe(events.SENSOR_DATA, forecast_scheduler.on_sensor_data)
+events.subscribe(events.PREDICTIONS, _alert_on_high_risk)
+
+# Caché de respuestas serializadas (con ETag) para gráficas, dashboards y alertas
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "15"))
+)
+events.subscribe(events.SENSOR_DATA, response_cache.on_sensor_data)
+events.subscribe(events.ALERTS, response_cache.on_alert)
+events.subscribe(events.PREDICTIONS, response_cache.on_predictions)
+
+# Difusión en tiempo real (SSE / WebSocket) de lecturas, alertas y predicciones
+broadcaster = Broadcaster(queue_size=int(os.getenv("STREAM_QUEUE_SIZE", "256")))
+events.subscribe(events.SENSOR_DATA, broadcaster.on_sensor_data)
+events.subscribe(events.ALERTS, broadcaster.on_alert)
+events.subscribe(events.PREDICTIONS, broadcaster.on_predictions)
+
+# Métricas de ingesta y del estado en memoria para GET /metrics
+events.subscribe(events.SENSOR_DATA, metrics.on_sensor_data)
+metrics.Gauge(
+    "smartfloors_ingest_buffer_depth",
+    "Lecturas encoladas en el buffer de escritura diferida",
+    lambda: ingest_buffer.stats()["profundidad"] if ingest_buffer else None
+)
+metrics.Gauge(
+    "smartfloors_ingest_buffer_dropped_total",
+    "Lecturas descartadas sin guardar por el buffer de escritura diferida",
+    lambda: ingest_buffer.stats()["descartados"] if ingest_buffer else None,
+    kind="counter"
+)
+metrics.Gauge(
+    "smartfloors_response_cache_entries",
+    "Respuestas serializadas en caché",
+    lambda: response_cache.stats()["entradas"]
+)
+metrics.Gauge(
+    "smartfloors_response_cache_lookups_total",
+    "Búsquedas en la caché de respuestas por resultado",
+    lambda: {("acierto",): response_cache.hits, ("fallo",): response_cache.misses},
+    ("result",),
+    kind="counter"
+)
+metrics.Gauge("smartfloors_forecast_floors", "Pisos con pronóstico en caché", lambda: len(forecast_cache))
+metrics.Gauge("smartfloors_open_alerts", "Alertas activas en memoria", lambda: len(open_alerts))
+if prophet_predictor:
+    metrics.Gauge(
+        "smartfloors_prophet_models", "Modelos Prophet ajustados en caché",
+        lambda: prophet_predictor.stats()["modelos"]
+    )
+    metrics.Gauge(
+        "smartfloors_prophet_fits_total", "Ajustes de Prophet completados",
+        lambda: prophet_predictor.fits, kind="counter"
+    )
+
+# Segundos sin mensajes antes de enviar un keep-alive a los clientes
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+
+
+def _backfill(minutes: int = 60):
+    """
+    Precarga la última hora de lecturas y las alertas activas en memoria.
+    Con la ventana compartida solo la precarga el primer worker de cada
+    arranque del servidor (incluida la última lectura de los pisos sin
+    datos en la última hora, para que los dashboards no tengan que
+    consultar la base).
+    """
+    fill_window = not SHARED_WINDOW_PATH or recent_window.claim_backfill(generation_id())
+    rows, latest = [], []
+    db = SessionLocal()
+    try:
+        if fill_window or streaming_predictor or anomaly_detector:
+            rows = [row._mapping for row in crud.get_recent_rows_for_prediction(db, minutes)]
+        if fill_window and SHARED_WINDOW_PATH:
+            present = {(row["edificio"], row["piso"]) for row in rows}
+            latest = [
+                crud.sensor_row(row) for row in crud.get_latest_per_floor(db, None)
+                if (row.edificio, row.piso) not in present
+            ]
+        open_alerts.load(crud.get_open_alerts(db))
+    finally:
+        db.close()
 
-from app.database import engine, get_db, Base
-from app import models, schemas, crud
-from app.ml_predictor import SimplePredictor
+    if fill_window:
+        recent_window.add_rows(latest + rows)
+    if streaming_predictor:
+        streaming_predictor.update(rows)
+    if anomaly_detector:
+        anomaly_detector.prime(rows)
+
+
+def _window_version(edificio: str, piso: Optional[int] = None):
+    """
+    Parte de la clave de caché de respuestas que cambia con cada ingesta en
+    cualquier worker (ventana compartida). Sin ella, un worker seguiría
+    sirviendo la respuesta cacheada hasta recibir su propio evento.
+    """
+    if SHARED_WINDOW_PATH:
+        return (recent_window.version(edificio, piso),)
+    return ()
+
+
+def _preload():
+    """Lecturas recientes, alertas activas y primer pronóstico en memoria"""
+    start = time.perf_counter()
+    _backfill(60)
+    forecast_scheduler.run()
+    startup_timings["precarga"] = time.perf_counter() - start
+
+
+def _ping_sync():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def _ping_async():
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def _warm_up():
+    """
+    Abre la primera conexión de cada engine (DNS, TLS, autenticación) en
+    paralelo, para que la primera petición no pague ese costo.
+    """
+    await asyncio.gather(asyncio.to_thread(_ping_sync), _ping_async())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranque y apagado ordenado de los componentes en segundo plano"""
+    start = time.perf_counter()
+    if AUTO_MIGRATE:
+        # Crear tablas e índices faltantes en la base de datos
+        migrations.upgrade(engine)
+        startup_timings["migraciones"] = time.perf_counter() - start
+
+    phase = time.perf_counter()
+    await _warm_up()
+    startup_timings["conexiones"] = time.perf_counter() - phase
+
+    if FAST_STARTUP:
+        threading.Thread(target=_preload, name="preload", daemon=True).start()
+    else:
+        _preload()
+    broadcaster.bind_loop(asyncio.get_running_loop())
+
+    if ingest_buffer:
+        ingest_buffer.start()
+    rollup_worker.start()
+    alert_sync_worker.start()
+    forecast_scheduler.start()
+    if retention_worker:
+        retention_worker.start()
+    startup_timings["arranque"] = time.perf_counter() - start
+    logger.info(
+        "Arranque en %.3fs: %s", startup_timings["arranque"],
+        ", ".join(f"{k}={v:.3f}s" for k, v in startup_timings.items())
+    )
+    yield
+    if retention_worker:
+        retention_worker.stop(run_final=False)
+    forecast_scheduler.stop()
+    if ingest_buffer:
+        ingest_buffer.stop()
+    rollup_worker.stop()
+    alert_sync_worker.stop(run_final=False)
+    if prophet_predictor:
+        prophet_predictor.shutdown()
+    if anomaly_detector:
+        anomaly_detector.stop()
+    await async_engine.dispose()
 
-# Crear tablas en la base de datos
-Base.metadata.create_all(bind=engine)
 
 # Inicializar FastAPI
 app = FastAPI(
     title="SmartFloors API",
     description="API para monitoreo y alertas de edificios multi-piso",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS para permitir peticiones desde Flutter
@@ -26,8 +382,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Inicializar predictor
-predictor = SimplePredictor()
+# Métricas HTTP. El último middleware agregado es el más externo: este
+# envuelve a CORS, así que también se cuentan los preflight OPTIONS y las
+# peticiones que CORS rechaza (sin endpoint, quedan en "sin_ruta")
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Máximo de lecturas aceptadas por lote en /sensor-data/batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+# Filas leídas por bloque en /export
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
 
 
 # ========== ENDPOINTS ==========
@@ -43,31 +407,159 @@ def root():
 
 
 @app.get("/health")
-def health_check():
-    """Verificar estado del servicio"""
-    return {"status": "healthy", "timestamp": "2024-01-01T00:00:00"}
+def health_check(response: Response):
+    """Verificar estado del servicio (503 si la base de datos no responde)"""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        database = "ok"
+    except Exception:
+        database = "error"
+        response.status_code = 503
+
+    return {
+        "status": "healthy" if database == "ok" else "unhealthy",
+        "timestamp": datetime.now(timezone.utc),
+        "database": database,
+        "ingest_buffer": ingest_buffer.stats()["activo"] if ingest_buffer else None,
+        "pronosticos": len(forecast_cache)
+    }
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Métricas en formato de texto de Prometheus"""
+    # Encabezado explícito: con media_type Starlette agregaría otro charset
+    return Response(content=metrics.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
 
 
 # ========== SENSOR DATA ENDPOINTS ==========
 
-@app.post("/sensor-data/", response_model=schemas.SensorDataResponse)
-def create_sensor_reading(
+@app.post(
+    "/sensor-data/",
+    response_model=Union[schemas.SensorDataResponse, schemas.SensorDataQueued]
+)
+async def create_sensor_reading(
     data: schemas.SensorDataCreate,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Registrar nueva lectura de sensores"""
-    return crud.create_sensor_data(db, data)
+    """
+    Registrar nueva lectura de sensores.
+    Con INGEST_WRITE_BEHIND activo la lectura se encola y se responde 202;
+    si el buffer está lleno se escribe directamente.
+    """
+    if ingest_buffer:
+        row = data.model_dump()
+        row["timestamp"] = datetime.now(timezone.utc)
+        if ingest_buffer.submit(row):
+            response.status_code = 202
+            return {
+                "status": "encolado",
+                "edificio": row["edificio"],
+                "piso": row["piso"],
+                "timestamp": row["timestamp"]
+            }
+
+    return await crud_async.create_sensor_data(db, data)
+
+
+@app.get("/ingest/stats")
+def get_ingest_stats():
+    """Estado del buffer de escritura diferida (profundidad y retraso)"""
+    if not ingest_buffer:
+        return {"activo": False}
+    return ingest_buffer.stats()
+
+
+@app.post("/sensor-data/batch", response_model=schemas.SensorDataBatchResponse)
+async def create_sensor_readings_batch(
+    batch: schemas.SensorDataBatchCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Registrar un lote de lecturas en una sola transacción.
+    Cada item se valida por separado; los inválidos se reportan en
+    `errores` y el resto se inserta con un único INSERT masivo.
+    """
+    if len(batch.items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote excede el máximo de {MAX_BATCH_SIZE} lecturas"
+        )
+
+    rows = []
+    estados = []
+    errores = []
+    for i, item in enumerate(batch.items):
+        try:
+            rows.append(schemas.SensorDataCreate.model_validate(item).model_dump())
+            estados.append("ok")
+        except ValidationError as e:
+            estados.append("invalido")
+            errores.append({
+                "indice": i,
+                "detalle": "; ".join(err["msg"] for err in e.errors())
+            })
+
+    insertados = await crud_async.create_sensor_data_bulk(db, rows)
+
+    return {
+        "recibidos": len(batch.items),
+        "insertados": insertados,
+        "rechazados": len(errores),
+        "estados": estados,
+        "errores": errores
+    }
 
 
 @app.get("/sensor-data/", response_model=List[schemas.SensorDataResponse])
 def get_sensor_readings(
+    request: Request,
+    response: Response,
     edificio: str = "A",
     piso: Optional[int] = None,
     limit: int = 100,
+    before: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Obtener lecturas de sensores"""
-    return crud.get_sensor_data(db, edificio, piso, limit)
+    """
+    Obtener lecturas de sensores, de la más reciente a la más antigua.
+    Paginación por cursor: el header `X-Next-Cursor` trae un cursor opaco
+    (URL-safe) que, enviado como `before=<cursor>`, retorna las lecturas
+    anteriores a la última de la página.
+    Con `Accept` columnar, MessagePack o Arrow IPC las filas se leen sin
+    objetos ORM ni validación por fila (ver `app.formats`).
+    """
+    fmt = formats.negotiate(request.headers.get("accept"))
+
+    cursor = None
+    if before is not None:
+        try:
+            cursor = crud.decode_cursor(before)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail="Cursor inválido. Use el valor del header X-Next-Cursor"
+            )
+
+    if fmt == formats.JSON:
+        data = crud.get_sensor_data(db, edificio, piso, limit, before=cursor)
+    else:
+        data = crud.get_sensor_data_rows(db, edificio, piso, limit, before=cursor)
+        columns = {
+            name: [row._mapping[name] for row in data]
+            for name in schemas.SensorDataResponse.model_fields
+        }
+        response = Response(
+            content=formats.render(fmt, {"edificio": edificio, "piso": piso}, columns),
+            media_type=fmt
+        )
+
+    if len(data) == limit and data:
+        last = data[-1]
+        response.headers["X-Next-Cursor"] = crud.encode_cursor(last.timestamp, last.id)
+    return data if fmt == formats.JSON else response
 
 
 @app.get("/sensor-data/piso/{piso}", response_model=List[schemas.SensorDataResponse])
@@ -93,6 +585,148 @@ def get_sensor_by_floor(
 
 # ========== PREDICTION ENDPOINTS ==========
 
+def _rows_to_arrays(rows):
+    """Convierte filas de lecturas a arreglos (timestamps, valores)"""
+    timestamps = np.array([to_epoch(r.timestamp) for r in rows], dtype=np.float64)
+    values = np.array(
+        [(r.temp_c, r.humedad_pct, r.energia_kw) for r in rows],
+        dtype=np.float64
+    ).reshape(-1, len(VARIABLES))
+    return timestamps, values
+
+
+def _predict_streaming(edificio: str, piso: int, variables):
+    """Predicciones del modo incremental; None si no está activo o sin estado"""
+    if not streaming_predictor:
+        return None
+    return streaming_predictor.predict_floor(edificio, piso, variables)
+
+
+def _predict_window(edificio: str, piso: int, timestamps, values, variables):
+    """Predicciones de un piso a partir de su ventana; None si está vacía"""
+    if timestamps.size == 0:
+        return None
+
+    columns = [VARIABLES.index(var) for var in variables]
+    key = (edificio, piso)
+    with metrics.PREDICTOR_SECONDS.time(("peticion",)):
+        predictions = predictor.predict_many(
+            [key],
+            np.zeros(timestamps.size, dtype=np.intp),
+            timestamps,
+            values[:, columns],
+            variables
+        )[key]
+    metrics.PREDICTOR_FLOORS.inc(1, ("peticion",))
+    return predictions
+
+
+def _predict_floor(db: Session, edificio: str, piso: int, variables=VARIABLES):
+    """
+    Predicciones de un piso; None si no hay lecturas recientes.
+    La ventana sale de memoria y solo se consulta la base de datos si el
+    piso aún no tiene buffer.
+    """
+    streamed = _predict_streaming(edificio, piso, variables)
+    if streamed is not None:
+        return streamed
+
+    window = recent_window.window(edificio, piso, 60)
+    if window is None:
+        window = _rows_to_arrays(crud.get_recent_data_for_prediction(db, edificio, piso, 60))
+    return _predict_window(edificio, piso, *window, variables)
+
+
+async def _predict_floor_async(
+    db: AsyncSession,
+    edificio: str,
+    piso: int,
+    variables=VARIABLES
+):
+    """Versión asíncrona de `_predict_floor`"""
+    streamed = _predict_streaming(edificio, piso, variables)
+    if streamed is not None:
+        return streamed
+
+    window = recent_window.window(edificio, piso, 60)
+    if window is None:
+        rows = await crud_async.get_recent_data_for_prediction(db, edificio, piso, 60)
+        window = _rows_to_arrays(rows)
+    return _predict_window(edificio, piso, *window, variables)
+
+
+async def _predict_floors_async(db: AsyncSession, edificio: str, keys):
+    """
+    Predicciones de varios pisos en una sola pasada del predictor.
+    Retorna solo los pisos con lecturas recientes.
+    """
+    group_idx, timestamps, values = recent_window.block(keys, 60)
+
+    # Pisos sin buffer en memoria: una sola consulta para todos ellos
+    missing = {piso for _, piso in keys if not recent_window.has(edificio, piso)}
+    if missing:
+        index = {piso: g for g, (_, piso) in enumerate(keys)}
+        rows = [
+            r for r in await crud_async.get_recent_rows_for_prediction(db, 60, edificio)
+            if r.piso in missing
+        ]
+        db_timestamps, db_values = _rows_to_arrays(rows)
+        group_idx = np.concatenate([
+            group_idx, np.array([index[r.piso] for r in rows], dtype=np.intp)
+        ])
+        timestamps = np.concatenate([timestamps, db_timestamps])
+        values = np.vstack([values, db_values])
+
+    with metrics.PREDICTOR_SECONDS.time(("peticion",)):
+        predictions = predictor.predict_many(keys, group_idx, timestamps, values)
+    counts = np.bincount(group_idx, minlength=len(keys))
+    metrics.PREDICTOR_FLOORS.inc(int(np.count_nonzero(counts)), ("peticion",))
+    return {key: predictions[key] for g, key in enumerate(keys) if counts[g]}
+
+
+def _forecast_info(entry, edad: bool = True):
+    """
+    Versión, hora de cálculo y antigüedad de un pronóstico de la caché.
+    Con edad=False se omite la antigüedad: las respuestas que se guardan en
+    `response_cache` (y su ETag) no deben congelarla; el cliente la calcula
+    desde `calculado`.
+    """
+    info = {
+        "version": entry["version"],
+        "calculado": datetime.fromtimestamp(entry["calculado"], timezone.utc)
+    }
+    if edad:
+        info["edad_segundos"] = round(time.time() - entry["calculado"], 3)
+    return info
+
+
+def _forecast(db: Session, edificio: str, piso: int):
+    """
+    Pronóstico de un piso desde la caché; None si no hay lecturas recientes.
+    Un piso que el scheduler aún no calculó se predice aquí y se guarda.
+    """
+    entry = forecast_cache.get(edificio, piso)
+    if entry is None:
+        predictions = _predict_floor(db, edificio, piso)
+        if predictions is None:
+            return None
+        forecast_cache.put({(edificio, piso): predictions})
+        entry = forecast_cache.get(edificio, piso)
+    return entry
+
+
+async def _forecast_async(db: AsyncSession, edificio: str, piso: int):
+    """Versión asíncrona de `_forecast`"""
+    entry = forecast_cache.get(edificio, piso)
+    if entry is None:
+        predictions = await _predict_floor_async(db, edificio, piso)
+        if predictions is None:
+            return None
+        forecast_cache.put({(edificio, piso): predictions})
+        entry = forecast_cache.get(edificio, piso)
+    return entry
+
+
 @app.get("/predict/{piso}/{variable}")
 def predict_variable(
     piso: int,
@@ -103,54 +737,29 @@ def predict_variable(
     """
     Predecir valor de variable 60 minutos adelante
     Variables válidas: temp_c, humedad_pct, energia_kw
+    El pronóstico sale de la caché del scheduler; `pronostico` indica su
+    versión y antigüedad.
     """
-    valid_variables = ["temp_c", "humedad_pct", "energia_kw"]
-    
-    if variable not in valid_variables:
+    if variable not in VARIABLES:
         raise HTTPException(
             status_code=400,
-            detail=f"Variable inválida. Use: {', '.join(valid_variables)}"
+            detail=f"Variable inválida. Use: {', '.join(VARIABLES)}"
         )
     
-    # Obtener datos históricos recientes
-    historical_data = crud.get_recent_data_for_prediction(db, edificio, piso, 60)
+    # Pronóstico precalculado (las alertas de riesgo alto las crea el scheduler)
+    entry = _forecast(db, edificio, piso)
     
-    if not historical_data:
+    if entry is None:
         raise HTTPException(
             status_code=404,
             detail="No hay datos suficientes para predicción"
         )
     
-    # Convertir a diccionarios
-    data_dicts = [
-        {
-            "timestamp": d.timestamp,
-            "temp_c": d.temp_c,
-            "humedad_pct": d.humedad_pct,
-            "energia_kw": d.energia_kw
-        }
-        for d in historical_data
-    ]
-    
-    # Realizar predicción
-    prediction = predictor.predict(data_dicts, variable)
-    
-    # Crear alerta si hay riesgo alto
-    if prediction["riesgo"] == "alto":
-        alert = schemas.AlertCreate(
-            edificio=edificio,
-            piso=piso,
-            tipo=variable,
-            severidad="high",
-            mensaje=f"Predicción de riesgo alto en {variable}",
-            recomendacion="; ".join(prediction["recomendaciones"])
-        )
-        crud.create_alert(db, alert)
-    
     return {
         "piso": piso,
         "variable": variable,
-        **prediction
+        **entry["predicciones"][variable],
+        "pronostico": _forecast_info(entry)
     }
 
 
@@ -158,15 +767,27 @@ def predict_variable(
 
 @app.get("/alerts/", response_model=List[schemas.AlertResponse])
 def get_alerts(
+    request: Request,
     edificio: str = "A",
     piso: Optional[int] = None,
     solo_activas: bool = True,
     db: Session = Depends(get_db)
 ):
-    """Obtener alertas"""
-    if solo_activas:
-        return crud.get_active_alerts(db, edificio, piso)
-    return crud.get_all_alerts(db, edificio)
+    """Obtener alertas (las activas se leen del índice en memoria)"""
+    key = request_key(request)
+    cached = response_cache.get(key)
+    if cached is None:
+        if solo_activas:
+            alerts = open_alerts.active(edificio, piso)
+        else:
+            alerts = crud.get_all_alerts(db, edificio)
+            piso = None
+        cached = response_cache.put(
+            key,
+            [schemas.AlertResponse.model_validate(a) for a in alerts],
+            [(edificio, piso)]
+        )
+    return to_response(request, cached)
 
 
 @app.post("/alerts/", response_model=schemas.AlertResponse)
@@ -174,10 +795,33 @@ def create_alert(
     alert: schemas.AlertCreate,
     db: Session = Depends(get_db)
 ):
-    """Crear nueva alerta"""
+    """Crear nueva alerta (si la condición ya tiene una activa, se agrupa en ella)"""
     return crud.create_alert(db, alert)
 
 
+@app.post("/alerts/resolver", response_model=schemas.AlertResolveResponse)
+def resolve_alerts_bulk(
+    request: schemas.AlertResolveRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Resolver varias alertas activas en una sola operación: por `ids` y/o
+    por filtros (edificio, piso, tipo, severidad, `antes_de`). Se exige al
+    menos un criterio para no resolver todas las alertas por accidente.
+    """
+    criterios = request.model_dump(exclude_none=True)
+    if not criterios:
+        raise HTTPException(
+            status_code=400,
+            detail="Indique ids o al menos un filtro (edificio, piso, tipo, severidad, antes_de)"
+        )
+    if request.ids is not None and not request.ids:
+        return {"resueltas": 0, "ids": []}
+
+    alertas = crud.resolve_alerts(db, **criterios)
+    return {"resueltas": len(alertas), "ids": [a["id"] for a in alertas]}
+
+
 @app.put("/alerts/{alert_id}/resolver")
 def resolve_alert(alert_id: int, db: Session = Depends(get_db)):
     """Marcar alerta como resuelta"""
@@ -189,105 +833,285 @@ def resolve_alert(alert_id: int, db: Session = Depends(get_db)):
 
 # ========== DASHBOARD ENDPOINT ==========
 
+@app.get("/dashboard")
+async def get_building_dashboard(
+    request: Request,
+    edificio: str = "A",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obtener el dashboard de todos los pisos de un edificio.
+    Usa una sola consulta (última lectura por piso), las alertas activas en
+    memoria y los pronósticos de la caché; los pisos sin pronóstico se
+    calculan en una sola pasada del predictor. `pronostico` trae la
+    versión y la hora de cálculo (`calculado`) de cada piso.
+    """
+    key = request_key(request, *_window_version(edificio))
+    cached = response_cache.get(key)
+    if cached is None:
+        payload = await _building_dashboard(db, edificio)
+        cached = response_cache.put(key, payload, [(edificio, None)])
+    return to_response(request, cached)
+
+
+async def _building_dashboard(db: AsyncSession, edificio: str):
+    """Contenido de GET /dashboard"""
+    floors = []
+    if SHARED_WINDOW_PATH:
+        # Últimas lecturas desde la memoria compartida, sin ir a la base
+        floors = [(row["piso"], row) for row in recent_window.latest_rows(edificio)]
+    if not floors:
+        floors = [(row.piso, row) for row in await crud_async.get_latest_per_floor(db, edificio)]
+
+    alerts_by_floor = {}
+    for alert in open_alerts.active(edificio):
+        alerts_by_floor.setdefault(alert["piso"], []).append(alert)
+
+    keys = [(edificio, piso) for piso, _ in floors]
+    forecasts = {key: forecast_cache.get(*key) for key in keys}
+    missing_keys = [key for key in keys if forecasts[key] is None]
+    if missing_keys:
+        computed = await _predict_floors_async(db, edificio, missing_keys)
+        if computed:
+            forecast_cache.put(computed)
+            forecasts.update({key: forecast_cache.get(*key) for key in computed})
+
+    return {
+        "edificio": edificio,
+        "pisos": [
+            {
+                "piso": piso,
+                "datos_actuales": row,
+                "alertas_activas": alerts_by_floor.get(piso, []),
+                "predicciones": forecasts[key]["predicciones"] if forecasts[key] else {},
+                "pronostico": _forecast_info(forecasts[key], edad=False) if forecasts[key] else None
+            }
+            for (piso, row), key in zip(floors, keys)
+        ]
+    }
+
+
 @app.get("/dashboard/{piso}")
-def get_dashboard_data(
+async def get_dashboard_data(
+    request: Request,
     piso: int,
     edificio: str = "A",
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Obtener todos los datos para el dashboard de un piso"""
-    
-    # Datos recientes
-    recent_data = crud.get_sensor_data(db, edificio, piso, 1)
+    """
+    Obtener todos los datos para el dashboard de un piso.
+    `pronostico` trae la versión y la hora de cálculo (`calculado`).
+    """
+    key = request_key(request, *_window_version(edificio, piso))
+    cached = response_cache.get(key)
+    if cached is None:
+        payload = await _floor_dashboard(db, edificio, piso)
+        cached = response_cache.put(key, payload, [(edificio, piso)])
+    return to_response(request, cached)
+
+
+async def _floor_dashboard(db: AsyncSession, edificio: str, piso: int):
+    """Contenido de GET /dashboard/{piso}"""
+    # Datos recientes (de la memoria compartida si está habilitada)
+    current = recent_window.latest(edificio, piso) if SHARED_WINDOW_PATH else None
+    if current is None:
+        recent_data = await crud_async.get_sensor_data(db, edificio, piso, 1)
+        current = recent_data[0] if recent_data else None
     
     # Alertas activas
-    alerts = crud.get_active_alerts(db, edificio, piso)
-    
-    # Predicciones
-    predictions = {}
-    historical_data = crud.get_recent_data_for_prediction(db, edificio, piso, 60)
+    alerts = open_alerts.active(edificio, piso)
     
-    if historical_data:
-        data_dicts = [
-            {
-                "timestamp": d.timestamp,
-                "temp_c": d.temp_c,
-                "humedad_pct": d.humedad_pct,
-                "energia_kw": d.energia_kw
-            }
-            for d in historical_data
-        ]
-        
-        for var in ["temp_c", "humedad_pct", "energia_kw"]:
-            predictions[var] = predictor.predict(data_dicts, var)
+    # Predicciones precalculadas de las tres variables
+    entry = await _forecast_async(db, edificio, piso)
     
     return {
         "piso": piso,
         "edificio": edificio,
-        "datos_actuales": recent_data[0] if recent_data else None,
+        "datos_actuales": current,
         "alertas_activas": alerts,
-        "predicciones": predictions
+        "predicciones": entry["predicciones"] if entry else {},
+        "pronostico": _forecast_info(entry, edad=False) if entry else None
     }
 
 
 @app.get("/sensor-data/chart")
-def get_chart_data(
+async def get_chart_data(
+    request: Request,
     edificio: str = "A",
     piso: Optional[int] = None,
     limit: int = 60,
-    db: Session = Depends(get_db)
+    bucket: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Obtener datos para gráficas.
     Si piso es None, retorna el promedio de todos los pisos.
+    Con bucket (1m, 15m, 1h, 1d) lee los agregados precalculados: cada
+    punto es un intervalo con promedio, mínimo y máximo.
+    El formato se negocia con `Accept` (JSON por filas, JSON columnar,
+    MessagePack o Arrow IPC; ver `app.formats`).
     """
-    from sqlalchemy import func
-    
+    if bucket is not None and bucket not in GRANULARIDADES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Bucket inválido. Use: {', '.join(GRANULARIDADES)}"
+        )
+    fmt = formats.negotiate(request.headers.get("accept"))
+
+    key = request_key(request, fmt, *_window_version(edificio, piso))
+    cached = response_cache.get(key)
+    if cached is None:
+        meta, columns = await _chart_data(db, edificio, piso, limit, bucket)
+        cached = response_cache.put(
+            key, formats.render(fmt, meta, columns), [(edificio, piso)], media_type=fmt
+        )
+    return to_response(request, cached)
+
+
+async def _chart_data(
+    db: AsyncSession,
+    edificio: str,
+    piso: Optional[int],
+    limit: int,
+    bucket: Optional[str]
+):
+    """Encabezado y columnas de GET /sensor-data/chart"""
+    if bucket is not None:
+        results = list(reversed(
+            await crud_async.get_rollup_chart(db, edificio, bucket, piso, limit)
+        ))
+
+        columns = {
+            "timestamp": [r.bucket for r in results],
+            "muestras": [int(r.muestras) for r in results]
+        }
+        for var in VARIABLES:
+            for suffix in ("", "_min", "_max"):
+                name = f"{var}{suffix}"
+                columns[name] = [round(float(r._mapping[name]), 2) for r in results]
+
+        return {"piso": piso if piso is not None else "Todos", "bucket": bucket}, columns
+
     if piso is None:
         # Promedio de todos los pisos
-        query = db.query(
-            models.SensorData.timestamp,
-            func.avg(models.SensorData.temp_c).label('temp_c'),
-            func.avg(models.SensorData.humedad_pct).label('humedad_pct'),
-            func.avg(models.SensorData.energia_kw).label('energia_kw')
-        ).filter(
-            models.SensorData.edificio == edificio
-        ).group_by(
-            models.SensorData.timestamp
-        ).order_by(
-            models.SensorData.timestamp.desc()
-        ).limit(limit)
-        
-        results = query.all()
-        
-        return {
-            "piso": "Todos",
-            "data": [
-                {
-                    "timestamp": r.timestamp.isoformat(),
-                    "temp_c": round(float(r.temp_c), 2),
-                    "humedad_pct": round(float(r.humedad_pct), 2),
-                    "energia_kw": round(float(r.energia_kw), 2)
-                }
-                for r in reversed(results)
-            ]
-        }
+        results = list(reversed(await crud_async.get_chart_average(db, edificio, limit)))
+        meta = {"piso": "Todos"}
     else:
         # Datos de un piso específico
-        data = crud.get_sensor_data(db, edificio, piso, limit)
-        
-        return {
-            "piso": piso,
-            "data": [
-                {
-                    "timestamp": d.timestamp.isoformat(),
-                    "temp_c": round(d.temp_c, 2),
-                    "humedad_pct": round(d.humedad_pct, 2),
-                    "energia_kw": round(d.energia_kw, 2)
-                }
-                for d in reversed(data)
-            ]
-        }
+        results = list(reversed(await crud_async.get_sensor_data(db, edificio, piso, limit)))
+        meta = {"piso": piso}
+
+    columns = {"timestamp": [r.timestamp for r in results]}
+    for var in VARIABLES:
+        columns[var] = [round(float(getattr(r, var)), 2) for r in results]
+    return meta, columns
+
+
+# ========== EXPORT ENDPOINTS ==========
+
+@app.get("/export/{tabla}")
+def export_table(
+    tabla: str,
+    formato: str = "csv",
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    edificio: Optional[str] = None,
+    pisos: Optional[List[int]] = Query(None)
+):
+    """
+    Exportar `sensor_data` o `alerts` de un rango [desde, hasta) en CSV,
+    NDJSON o Parquet. La respuesta se genera por bloques con un cursor del
+    servidor, con memoria constante sin importar el tamaño del rango.
+    """
+    if tabla not in export.TABLAS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Tabla inválida. Use: {', '.join(export.TABLAS)}"
+        )
+    if formato not in export.FORMATOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato inválido. Use: {', '.join(export.FORMATOS)}"
+        )
+    if formato == "parquet" and not export.HAS_PARQUET:
+        raise HTTPException(status_code=406, detail="Parquet requiere pyarrow en el servidor")
+
+    query = export.export_query(tabla, desde, hasta, edificio, pisos)
+    chunks = export.iter_chunks(SessionLocal, query, EXPORT_CHUNK_SIZE)
+    headers = {"Content-Disposition": f'attachment; filename="{tabla}.{formato}"'}
+
+    if formato == "parquet":
+        # Parquet escribe el índice al final: se arma en disco y se envía por bloques
+        tmp = tempfile.TemporaryFile()
+        export.write_parquet(tabla, chunks, tmp)
+        tmp.seek(0)
+        body = export.iter_file(tmp)
+    elif formato == "ndjson":
+        body = export.iter_ndjson(export.columns(tabla), chunks)
+    else:
+        body = export.iter_csv(export.columns(tabla), chunks)
+
+    return StreamingResponse(body, media_type=export.FORMATOS[formato], headers=headers)
+
+
+# ========== STREAMING ENDPOINTS ==========
+
+@app.get("/stream")
+async def stream_events(
+    request: Request,
+    edificio: str = "A",
+    piso: Optional[int] = None
+):
+    """
+    Server-Sent Events con las lecturas nuevas, predicciones y cambios de
+    alertas de un edificio (o de un piso). Reemplaza el polling periódico.
+    """
+    sub = broadcaster.subscribe(edificio, piso)
+
+    async def event_stream():
+        try:
+            yield ": conectado\n\n"
+            while not await request.is_disconnected():
+                message = await sub.get(timeout=STREAM_HEARTBEAT)
+                if message is None:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    edificio: str = "A",
+    piso: Optional[int] = None
+):
+    """Mismo flujo que /stream sobre WebSocket"""
+    await websocket.accept()
+    sub = broadcaster.subscribe(edificio, piso)
+
+    async def forward():
+        while True:
+            message = await sub.get(timeout=STREAM_HEARTBEAT)
+            await websocket.send_text(message if message is not None else '{"tipo": "ping"}')
+
+    sender = asyncio.create_task(forward())
+    try:
+        # Los mensajes del cliente se ignoran; recibir detecta la desconexión
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        broadcaster.unsubscribe(sub)
 
 
 if __name__ == "__main__":
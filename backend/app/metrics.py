@@ -0,0 +1,429 @@
+"""
+Métricas del backend en formato de texto de Prometheus (GET /metrics).
+
+Implementación mínima sin dependencias: contadores, histogramas de buckets
+fijos y gauges que se leen al momento del scrape. Registrar una observación
+es una búsqueda binaria y dos sumas bajo un lock, así el costo en los
+caminos calientes (cada petición, cada consulta SQL) es de microsegundos.
+
+Instrumentación incluida:
+- `MetricsMiddleware`: peticiones y latencia por ruta (plantilla, no URL).
+- `instrument_engine`: consultas SQL y uso del pool de conexiones vía
+  eventos de SQLAlchemy.
+- `PREDICTOR_SECONDS`: duración de las pasadas del predictor.
+- `on_sensor_data`: filas ingeridas (total y por segundo).
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import event
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets en segundos: de 1 ms a 10 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Consultas y esperas del pool suelen ser más cortas
+DB_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotónico por combinación de etiquetas"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, labels: Tuple = ()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        lines = self._header()
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Histograma de buckets fijos (acumulados al renderizar)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [conteo por bucket (+Inf al final), suma, total]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, labels: Tuple = ()):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][idx] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, labels: Tuple = ()):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, labels)
+
+    def count(self, labels: Tuple = ()) -> int:
+        entry = self._values.get(labels)
+        return entry[2] if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(e[0]), e[1], e[2]) for labels, e in self._values.items()]
+        lines = self._header()
+        bounds = self.buckets + (float("inf"),)
+        for labels, counts, total, n in items:
+            acc = 0
+            for bound, c in zip(bounds, counts):
+                acc += c
+                le = _labels(self.labelnames, labels, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {acc}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {n}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Valor leído al momento del scrape. `callback` retorna un número o un
+    dict {tupla de etiquetas: número}; None omite la métrica. Con
+    kind="counter" expone contadores que ya lleva otro componente.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], object],
+        labelnames: Iterable[str] = (),
+        kind: str = "gauge"
+    ):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        value = self.callback()
+        if value is None:
+            return []
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        lines = self._header()
+        for labels, v in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(v)}")
+        return lines
+
+
+class RateMeter:
+    """Eventos por segundo en una ventana deslizante de `window` segundos"""
+
+    def __init__(self, window: int = 60):
+        self.window = window
+        self._counts = [0] * window
+        self._seconds = [-1] * window
+        self._lock = threading.Lock()
+
+    def add(self, n: int):
+        second = int(time.monotonic())
+        i = second % self.window
+        with self._lock:
+            if self._seconds[i] != second:
+                self._seconds[i] = second
+                self._counts[i] = 0
+            self._counts[i] += n
+
+    def rate(self) -> float:
+        now = int(time.monotonic())
+        with self._lock:
+            total = sum(
+                c for c, s in zip(self._counts, self._seconds) if now - s < self.window
+            )
+        return total / self.window
+
+
+def render() -> str:
+    """Todas las métricas registradas en formato de texto de Prometheus"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ========== HTTP ==========
+
+HTTP_REQUESTS = Counter(
+    "smartfloors_http_requests_total",
+    "Peticiones HTTP por método, ruta y código de estado",
+    ("method", "route", "status")
+)
+HTTP_LATENCY = Histogram(
+    "smartfloors_http_request_duration_seconds",
+    "Latencia de las peticiones HTTP por método y ruta",
+    ("method", "route")
+)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición HTTP. La ruta se reporta como
+    plantilla (/dashboard/{piso}) para acotar la cardinalidad; lo que no
+    coincide con ninguna ruta se agrupa en "sin_ruta".
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[Callable, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "sin_ruta"
+        route = self._routes.get(endpoint)
+        if route is None:
+            # El router de Starlette deja el endpoint en el scope; la plantilla
+            # se busca una vez por endpoint
+            for r in scope["app"].routes:
+                if getattr(r, "endpoint", None) is endpoint:
+                    route = r.path
+                    break
+            else:
+                route = getattr(endpoint, "__name__", "sin_ruta")
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            route = self._route(scope)
+            HTTP_REQUESTS.inc(1, (scope["method"], route, str(status)))
+            HTTP_LATENCY.observe(duration, (scope["method"], route))
+
+
+# ========== BASE DE DATOS ==========
+
+DB_QUERIES = Histogram(
+    "smartfloors_db_query_duration_seconds",
+    "Duración de las consultas SQL por engine y operación",
+    ("engine", "operation"),
+    DB_BUCKETS
+)
+DB_POOL_WAIT = Histogram(
+    "smartfloors_db_pool_checkout_wait_seconds",
+    "Espera para obtener una conexión del pool",
+    ("engine",),
+    DB_BUCKETS
+)
+DB_POOL_HELD = Histogram(
+    "smartfloors_db_pool_connection_held_seconds",
+    "Tiempo que una conexión permanece fuera del pool",
+    ("engine",),
+    LATENCY_BUCKETS
+)
+
+_pools: Dict[str, object] = {}
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "COPY"}
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip()[:7].split(None, 1)
+    word = word[0].upper() if word else ""
+    return word if word in _OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine, name: str):
+    """
+    Registra listeners de SQLAlchemy en un engine síncrono (para el
+    asíncrono, su `sync_engine`): duración de cada consulta y uso del pool.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("_metrics_start")
+        if stack:
+            DB_QUERIES.observe(time.perf_counter() - stack.pop(), (name, _operation(statement)))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("_metrics_start") if context.connection else None
+        if stack:
+            stack.pop()
+
+    @event.listens_for(engine.pool, "checkout")
+    def _checkout(dbapi_connection, record, proxy):
+        record.info["_metrics_checkout"] = time.perf_counter()
+
+    @event.listens_for(engine.pool, "checkin")
+    def _checkin(dbapi_connection, record):
+        start = record.info.pop("_metrics_checkout", None)
+        if start is not None:
+            DB_POOL_HELD.observe(time.perf_counter() - start, (name,))
+
+    _pools[name] = engine.pool
+
+
+def timed_pool(pool_class, name: str):
+    """
+    Subclase de un pool con cola (QueuePool / AsyncAdaptedQueuePool) que
+    mide la espera de cada checkout. SQLAlchemy no tiene un evento previo
+    al checkout, así que se cronometra `_do_get`.
+    """
+    class TimedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                DB_POOL_WAIT.observe(time.perf_counter() - start, (name,))
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def _pool_stat(method: str):
+    def read():
+        values = {}
+        for name, pool in _pools.items():
+            fn = getattr(pool, method, None)
+            if fn is not None:
+                values[(name,)] = fn()
+        return values or None
+    return read
+
+
+Gauge("smartfloors_db_pool_size", "Tamaño configurado del pool", _pool_stat("size"), ("engine",))
+Gauge(
+    "smartfloors_db_pool_checked_out",
+    "Conexiones en uso",
+    _pool_stat("checkedout"),
+    ("engine",)
+)
+Gauge(
+    "smartfloors_db_pool_overflow",
+    "Conexiones abiertas por encima del tamaño del pool",
+    _pool_stat("overflow"),
+    ("engine",)
+)
+
+
+# ========== PREDICTOR ==========
+
+PREDICTOR_SECONDS = Histogram(
+    "smartfloors_predictor_duration_seconds",
+    "Duración de una pasada del predictor por origen",
+    ("origin",)
+)
+PREDICTOR_FLOORS = Counter(
+    "smartfloors_predictor_floors_total",
+    "Pisos pronosticados por origen",
+    ("origin",)
+)
+
+
+# ========== INGESTA ==========
+
+INGEST_ROWS = Counter(
+    "smartfloors_ingest_rows_total",
+    "Lecturas de sensores confirmadas en la base de datos"
+)
+_ingest_rate = RateMeter(60)
+Gauge(
+    "smartfloors_ingest_rows_per_second",
+    "Lecturas confirmadas por segundo (promedio del último minuto)",
+    _ingest_rate.rate
+)
+
+
+def on_sensor_data(rows):
+    """Listener de SENSOR_DATA: cuenta las filas ingeridas"""
+    n = len(rows)
+    INGEST_ROWS.inc(n)
+    _ingest_rate.add(n)
+
+
+# ========== ANOMALÍAS ==========
+
+ANOMALIES = Counter(
+    "smartfloors_anomalies_total",
+    "Lecturas anómalas detectadas en la ingesta por variable",
+    ("variable",)
+)
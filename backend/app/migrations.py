@@ -0,0 +1,83 @@
+"""
+Gestión del esquema de la base de datos.
+
+`upgrade` crea las tablas nuevas y agrega a las tablas existentes las
+columnas e índices declarados en los modelos que todavía no existan, de
+modo que las bases ya desplegadas reciben los cambios sin recrear tablas.
+Si `sensor_data` está particionada (ver `app.partitions`) también crea
+las particiones de los meses siguientes.
+"""
+from sqlalchemy import func, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import Column
+
+from app.database import Base
+from app import models  # noqa: F401  (registra los modelos en Base.metadata)
+from app import partitions
+
+
+def _add_column_sql(engine: Engine, table_name: str, column: Column) -> str:
+    """ALTER TABLE ... ADD COLUMN para una columna declarada en el modelo"""
+    preparer = engine.dialect.identifier_preparer
+    sql = (
+        f"ALTER TABLE {preparer.quote(table_name)} "
+        f"ADD COLUMN {preparer.quote(column.name)} "
+        f"{column.type.compile(dialect=engine.dialect)}"
+    )
+    if column.server_default is not None:
+        sql += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        sql += " NOT NULL"
+    return sql
+
+
+def _close_duplicate_alerts(conn: Connection):
+    """
+    Antes de `uq_alerts_abierta`: de las alertas activas repetidas por
+    condición solo queda abierta la más reciente; las demás se cierran
+    como expiradas (nadie las resolvió).
+    """
+    alerts = models.Alert
+    newest = select(func.max(alerts.id)).where(alerts.resuelta == False).group_by(
+        alerts.edificio, alerts.piso, alerts.tipo, alerts.severidad
+    )
+    conn.execute(
+        update(alerts)
+        .where(alerts.resuelta == False, alerts.id.not_in(newest))
+        .values(resuelta=True, expirada=True)
+    )
+
+
+# Preparación de datos que necesita un índice antes de crearse
+_BEFORE_INDEX = {
+    "uq_alerts_abierta": _close_duplicate_alerts,
+}
+
+
+def upgrade(engine: Engine) -> list:
+    """Aplica el esquema declarado. Retorna las tablas, columnas e índices creados."""
+    before = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+
+    created = [t.name for t in Base.metadata.sorted_tables if t.name not in before]
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        columns = {col["name"] for col in inspector.get_columns(table.name)}
+        missing = [col for col in table.columns if col.name not in columns]
+        if missing:
+            with engine.begin() as conn:
+                for column in missing:
+                    conn.execute(text(_add_column_sql(engine, table.name, column)))
+                    created.append(f"{table.name}.{column.name}")
+
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                with engine.begin() as conn:
+                    if index.name in _BEFORE_INDEX:
+                        _BEFORE_INDEX[index.name](conn)
+                    index.create(bind=conn)
+                created.append(index.name)
+
+    created += partitions.ensure(engine)
+    return created
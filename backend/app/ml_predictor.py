@@ -1,6 +1,27 @@
-import pandas as pd
-from datetime import datetime, timedelta
-from typing import Dict, List
+import bisect
+import threading
+import time
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+VARIABLES = ("temp_c", "humedad_pct", "energia_kw")
+
+# Ventanas usadas por el predictor (en número de muestras)
+AVG_WINDOW = 10
+TREND_WINDOW = 5
+MIN_SAMPLES = 3
+
+
+def to_epoch(ts) -> float:
+    """Convierte un timestamp (datetime o número) a segundos epoch UTC"""
+    if isinstance(ts, datetime):
+        if ts.tzinfo is None:
+            # La base de datos guarda UTC; los datetime naive se asumen UTC
+            ts = ts.replace(tzinfo=timezone.utc)
+        return ts.timestamp()
+    return float(ts)
+
 
 class SimplePredictor:
     """
@@ -8,7 +29,7 @@ class SimplePredictor:
     (Alternativa ligera a Prophet para MVP)
     """
     
-    def init(self):
+    def __init__(self):
         self.temp_range = (18, 26)  # Rango confortable de temperatura
         self.humedad_range = (30, 60)  # Rango confortable de humedad
         self.energia_max = 10.0  # kW máximo por piso
@@ -18,23 +39,22 @@ class SimplePredictor:
         Predice el valor de una variable 60 minutos adelante
         usando promedio móvil simple
         """
-        if not data or len(data) < 3:
-            return {
-                "prediccion_60min": 0,
-                "riesgo": "sin_datos",
-                "recomendaciones": ["Insuficientes datos históricos"]
-            }
+        if not data or len(data) < MIN_SAMPLES:
+            return self._no_data()
         
+        # pandas solo se usa en este camino: se importa en el primer uso
+        import pandas as pd
+
         df = pd.DataFrame(data)
         df = df.sort_values('timestamp')
         
         # Calcular promedio móvil de últimos 10 minutos
-        recent_avg = df[variable].tail(10).mean()
+        recent_avg = df[variable].tail(AVG_WINDOW).mean()
         
         # Calcular tendencia (pendiente simple)
-        if len(df) >= 5:
-            x = list(range(len(df.tail(5))))
-            y = df[variable].tail(5).values
+        if len(df) >= TREND_WINDOW:
+            x = list(range(len(df.tail(TREND_WINDOW))))
+            y = df[variable].tail(TREND_WINDOW).values
             trend = (y[-1] - y[0]) / len(x) if len(x) > 0 else 0
         else:
             trend = 0
@@ -51,6 +71,83 @@ class SimplePredictor:
             "recomendaciones": recomendaciones
         }
     
+    def predict_many(
+        self,
+        keys: Sequence[Hashable],
+        group_idx: np.ndarray,
+        timestamps: np.ndarray,
+        values: np.ndarray,
+        variables: Sequence[str] = VARIABLES
+    ) -> Dict[Hashable, Dict[str, Dict]]:
+        """
+        Predice varias variables para muchos grupos (p. ej. pisos) en una
+        sola pasada vectorizada. Produce el mismo resultado que llamar a
+        `predict` por cada grupo y variable.
+
+        keys: claves de los grupos, p. ej. [(edificio, piso), ...]
+        group_idx: (n,) índice en `keys` de cada lectura
+        timestamps: (n,) timestamps de las lecturas (cualquier orden)
+        values: (n, len(variables)) valores de cada variable
+        """
+        group_idx = np.asarray(group_idx, dtype=np.intp)
+        if group_idx.size == 0:
+            return {key: {var: self._no_data() for var in variables} for key in keys}
+
+        values = np.asarray(values, dtype=np.float64).reshape(group_idx.size, len(variables))
+
+        # Ordenar por grupo y luego por timestamp
+        order = np.lexsort((np.asarray(timestamps), group_idx))
+        values = values[order]
+
+        counts = np.bincount(group_idx, minlength=len(keys))
+        ends = np.cumsum(counts)
+        starts = ends - counts
+
+        # Promedio de las últimas AVG_WINDOW muestras de cada grupo
+        offsets = np.arange(AVG_WINDOW - 1, -1, -1)
+        tail_idx = ends[:, None] - 1 - offsets[None, :]
+        tail_mask = tail_idx >= starts[:, None]
+        tail = np.where(tail_mask[:, :, None], values[np.clip(tail_idx, 0, None)], 0.0)
+        recent_avg = tail.sum(axis=1) / np.maximum(tail_mask.sum(axis=1), 1)[:, None]
+
+        # Tendencia: (último - primero) / TREND_WINDOW sobre las últimas muestras
+        last = values[np.clip(ends - 1, 0, None)]
+        first = values[np.clip(ends - TREND_WINDOW, 0, None)]
+        trend = np.where(
+            (counts >= TREND_WINDOW)[:, None],
+            (last - first) / TREND_WINDOW,
+            0.0
+        )
+
+        predictions = recent_avg + trend * 60
+
+        results = {}
+        for g, key in enumerate(keys):
+            if counts[g] < MIN_SAMPLES:
+                results[key] = {var: self._no_data() for var in variables}
+                continue
+
+            results[key] = {}
+            for v, var in enumerate(variables):
+                prediction = float(predictions[g, v])
+                riesgo, recomendaciones = self._evaluate_risk(
+                    var, prediction, float(recent_avg[g, v])
+                )
+                results[key][var] = {
+                    "prediccion_60min": round(prediction, 2),
+                    "riesgo": riesgo,
+                    "recomendaciones": recomendaciones
+                }
+        return results
+
+    @staticmethod
+    def _no_data() -> Dict:
+        return {
+            "prediccion_60min": 0,
+            "riesgo": "sin_datos",
+            "recomendaciones": ["Insuficientes datos históricos"]
+        }
+
     def _evaluate_risk(self, variable: str, prediction: float, current: float) -> tuple:
         """Evalúa el riesgo basado en la predicción"""
         recomendaciones = []
@@ -97,4 +194,119 @@ class SimplePredictor:
                 riesgo = "bajo"
                 recomendaciones.append("Consumo energético normal")
         
-        return riesgo, recomendaciones
\ No newline at end of file
+        return riesgo, recomendaciones
+
+
+class _FloorState:
+    """Últimas AVG_WINDOW lecturas de un piso con sus sumas acumuladas"""
+
+    __slots__ = ("timestamps", "values", "sums", "updates")
+
+    def __init__(self):
+        self.timestamps: List[float] = []
+        self.values: List[Tuple[float, ...]] = []
+        self.sums = [0.0] * len(VARIABLES)
+        self.updates = 0
+
+    def add(self, ts: float, values: Tuple[float, ...]):
+        pos = bisect.bisect_right(self.timestamps, ts)
+        if pos == 0 and len(self.timestamps) >= AVG_WINDOW:
+            return  # Más antigua que toda la ventana: no influye
+        self.timestamps.insert(pos, ts)
+        self.values.insert(pos, values)
+        for i, v in enumerate(values):
+            self.sums[i] += v
+        if len(self.timestamps) > AVG_WINDOW:
+            self._pop_oldest()
+
+        # Recalcular periódicamente para acotar el error de punto flotante
+        self.updates += 1
+        if self.updates % 1000 == 0:
+            self.sums = [sum(col) for col in zip(*self.values)]
+
+    def expire(self, cutoff: float):
+        while self.timestamps and self.timestamps[0] < cutoff:
+            self._pop_oldest()
+
+    def _pop_oldest(self):
+        self.timestamps.pop(0)
+        for i, v in enumerate(self.values.pop(0)):
+            self.sums[i] -= v
+
+
+class StreamingPredictor:
+    """
+    Modo incremental del predictor.
+
+    Mantiene por (edificio, piso) las últimas AVG_WINDOW lecturas y sus
+    sumas, actualizadas con cada ingesta, y responde en tiempo constante
+    con el mismo promedio móvil, tendencia y riesgo que SimplePredictor.
+    Las tres variables de un piso comparten la ventana porque llegan en
+    la misma lectura.
+    """
+
+    def __init__(self, base: SimplePredictor, window_minutes: int = 60):
+        self.base = base
+        self.window_seconds = window_minutes * 60
+        self._states: Dict[Tuple[str, int], _FloorState] = {}
+        self._lock = threading.Lock()
+
+    def update(self, rows: Iterable[Dict]):
+        """Incorpora lecturas nuevas (listener del evento SENSOR_DATA)"""
+        with self._lock:
+            for row in rows:
+                key = (row["edificio"], row["piso"])
+                state = self._states.get(key)
+                if state is None:
+                    state = self._states[key] = _FloorState()
+                state.add(
+                    to_epoch(row["timestamp"]),
+                    tuple(float(row[var]) for var in VARIABLES)
+                )
+
+    def predict(self, edificio: str, piso: int, variable: str) -> Optional[Dict]:
+        """Predicción en O(1); None si el piso no tiene lecturas recientes"""
+        v = VARIABLES.index(variable)
+        with self._lock:
+            state = self._states.get((edificio, piso))
+            if state is None:
+                return None
+            state.expire(time.time() - self.window_seconds)
+
+            n = len(state.timestamps)
+            if n == 0:
+                return None
+            if n < MIN_SAMPLES:
+                return self.base._no_data()
+
+            recent_avg = state.sums[v] / n
+            if n >= TREND_WINDOW:
+                trend = (state.values[-1][v] - state.values[-TREND_WINDOW][v]) / TREND_WINDOW
+            else:
+                trend = 0
+
+        prediction = recent_avg + trend * 60
+        riesgo, recomendaciones = self.base._evaluate_risk(variable, prediction, recent_avg)
+        return {
+            "prediccion_60min": round(prediction, 2),
+            "riesgo": riesgo,
+            "recomendaciones": recomendaciones
+        }
+
+    def predict_floor(
+        self,
+        edificio: str,
+        piso: int,
+        variables: Sequence[str] = VARIABLES
+    ) -> Optional[Dict[str, Dict]]:
+        """Predicciones de varias variables de un piso; None si no tiene lecturas recientes"""
+        predictions = {var: self.predict(edificio, piso, var) for var in variables}
+        if any(p is None for p in predictions.values()):
+            return None
+        return predictions
+
+    def keys(self) -> List[Tuple[str, int]]:
+        """Pisos con estado (pueden no tener lecturas recientes)"""
+        with self._lock:
+            return list(self._states)
+
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Index, UniqueConstraint, text
 from sqlalchemy.sql import func
 from app.database import Base
 
 class SensorData(Base):
     """Modelo para almacenar datos de sensores por piso"""
     __tablename__ = "sensor_data"
+    __table_args__ = (
+        # Todas las consultas filtran por edificio/piso y ordenan por timestamp
+        Index("ix_sensor_data_edificio_piso_timestamp", "edificio", "piso", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
@@ -21,6 +25,26 @@ class SensorData(Base):
 class Alert(Base):
     """Modelo para almacenar alertas generadas"""
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Índice parcial: solo las alertas activas, por edificio/piso y recientes primero
+        Index(
+            "ix_alerts_activas",
+            "edificio", "piso", "timestamp",
+            postgresql_where=text("resuelta = false"),
+            sqlite_where=text("resuelta = 0")
+        ),
+        # A lo sumo una alerta activa por condición: las repeticiones se
+        # agrupan con INSERT ... ON CONFLICT DO UPDATE (ver crud.create_alert)
+        Index(
+            "uq_alerts_abierta",
+            "edificio", "piso", "tipo", "severidad",
+            unique=True,
+            postgresql_where=text("resuelta = false"),
+            sqlite_where=text("resuelta = 0")
+        ),
+        # Historial completo por edificio (GET /alerts/?solo_activas=false)
+        Index("ix_alerts_edificio_timestamp", "edificio", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
@@ -31,6 +55,40 @@ class Alert(Base):
     mensaje = Column(String, nullable=False)
     recomendacion = Column(String, nullable=True)
     resuelta = Column(Boolean, default=False)
+    # Cerrada por inactividad (ventana de supresión vencida), no por un operador
+    expirada = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+    ocurrencias = Column(Integer, nullable=False, default=1, server_default="1")  # Repeticiones agrupadas
+    ultima_vez = Column(DateTime(timezone=True), default=func.now())  # Última repetición
     
     def __repr__(self):
-        return f"<Alert(tipo={self.tipo}, piso={self.piso}, severidad={self.severidad})>"
\ No newline at end of file
+        return f"<Alert(tipo={self.tipo}, piso={self.piso}, severidad={self.severidad})>"
+
+
+class SensorRollup(Base):
+    """Agregados de lecturas por intervalo de tiempo (1m, 15m, 1h, 1d) y piso"""
+    __tablename__ = "sensor_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "granularidad", "edificio", "piso", "bucket",
+            name="uq_sensor_rollups_bucket"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularidad = Column(String, nullable=False)  # "1m", "15m", "1h", "1d"
+    bucket = Column(DateTime(timezone=True), nullable=False)  # Inicio del intervalo
+    edificio = Column(String, nullable=False)
+    piso = Column(Integer, nullable=False)
+    muestras = Column(Integer, nullable=False)
+    temp_c_sum = Column(Float, nullable=False)
+    temp_c_min = Column(Float, nullable=False)
+    temp_c_max = Column(Float, nullable=False)
+    humedad_pct_sum = Column(Float, nullable=False)
+    humedad_pct_min = Column(Float, nullable=False)
+    humedad_pct_max = Column(Float, nullable=False)
+    energia_kw_sum = Column(Float, nullable=False)
+    energia_kw_min = Column(Float, nullable=False)
+    energia_kw_max = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<SensorRollup({self.granularidad}, piso={self.piso}, bucket={self.bucket})>"
@@ -0,0 +1,215 @@
+"""
+Particionado mensual de `sensor_data` en PostgreSQL.
+
+La tabla se particiona por rango de `timestamp` con una partición por mes
+(`sensor_data_p202610`) más una partición DEFAULT que recibe lo que no
+cae en ningún mes creado. Así las consultas por rango reciente solo tocan
+las particiones necesarias y la retención elimina meses completos con
+DROP TABLE en lugar de un DELETE masivo.
+
+`convert` transforma una tabla existente (una sola vez, en una
+transacción); `ensure` crea por adelantado las particiones de los meses
+siguientes y se ejecuta en cada `migrations.upgrade`. En SQLite no hay
+particiones: la retención borra por rango (ver `app.retention`).
+"""
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+TABLE = models.SensorData.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+# Meses futuros con partición creada de antemano
+MESES_ADELANTE = 3
+
+
+def supported(engine: Engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def month_start(dt: datetime) -> datetime:
+    """Primer instante (UTC) del mes de `dt`"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(dt: datetime, months: int) -> datetime:
+    index = dt.year * 12 + dt.month - 1 + months
+    return dt.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE}_p{month.year:04d}{month.month:02d}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """True si `sensor_data` ya es una tabla particionada"""
+    if conn.dialect.name != "postgresql":
+        return False
+    relkind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"),
+        {"t": TABLE}
+    ).scalar()
+    return relkind == "p"
+
+
+def list_partitions(conn: Connection) -> List[Tuple[str, Optional[datetime]]]:
+    """Particiones mensuales como (nombre, inicio del mes), más antiguas primero"""
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:t)"
+    ), {"t": TABLE}).scalars()
+
+    result = []
+    prefix = f"{TABLE}_p"
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        suffix = name[len(prefix):]
+        try:
+            month = datetime(int(suffix[:4]), int(suffix[4:6]), 1, tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        result.append((name, month))
+    return sorted(result, key=lambda p: p[1])
+
+
+def _create_partition(conn: Connection, month: datetime) -> Optional[str]:
+    """Crea la partición del mes si no existe. Retorna su nombre si se creó."""
+    name = partition_name(month)
+    if conn.execute(text("SELECT to_regclass(:n)"), {"n": name}).scalar() is not None:
+        return None
+    conn.execute(text(
+        f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+    return name
+
+
+def ensure(
+    engine: Engine,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    ahead: int = MESES_ADELANTE
+) -> List[str]:
+    """
+    Crea las particiones mensuales de [desde, hasta] (por defecto, del mes
+    actual a `ahead` meses adelante). No hace nada si la tabla no está
+    particionada. Retorna los nombres creados.
+    """
+    if not supported(engine):
+        return []
+
+    now = datetime.now(timezone.utc)
+    first = month_start(desde or now)
+    last = month_start(hasta or add_months(now, ahead))
+
+    with engine.connect() as conn:
+        if not is_partitioned(conn):
+            return []
+
+    created = []
+    month = first
+    while month <= last:
+        try:
+            with engine.begin() as conn:
+                name = _create_partition(conn, month)
+        except DBAPIError as e:
+            # Típicamente: la partición DEFAULT ya tiene filas de ese mes
+            logger.warning("No se pudo crear la partición de %s: %s", month.date(), e.orig)
+            name = None
+        if name:
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def convert(engine: Engine, ahead: int = MESES_ADELANTE) -> List[str]:
+    """
+    Convierte `sensor_data` en una tabla particionada por mes, copiando las
+    filas existentes, en una sola transacción. La llave primaria pasa a ser
+    (id, timestamp), como exige PostgreSQL. Retorna las particiones creadas.
+    """
+    if not supported(engine):
+        raise ValueError("El particionado nativo solo está disponible en PostgreSQL")
+
+    table = models.SensorData.__table__
+    legacy = f"{TABLE}_legacy"
+    sequence = f"{TABLE}_id_seq"
+
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            return []
+
+        # La tabla actual se renombra (con sus índices) y se copia al final
+        conn.execute(text(f'ALTER TABLE "{TABLE}" RENAME TO "{legacy}"'))
+        for index in inspect(conn).get_indexes(legacy) + [{"name": f"{TABLE}_pkey"}]:
+            conn.execute(text(f'ALTER INDEX "{index["name"]}" RENAME TO "{index["name"]}_legacy"'))
+        conn.execute(text(f'ALTER SEQUENCE "{sequence}" OWNED BY NONE'))
+
+        columns = []
+        for column in table.columns:
+            sql = f'"{column.name}" {column.type.compile(dialect=engine.dialect)}'
+            if column.name == "id":
+                sql += f" NOT NULL DEFAULT nextval('{sequence}')"
+            elif column.name == "timestamp":
+                sql += " NOT NULL DEFAULT now()"
+            elif not column.nullable:
+                sql += " NOT NULL"
+            columns.append(sql)
+        conn.execute(text(
+            f'CREATE TABLE "{TABLE}" ({", ".join(columns)}, '
+            f'PRIMARY KEY (id, "timestamp")) PARTITION BY RANGE ("timestamp")'
+        ))
+        conn.execute(text(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT'))
+
+        # Índices del modelo sobre la tabla padre (se propagan a cada partición)
+        for index in table.indexes:
+            index.create(bind=conn)
+
+        oldest = conn.execute(text(f'SELECT min("timestamp") FROM "{legacy}"')).scalar()
+        now = datetime.now(timezone.utc)
+        created = []
+        month = month_start(oldest or now)
+        while month <= month_start(add_months(now, ahead)):
+            created.append(_create_partition(conn, month))
+            month = add_months(month, 1)
+
+        names = ", ".join(f'"{c.name}"' for c in table.columns)
+        conn.execute(text(f'INSERT INTO "{TABLE}" ({names}) SELECT {names} FROM "{legacy}"'))
+        conn.execute(text(f'DROP TABLE "{legacy}"'))
+        conn.execute(text(f'ALTER SEQUENCE "{sequence}" OWNED BY "{TABLE}".id'))
+
+    with engine.connect() as conn:
+        conn.execute(text(f'ANALYZE "{TABLE}"'))
+        conn.commit()
+    return [name for name in created if name]
+
+
+def drop_before(conn: Connection, cutoff: datetime) -> Tuple[List[str], int]:
+    """
+    Elimina las particiones mensuales que terminan en o antes de `cutoff` y
+    borra de la partición DEFAULT las filas anteriores. Retorna (particiones
+    eliminadas, filas borradas de DEFAULT).
+    """
+    dropped = []
+    for name, month in list_partitions(conn):
+        if add_months(month, 1) <= cutoff:
+            conn.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+
+    deleted = conn.execute(
+        text(f'DELETE FROM "{DEFAULT_PARTITION}" WHERE "timestamp" < :cutoff'),
+        {"cutoff": cutoff}
+    ).rowcount
+    return dropped, deleted
@@ -0,0 +1,318 @@
+"""
+Pronósticos con Prophet por (edificio, piso, variable).
+
+`ProphetPredictor` tiene la misma interfaz que `SimplePredictor`
+(`predict_many`), así `ForecastScheduler` y los endpoints lo usan sin
+cambios. Los modelos se ajustan fuera del camino de las peticiones:
+
+- el histórico de cada piso sale de los agregados de `sensor_rollups`
+  (por defecto 14 días en buckets de 15 minutos) y se carga en un hilo;
+- el ajuste corre en un `ProcessPoolExecutor` (Prophet tarda segundos y
+  retiene el GIL mientras prepara los datos);
+- cada modelo ajustado se guarda como su trayectoria pronosticada con
+  intervalo de confianza, en una caché LRU con expiración por antigüedad;
+- un piso se reajusta al acumular `min_new_rows` lecturas nuevas o al
+  vencer su modelo, partiendo de los parámetros del ajuste anterior
+  (warm start), que converge en una fracción de las iteraciones.
+
+Mientras un piso no tiene modelo, sus predicciones salen del predictor de
+respaldo (`SimplePredictor`). prophet es opcional (requirements-ml.txt):
+sin él, `HAS_PROPHET` es False y `main` no habilita este backend.
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from importlib.util import find_spec
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app import crud
+from app.ml_predictor import SimplePredictor, VARIABLES, MIN_SAMPLES, to_epoch
+
+logger = logging.getLogger(__name__)
+
+HAS_PROPHET = find_spec("prophet") is not None
+
+# Tamaño de cada granularidad de agregados, en segundos
+BUCKET_SECONDS = {"1m": 60, "15m": 900, "1h": 3600, "1d": 86400}
+
+# Parámetros de Stan que se reutilizan como punto de partida del reajuste
+WARM_START_PARAMS = ("k", "m", "sigma_obs", "delta", "beta")
+
+# Mínimo de puntos de histórico para ajustar un modelo
+MIN_HISTORY = 48
+
+ModelKey = Tuple[str, int, str]
+
+
+def _fit_floor(
+    history_ts: np.ndarray,
+    history_values: np.ndarray,
+    variables: Sequence[str],
+    init: Dict[str, Dict],
+    horizon_minutes: int,
+    step_minutes: int,
+    interval_width: float
+) -> Dict[str, Dict]:
+    """
+    Ajusta un modelo por variable en un proceso del pool y retorna, por
+    variable, la trayectoria pronosticada (ds, yhat, yhat_lower,
+    yhat_upper) desde el último dato hasta `horizon_minutes` adelante,
+    más los parámetros ajustados para el próximo warm start.
+    """
+    # Solo los procesos del pool importan prophet (y pandas)
+    import pandas as pd
+    from prophet import Prophet
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    ds = pd.to_datetime(history_ts, unit="s")
+    last = float(history_ts[-1])
+    steps = np.arange(0, horizon_minutes + step_minutes, step_minutes)
+    future = pd.DataFrame({"ds": pd.to_datetime(last + steps * 60, unit="s")})
+
+    results = {}
+    for v, var in enumerate(variables):
+        df = pd.DataFrame({"ds": ds, "y": history_values[:, v]})
+        model = None
+        if var in init:
+            try:
+                model = Prophet(interval_width=interval_width).fit(df, init=init[var])
+            except Exception:
+                # El histórico cambió de forma (changepoints, estacionalidades)
+                model = None
+        if model is None:
+            model = Prophet(interval_width=interval_width).fit(df)
+
+        forecast = model.predict(future)
+        results[var] = {
+            "ds": last + steps * 60.0,
+            "yhat": forecast["yhat"].to_numpy(),
+            "yhat_lower": forecast["yhat_lower"].to_numpy(),
+            "yhat_upper": forecast["yhat_upper"].to_numpy(),
+            "params": {
+                name: (
+                    np.asarray(model.params[name])[0].tolist()
+                    if name in ("delta", "beta")
+                    else float(np.asarray(model.params[name])[0][0])
+                )
+                for name in WARM_START_PARAMS
+            }
+        }
+    return results
+
+
+class ProphetPredictor:
+    """Pronósticos Prophet con caché de modelos y ajuste en un pool de procesos"""
+
+    def __init__(
+        self,
+        session_factory,
+        fallback: Optional[SimplePredictor] = None,
+        workers: int = 2,
+        max_models: int = 512,
+        max_age: float = 3600.0,
+        min_new_rows: int = 300,
+        granularidad: str = "15m",
+        dias: float = 14,
+        horizon_minutes: int = 60,
+        interval_width: float = 0.8
+    ):
+        if granularidad not in BUCKET_SECONDS:
+            raise ValueError(f"Granularidad inválida: {granularidad}")
+        self.session_factory = session_factory
+        self.fallback = fallback or SimplePredictor()
+        self.max_models = max_models
+        self.max_age = max_age
+        self.min_new_rows = min_new_rows
+        self.granularidad = granularidad
+        self.dias = dias
+        self.horizon_minutes = horizon_minutes
+        self.interval_width = interval_width
+        # La trayectoria arranca en el último bucket del histórico y cubre el
+        # horizonte durante toda la vida del modelo
+        bucket_minutes = BUCKET_SECONDS[granularidad] // 60
+        self._span_minutes = horizon_minutes + int(max_age // 60) + 2 * bucket_minutes
+        self._step_minutes = max(1, bucket_minutes // 3)
+
+        self._models: "OrderedDict[ModelKey, Dict]" = OrderedDict()
+        self._params: Dict[Tuple[str, int], Dict[str, Dict]] = {}
+        self._new_rows: Dict[Tuple[str, int], int] = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+
+        # spawn: no heredar hilos ni conexiones del proceso de la API
+        self._processes = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        # Un hilo por proceso: carga el histórico y espera el ajuste
+        self._loader = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prophet")
+        self.fits = 0
+        self.errors = 0
+
+    def shutdown(self):
+        self._loader.shutdown(wait=False, cancel_futures=True)
+        self._processes.shutdown(wait=False, cancel_futures=True)
+
+    # ========== CACHÉ DE MODELOS ==========
+
+    def _get_model(self, key: ModelKey, now: float) -> Optional[Dict]:
+        """Modelo vigente (lo marca como usado); descarta los vencidos"""
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return None
+            if now - entry["ajustado"] > self.max_age:
+                del self._models[key]
+                return None
+            self._models.move_to_end(key)
+            return entry
+
+    def _store(self, floor: Tuple[str, int], results: Dict[str, Dict]):
+        ajustado = time.time()
+        with self._lock:
+            for var, result in results.items():
+                key = floor + (var,)
+                self._models[key] = {
+                    "ds": result["ds"],
+                    "yhat": result["yhat"],
+                    "yhat_lower": result["yhat_lower"],
+                    "yhat_upper": result["yhat_upper"],
+                    "ajustado": ajustado
+                }
+                self._models.move_to_end(key)
+            self._params[floor] = {var: r["params"] for var, r in results.items()}
+            while len(self._models) > self.max_models:
+                evicted, _ = self._models.popitem(last=False)
+                # El warm start del piso ya no sirve si no quedan modelos suyos
+                if not any(k[:2] == evicted[:2] for k in self._models):
+                    self._params.pop(evicted[:2], None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "modelos": len(self._models),
+                "ajustes_pendientes": len(self._pending),
+                "ajustes": self.fits,
+                "errores": self.errors
+            }
+
+    # ========== AJUSTE ==========
+
+    def on_sensor_data(self, rows):
+        """Cuenta lecturas nuevas por piso (listener del evento SENSOR_DATA)"""
+        with self._lock:
+            for row in rows:
+                floor = (row["edificio"], row["piso"])
+                self._new_rows[floor] = self._new_rows.get(floor, 0) + 1
+
+    def _schedule(self, floor: Tuple[str, int], variables: Sequence[str], now: float):
+        """Encola el (re)ajuste del piso si no tiene modelo, venció o hay datos nuevos"""
+        with self._lock:
+            if floor in self._pending:
+                return
+            entries = [self._models.get(floor + (var,)) for var in variables]
+            stale = any(
+                e is None or now - e["ajustado"] > self.max_age * 0.5 for e in entries
+            )
+            if not stale and self._new_rows.get(floor, 0) < self.min_new_rows:
+                return
+            self._pending.add(floor)
+            self._new_rows[floor] = 0
+        self._loader.submit(self._refit, floor, tuple(variables))
+
+    def _history(self, floor: Tuple[str, int], variables: Sequence[str]):
+        """Promedios por bucket de los últimos `dias` días, en orden cronológico"""
+        limit = int(self.dias * 86400 // BUCKET_SECONDS[self.granularidad])
+        db = self.session_factory()
+        try:
+            rows = crud.get_rollup_chart(db, floor[0], self.granularidad, floor[1], limit)
+        finally:
+            db.close()
+        rows = rows[::-1]
+        timestamps = np.array([to_epoch(r.bucket) for r in rows], dtype=np.float64)
+        values = np.array(
+            [[getattr(r, var) for var in variables] for r in rows], dtype=np.float64
+        ).reshape(-1, len(variables))
+        return timestamps, values
+
+    def _refit(self, floor: Tuple[str, int], variables: Tuple[str, ...]):
+        try:
+            timestamps, values = self._history(floor, variables)
+            if timestamps.size < MIN_HISTORY:
+                return
+            with self._lock:
+                init = dict(self._params.get(floor, {}))
+            results = self._processes.submit(
+                _fit_floor, timestamps, values, variables, init,
+                self._span_minutes, self._step_minutes, self.interval_width
+            ).result()
+            self._store(floor, results)
+            self.fits += 1
+        except Exception:
+            self.errors += 1
+            logger.exception("Error al ajustar Prophet para %s", floor)
+        finally:
+            with self._lock:
+                self._pending.discard(floor)
+
+    # ========== PREDICCIÓN ==========
+
+    def predict_many(
+        self,
+        keys: Sequence[Hashable],
+        group_idx: np.ndarray,
+        timestamps: np.ndarray,
+        values: np.ndarray,
+        variables: Sequence[str] = VARIABLES
+    ) -> Dict[Hashable, Dict[str, Dict]]:
+        """
+        Igual que `SimplePredictor.predict_many`. Las variables con modelo
+        Prophet vigente toman su pronóstico (con intervalo de confianza);
+        el resto sale del predictor de respaldo y su ajuste se encola.
+        """
+        results = self.fallback.predict_many(keys, group_idx, timestamps, values, variables)
+
+        group_idx = np.asarray(group_idx, dtype=np.intp)
+        if group_idx.size == 0:
+            return results
+        values = np.asarray(values, dtype=np.float64).reshape(group_idx.size, len(variables))
+        counts = np.bincount(group_idx, minlength=len(keys))
+
+        # Última lectura de cada grupo (valor actual para evaluar el riesgo)
+        order = np.lexsort((np.asarray(timestamps), group_idx))
+        last = values[order][np.clip(np.cumsum(counts) - 1, 0, None)]
+
+        now = time.time()
+        target = now + self.horizon_minutes * 60
+        for g, key in enumerate(keys):
+            if counts[g] < MIN_SAMPLES:
+                continue
+            self._schedule(key, variables, now)
+            for v, var in enumerate(variables):
+                model = self._get_model(key + (var,), now)
+                if model is None:
+                    continue
+                results[key][var] = self._from_model(model, var, target, float(last[g, v]))
+        return results
+
+    def _from_model(self, model: Dict, variable: str, target: float, current: float) -> Dict:
+        ds = model["ds"]
+        prediction = float(np.interp(target, ds, model["yhat"]))
+        riesgo, recomendaciones = self.fallback._evaluate_risk(variable, prediction, current)
+        return {
+            "prediccion_60min": round(prediction, 2),
+            "riesgo": riesgo,
+            "recomendaciones": recomendaciones,
+            "intervalo": {
+                "inferior": round(float(np.interp(target, ds, model["yhat_lower"])), 2),
+                "superior": round(float(np.interp(target, ds, model["yhat_upper"])), 2)
+            },
+            "modelo": "prophet",
+            "ajustado": datetime.fromtimestamp(model["ajustado"], timezone.utc)
+        }
@@ -0,0 +1,130 @@
+"""
+Ventana reciente en memoria por piso.
+
+Cada `(edificio, piso)` tiene un buffer circular de tamaño fijo respaldado
+por arreglos NumPy con las últimas lecturas. Se llena con cada ingesta
+(evento `SENSOR_DATA`) y `main` la precarga desde la base de datos al arrancar,
+de modo que /predict y /dashboard no necesitan consultar la base de datos
+ni crear objetos ORM para obtener la última hora de datos.
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.ml_predictor import VARIABLES, to_epoch
+
+
+class FloorRingBuffer:
+    """Buffer circular de lecturas de un piso"""
+
+    __slots__ = ("capacity", "timestamps", "values", "size", "head")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros((capacity, len(VARIABLES)), dtype=np.float64)
+        self.size = 0
+        self.head = 0  # Próxima posición a escribir
+
+    def append(self, ts: float, values: Tuple[float, float, float]):
+        self.timestamps[self.head] = ts
+        self.values[self.head] = values
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def ordered(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Copia de las lecturas en orden cronológico"""
+        if self.size < self.capacity:
+            ts = self.timestamps[:self.size].copy()
+            values = self.values[:self.size].copy()
+        else:
+            ts = np.roll(self.timestamps, -self.head)
+            values = np.roll(self.values, -self.head, axis=0)
+
+        # Las lecturas pueden llegar desordenadas (lotes, reintentos)
+        if ts.size > 1 and np.any(ts[1:] < ts[:-1]):
+            order = np.argsort(ts, kind="stable")
+            ts, values = ts[order], values[order]
+        return ts, values
+
+    def since(self, cutoff: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Lecturas con timestamp >= cutoff, en orden cronológico"""
+        ts, values = self.ordered()
+        start = int(np.searchsorted(ts, cutoff, side="left"))
+        return ts[start:], values[start:]
+
+
+class RecentWindowStore:
+    """Conjunto de buffers circulares indexados por (edificio, piso)"""
+
+    def __init__(self, capacity: int = 3600):
+        self.capacity = capacity
+        self._buffers: Dict[Tuple[str, int], FloorRingBuffer] = {}
+        self._lock = threading.Lock()
+
+    def add_rows(self, rows: Iterable[Dict]):
+        """Agrega lecturas (listener del evento SENSOR_DATA)"""
+        with self._lock:
+            for row in rows:
+                key = (row["edificio"], row["piso"])
+                buf = self._buffers.get(key)
+                if buf is None:
+                    buf = self._buffers[key] = FloorRingBuffer(self.capacity)
+                buf.append(
+                    to_epoch(row["timestamp"]),
+                    (row["temp_c"], row["humedad_pct"], row["energia_kw"])
+                )
+
+    def keys(self) -> List[Tuple[str, int]]:
+        with self._lock:
+            return list(self._buffers)
+
+    def has(self, edificio: str, piso: int) -> bool:
+        return (edificio, piso) in self._buffers
+
+    def window(
+        self,
+        edificio: str,
+        piso: int,
+        minutes: int = 60
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Lecturas de los últimos `minutes` minutos como (timestamps, valores).
+        Retorna None si el piso no tiene buffer en memoria.
+        """
+        cutoff = time.time() - minutes * 60
+        with self._lock:
+            buf = self._buffers.get((edificio, piso))
+            if buf is None:
+                return None
+            return buf.since(cutoff)
+
+    def block(
+        self,
+        keys: List[Tuple[str, int]],
+        minutes: int = 60
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Ventanas recientes de varios pisos en un solo bloque para
+        `SimplePredictor.predict_many`: (group_idx, timestamps, valores).
+        Los pisos sin buffer aportan cero lecturas.
+        """
+        group_idx, timestamps, values = [], [], []
+        for g, (edificio, piso) in enumerate(keys):
+            window = self.window(edificio, piso, minutes)
+            if window is None or window[0].size == 0:
+                continue
+            ts, vals = window
+            group_idx.append(np.full(ts.size, g, dtype=np.intp))
+            timestamps.append(ts)
+            values.append(vals)
+
+        if not group_idx:
+            return (
+                np.empty(0, dtype=np.intp),
+                np.empty(0, dtype=np.float64),
+                np.empty((0, len(VARIABLES)), dtype=np.float64)
+            )
+        return np.concatenate(group_idx), np.concatenate(timestamps), np.vstack(values)
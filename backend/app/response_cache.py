@@ -0,0 +1,148 @@
+"""
+Caché de respuestas HTTP ya serializadas.
+
+Cada entrada guarda el cuerpo serializado de una respuesta y su ETag fuerte
+(hash del contenido), indexada por endpoint + parámetros. Las entradas se
+etiquetan con (edificio, piso) —o (edificio, None) si abarcan todo el
+edificio— y se invalidan con los eventos de lecturas, alertas y
+predicciones de ese piso. Además se descartan por LRU y por antigüedad
+(TTL), lo que acota cuánto puede atrasarse una respuesta cuando el cambio
+no pasa por los eventos de este proceso (otro worker, volcado de rollups).
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+Tag = Tuple[str, Optional[int]]
+
+
+class CachedResponse:
+    """Cuerpo serializado de una respuesta con su ETag"""
+
+    __slots__ = ("body", "media_type", "etag", "created", "tags")
+
+    def __init__(self, body: bytes, tags: Iterable[Tag], media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.created = time.monotonic()
+        self.tags = tuple(tags)
+
+
+def serialize(payload) -> bytes:
+    """JSON igual al que genera JSONResponse de FastAPI"""
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def request_key(request: Request, *extra: Hashable) -> Hashable:
+    """Clave de caché: ruta + parámetros de consulta ordenados (+ p. ej. el formato)"""
+    return (request.url.path, tuple(sorted(request.query_params.multi_items()))) + extra
+
+
+def to_response(request: Request, cached: CachedResponse) -> Response:
+    """200 con el cuerpo, o 304 si el cliente ya tiene esa versión"""
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        if cached.etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type=cached.media_type, headers=headers)
+
+
+class ResponseCache:
+    """LRU con TTL e invalidación por (edificio, piso)"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 15.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._by_tag: Dict[Tag, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and time.monotonic() - cached.created > self.ttl:
+                self._discard(key)
+                cached = None
+            if cached is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+    def put(
+        self,
+        key: Hashable,
+        payload,
+        tags: Iterable[Tag],
+        media_type: str = "application/json"
+    ) -> CachedResponse:
+        """Guarda `payload` bajo `key`; si no es bytes se serializa como JSON"""
+        body = payload if isinstance(payload, bytes) else serialize(payload)
+        cached = CachedResponse(body, tags, media_type)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = cached
+            for tag in cached.tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+        return cached
+
+    def invalidate(self, edificio: str, piso: Optional[int] = None):
+        """Descarta las entradas del piso y las que abarcan todo el edificio"""
+        tags = [(edificio, None)] if piso is None else [(edificio, piso), (edificio, None)]
+        with self._lock:
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def _discard(self, key: Hashable):
+        cached = self._entries.pop(key, None)
+        if cached is None:
+            return
+        for tag in cached.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entradas": len(self._entries), "aciertos": self.hits, "fallos": self.misses}
+
+    # ========== LISTENERS DE EVENTOS ==========
+
+    def on_sensor_data(self, rows: Iterable[Dict]):
+        for edificio, piso in {(row["edificio"], row["piso"]) for row in rows}:
+            self.invalidate(edificio, piso)
+
+    def on_alert(self, payload: Dict):
+        alerta = payload["alerta"]
+        self.invalidate(alerta["edificio"], alerta["piso"])
+
+    def on_predictions(self, payload: Dict):
+        self.invalidate(payload["edificio"], payload["piso"])
@@ -0,0 +1,99 @@
+"""
+Retención y compactación de `sensor_data`.
+
+Las lecturas crudas más antiguas que `dias` se compactan en los agregados
+de `sensor_rollups` (15m, 1h y 1d se recalculan desde las filas crudas
+antes de borrarlas, así quedan exactos aunque el acumulador haya perdido
+algo) y luego se eliminan junto con los agregados de 1 minuto, que pesan
+tanto como las lecturas. En PostgreSQL particionado se eliminan meses
+completos (DROP de la partición); en SQLite se borra por rango.
+
+El corte se alinea al inicio de un mes (particionado) o de un día, de modo
+que ningún agregado diario queda con solo parte de sus lecturas.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from sqlalchemy import delete, text
+from sqlalchemy.orm import Session
+
+from app import models, partitions, rollups
+
+logger = logging.getLogger(__name__)
+
+# Granularidades que sobreviven a las lecturas crudas
+COMPACTAS = ("15m", "1h", "1d")
+# Granularidades que se eliminan junto con las lecturas crudas
+FINAS = ("1m",)
+
+
+def cutoff_for(dias: float, partitioned: bool, now: datetime = None) -> datetime:
+    """Instante de corte: lo anterior se compacta y elimina"""
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=dias)
+    if partitioned:
+        return partitions.month_start(cutoff)
+    return cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def compact(session_factory, dias: float, vacuum: bool = False) -> Dict:
+    """
+    Compacta y elimina las lecturas anteriores al corte de `dias` días.
+    Retorna el corte, los agregados recalculados y lo eliminado.
+    """
+    db: Session = session_factory()
+    engine = db.get_bind()
+    try:
+        partitioned = partitions.is_partitioned(db.connection())
+        cutoff = cutoff_for(dias, partitioned)
+        stats = {"corte": cutoff.isoformat(), "particionado": partitioned}
+
+        # Todo lo anterior al corte son justamente las filas a eliminar
+        stats["agregados"] = rollups.rebuild(
+            db, hasta=cutoff - timedelta(microseconds=1), granularidades=COMPACTAS
+        )
+
+        if partitioned:
+            dropped, deleted = partitions.drop_before(db.connection(), cutoff)
+            stats["particiones_eliminadas"] = dropped
+        else:
+            deleted = db.execute(
+                delete(models.SensorData).where(models.SensorData.timestamp < cutoff)
+            ).rowcount
+        stats["filas_eliminadas"] = deleted
+
+        stats["agregados_eliminados"] = db.execute(
+            delete(models.SensorRollup).where(
+                models.SensorRollup.granularidad.in_(FINAS),
+                models.SensorRollup.bucket < cutoff
+            )
+        ).rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    _reclaim(engine, vacuum)
+    logger.info("Retención aplicada: %s", stats)
+    return stats
+
+
+def _reclaim(engine, vacuum: bool):
+    """
+    ANALYZE fuera de la transacción; en SQLite el archivo no se achica
+    hasta un VACUUM (bloquea la base mientras corre, por eso es opcional).
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.dialect.name == "sqlite" and vacuum:
+            conn.execute(text("VACUUM"))
+        conn.execute(text(f"ANALYZE {models.SensorData.__tablename__}"))
+
+
+def run(engine, session_factory, dias: float) -> Dict:
+    """Tarea periódica: particiones de los meses siguientes y retención"""
+    created = partitions.ensure(engine)
+    stats = compact(session_factory, dias)
+    stats["particiones_creadas"] = created
+    return stats
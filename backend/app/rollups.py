@@ -0,0 +1,233 @@
+"""
+Agregados materializados de lecturas por intervalo de tiempo.
+
+`sensor_rollups` guarda muestras, suma, mínimo y máximo de cada variable
+por (granularidad, edificio, piso, bucket). El acumulador se alimenta del
+evento de ingesta y vuelca los agregados con un upsert aditivo cada pocos
+segundos, por lo que varios workers pueden escribir sin coordinarse.
+`rebuild` recalcula los agregados desde `sensor_data` (carga inicial,
+importaciones masivas).
+"""
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import models
+from app.ml_predictor import VARIABLES, to_epoch
+
+# Tamaño de cada granularidad en segundos
+GRANULARIDADES = {
+    "1m": 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+_KEY_COLUMNS = ("granularidad", "edificio", "piso", "bucket")
+
+
+def bucket_start(epoch: float, size: int) -> float:
+    """Inicio del intervalo de `size` segundos que contiene a `epoch`"""
+    return epoch - (epoch % size)
+
+
+def _insert(db: Session):
+    """INSERT con soporte de ON CONFLICT según el dialecto"""
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert(models.SensorRollup)
+    return sqlite.insert(models.SensorRollup)
+
+
+def _least(db: Session, a, b):
+    return func.least(a, b) if db.bind.dialect.name == "postgresql" else func.min(a, b)
+
+
+def _greatest(db: Session, a, b):
+    return func.greatest(a, b) if db.bind.dialect.name == "postgresql" else func.max(a, b)
+
+
+def upsert(db: Session, rows: List[Dict], merge: bool = True):
+    """
+    Inserta agregados. Con merge=True se suman a los existentes (ingesta
+    incremental); con merge=False los reemplazan (recalculo).
+    """
+    if not rows:
+        return
+
+    table = models.SensorRollup.__table__
+    stmt = _insert(db)
+    excluded = stmt.excluded
+
+    set_ = {"muestras": excluded.muestras}
+    for var in VARIABLES:
+        set_[f"{var}_sum"] = excluded[f"{var}_sum"]
+        set_[f"{var}_min"] = excluded[f"{var}_min"]
+        set_[f"{var}_max"] = excluded[f"{var}_max"]
+
+    if merge:
+        set_["muestras"] = table.c.muestras + excluded.muestras
+        for var in VARIABLES:
+            set_[f"{var}_sum"] = table.c[f"{var}_sum"] + excluded[f"{var}_sum"]
+            set_[f"{var}_min"] = _least(db, table.c[f"{var}_min"], excluded[f"{var}_min"])
+            set_[f"{var}_max"] = _greatest(db, table.c[f"{var}_max"], excluded[f"{var}_max"])
+
+    db.execute(
+        stmt.on_conflict_do_update(index_elements=list(_KEY_COLUMNS), set_=set_),
+        rows
+    )
+
+
+class RollupAccumulator:
+    """Agregados pendientes en memoria, volcados periódicamente a la base"""
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+        self._pending: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add_rows(self, rows: Iterable[Dict]):
+        """Acumula lecturas nuevas (listener del evento SENSOR_DATA)"""
+        with self._lock:
+            for row in rows:
+                epoch = to_epoch(row["timestamp"])
+                values = [float(row[var]) for var in VARIABLES]
+                for granularidad, size in GRANULARIDADES.items():
+                    key = (granularidad, row["edificio"], row["piso"], bucket_start(epoch, size))
+                    agg = self._pending.get(key)
+                    if agg is None:
+                        # [muestras, suma*3, mínimo*3, máximo*3]
+                        self._pending[key] = [1] + values + values + values
+                        continue
+                    agg[0] += 1
+                    for i, v in enumerate(values):
+                        agg[1 + i] += v
+                        if v < agg[4 + i]:
+                            agg[4 + i] = v
+                        if v > agg[7 + i]:
+                            agg[7 + i] = v
+
+    def flush(self) -> int:
+        """Vuelca los agregados pendientes con un solo upsert. Retorna buckets."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        rows = []
+        for (granularidad, edificio, piso, bucket), agg in pending.items():
+            row = {
+                "granularidad": granularidad,
+                "edificio": edificio,
+                "piso": piso,
+                "bucket": datetime.fromtimestamp(bucket, timezone.utc),
+                "muestras": agg[0],
+            }
+            for i, var in enumerate(VARIABLES):
+                row[f"{var}_sum"] = agg[1 + i]
+                row[f"{var}_min"] = agg[4 + i]
+                row[f"{var}_max"] = agg[7 + i]
+            rows.append(row)
+
+        db = self._session_factory()
+        try:
+            upsert(db, rows, merge=True)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._restore(pending)
+            raise
+        finally:
+            db.close()
+        return len(rows)
+
+    def _restore(self, pending: Dict[Tuple, List[float]]):
+        """Reincorpora agregados cuyo volcado falló"""
+        with self._lock:
+            for key, agg in pending.items():
+                current = self._pending.get(key)
+                if current is None:
+                    self._pending[key] = agg
+                    continue
+                current[0] += agg[0]
+                for i in range(len(VARIABLES)):
+                    current[1 + i] += agg[1 + i]
+                    current[4 + i] = min(current[4 + i], agg[4 + i])
+                    current[7 + i] = max(current[7 + i], agg[7 + i])
+
+
+# ========== RECALCULO DESDE sensor_data ==========
+
+def _bucket_expr(db: Session, size: int):
+    """Expresión SQL con el inicio del bucket en segundos epoch"""
+    ts = models.SensorData.timestamp
+    if db.bind.dialect.name == "postgresql":
+        return func.floor(func.extract("epoch", ts) / size) * size
+    return (cast(func.strftime("%s", ts), Integer) // size) * size
+
+
+def rebuild(
+    db: Session,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    edificio: Optional[str] = None,
+    granularidades: Iterable[str] = tuple(GRANULARIDADES),
+    chunk_size: int = 5000
+) -> int:
+    """
+    Recalcula los agregados desde `sensor_data` para un rango de tiempo.
+    Los límites se amplían a buckets completos de cada granularidad para no
+    dejar buckets parciales. Retorna el número de buckets escritos.
+    """
+    total = 0
+    for granularidad in granularidades:
+        size = GRANULARIDADES[granularidad]
+        bucket = _bucket_expr(db, size).label("bucket")
+
+        columns = [
+            bucket,
+            models.SensorData.edificio,
+            models.SensorData.piso,
+            func.count().label("muestras"),
+        ]
+        for var in VARIABLES:
+            col = getattr(models.SensorData, var)
+            columns += [
+                func.sum(col).label(f"{var}_sum"),
+                func.min(col).label(f"{var}_min"),
+                func.max(col).label(f"{var}_max"),
+            ]
+
+        query = select(*columns).group_by(
+            bucket, models.SensorData.edificio, models.SensorData.piso
+        )
+        if desde is not None:
+            start = bucket_start(to_epoch(desde), size)
+            query = query.where(
+                models.SensorData.timestamp >= datetime.fromtimestamp(start, timezone.utc)
+            )
+        if hasta is not None:
+            end = bucket_start(to_epoch(hasta), size) + size
+            query = query.where(
+                models.SensorData.timestamp < datetime.fromtimestamp(end, timezone.utc)
+            )
+        if edificio is not None:
+            query = query.where(models.SensorData.edificio == edificio)
+
+        result = db.execute(query.execution_options(yield_per=chunk_size))
+        for chunk in result.partitions():
+            rows = []
+            for r in chunk:
+                row = dict(r._mapping)
+                row["granularidad"] = granularidad
+                row["bucket"] = datetime.fromtimestamp(float(row["bucket"]), timezone.utc)
+                rows.append(row)
+            upsert(db, rows, merge=False)
+            total += len(rows)
+
+    db.commit()
+    return total
+
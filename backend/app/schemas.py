@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 class SensorDataCreate(BaseModel):
     """Schema para crear datos de sensor"""
@@ -11,6 +11,38 @@ class SensorDataCreate(BaseModel):
     energia_kw: float = Field(..., ge=0, example=5.2)
 
 
+class SensorDataQueued(BaseModel):
+    """Schema para lecturas aceptadas en modo de escritura diferida"""
+    status: str = "encolado"
+    edificio: str
+    piso: int
+    timestamp: datetime
+
+
+class SensorDataBatchCreate(BaseModel):
+    """Schema para ingesta masiva de lecturas.
+
+    Los items se validan uno por uno en el servidor para poder reportar
+    el estado de cada lectura sin rechazar el lote completo.
+    """
+    items: List[Dict[str, Any]] = Field(..., min_length=1)
+
+
+class SensorDataBatchError(BaseModel):
+    """Detalle de una lectura rechazada dentro de un lote"""
+    indice: int
+    detalle: str
+
+
+class SensorDataBatchResponse(BaseModel):
+    """Schema para respuesta de ingesta masiva"""
+    recibidos: int
+    insertados: int
+    rechazados: int
+    estados: List[str]
+    errores: List[SensorDataBatchError] = []
+
+
 class SensorDataResponse(BaseModel):
     """Schema para respuesta de datos de sensor"""
     id: int
@@ -35,6 +67,22 @@ class AlertCreate(BaseModel):
     recomendacion: Optional[str] = None
 
 
+class AlertResolveRequest(BaseModel):
+    """Schema para resolver alertas en bloque (por ids y/o filtros)"""
+    ids: Optional[List[int]] = None
+    edificio: Optional[str] = None
+    piso: Optional[int] = None
+    tipo: Optional[str] = None
+    severidad: Optional[str] = None
+    antes_de: Optional[datetime] = None  # Solo alertas creadas antes de este instante
+
+
+class AlertResolveResponse(BaseModel):
+    """Schema para la respuesta de la resolución en bloque"""
+    resueltas: int
+    ids: List[int]
+
+
 class AlertResponse(BaseModel):
     """Schema para respuesta de alertas"""
     id: int
@@ -46,6 +94,9 @@ class AlertResponse(BaseModel):
     mensaje: str
     recomendacion: Optional[str]
     resuelta: bool
+    expirada: bool = False
+    ocurrencias: int = 1
+    ultima_vez: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -57,4 +108,7 @@ class PredictionResponse(BaseModel):
     variable: str
     prediccion_60min: float
     riesgo: str
-    recomendaciones: list[str]
\ No newline at end of file
+    recomendaciones: list[str]
+    # Solo con el backend Prophet (PREDICTOR_BACKEND=prophet)
+    intervalo: Optional[Dict[str, float]] = None
+    modelo: Optional[str] = None
\ No newline at end of file
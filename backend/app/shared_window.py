@@ -0,0 +1,398 @@
+"""
+Ventana reciente compartida entre procesos (workers de gunicorn).
+
+Misma interfaz que `RecentWindowStore`, pero los buffers circulares viven
+en un archivo mapeado en memoria (por ejemplo en /dev/shm) que todos los
+workers abren: una lectura ingerida en un worker es visible de inmediato
+en los demás, sin pasar por la base de datos y sin que cada worker tenga
+que precargar su propia copia.
+
+Distribución del archivo (arreglos NumPy sobre el mmap, sin serializar):
+- encabezado: versión de la distribución, cantidad de slots usados y
+  generación (identificador del arranque que precargó la ventana);
+- directorio de slots: (edificio, piso), contador de secuencia, posición,
+  tamaño y número de escrituras de cada piso;
+- datos: timestamps, valores e ids de las lecturas de cada slot.
+
+Los escritores se coordinan con `fcntl.flock` sobre el archivo (entre
+procesos) más un lock de hilos (dentro del proceso). Los lectores no
+toman locks: usan el contador de secuencia del slot (seqlock; impar
+mientras se escribe) y reintentan si cambió durante la lectura.
+
+Solo se comparte la ventana: cada worker calcula sus propios pronósticos
+a partir de ella (convergen en cada pasada del scheduler) y las alertas
+activas se reconcilian con la base (ver `app.alert_index`).
+"""
+import fcntl
+import logging
+import mmap
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.ml_predictor import VARIABLES, to_epoch
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 0x534D415254574E32  # "SMARTWN2"
+EDIFICIO_BYTES = 64
+GENERATION_BYTES = 64
+
+_HEADER = np.dtype([
+    ("magic", "<u8"),
+    ("capacity", "<u8"),
+    ("max_slots", "<u8"),
+    ("variables", "<u8"),
+    ("n_slots", "<u8"),
+    ("generation", f"S{GENERATION_BYTES}"),
+])
+_SLOT = np.dtype([
+    ("edificio", f"S{EDIFICIO_BYTES}"),
+    ("piso", "<i8"),
+    ("seq", "<u8"),
+    ("head", "<u8"),
+    ("size", "<u8"),
+    ("writes", "<u8"),
+])
+
+FloorKey = Tuple[str, int]
+
+
+def generation_id() -> str:
+    """
+    Identificador del arranque del servidor: SHARED_WINDOW_GENERATION si
+    está definida; si no, el proceso padre (pid y hora de inicio), que es
+    el master de gunicorn para todos sus workers, incluidos los que
+    reinicia. Un nuevo arranque del master cambia la generación.
+    """
+    configured = os.getenv("SHARED_WINDOW_GENERATION")
+    if configured:
+        return configured
+    ppid = os.getppid()
+    try:
+        with open(f"/proc/{ppid}/stat") as f:
+            # Campo 22: inicio del proceso (después del nombre entre paréntesis)
+            started = f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        started = "0"
+    return f"{ppid}:{started}"
+
+
+def _align(offset: int, to: int = 64) -> int:
+    return (offset + to - 1) // to * to
+
+
+class SharedWindowStore:
+    """Buffers circulares por (edificio, piso) en memoria compartida"""
+
+    def __init__(self, path: str, capacity: int = 3600, max_slots: int = 256):
+        self.path = path
+        self.capacity = capacity
+        self.max_slots = max_slots
+        self._thread_lock = threading.Lock()
+        self._slot_index: Dict[FloorKey, int] = {}
+        self._full_warned = False
+
+        n_vars = len(VARIABLES)
+        self._off_slots = _align(_HEADER.itemsize)
+        self._off_ts = _align(self._off_slots + _SLOT.itemsize * max_slots)
+        self._off_values = _align(self._off_ts + 8 * max_slots * capacity)
+        self._off_ids = _align(self._off_values + 8 * max_slots * capacity * n_vars)
+        size = _align(self._off_ids + 8 * max_slots * capacity)
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if not self._layout_matches(size):
+                # Archivo nuevo o de otra configuración: se recrea vacío
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                self._map(size)
+                self._header["capacity"] = capacity
+                self._header["max_slots"] = max_slots
+                self._header["variables"] = n_vars
+                self._header["magic"] = MAGIC
+            else:
+                self._map(size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _layout_matches(self, size: int) -> bool:
+        if os.fstat(self._fd).st_size != size:
+            return False
+        header = np.frombuffer(os.pread(self._fd, _HEADER.itemsize, 0), dtype=_HEADER)[0]
+        return (
+            header["magic"] == MAGIC
+            and header["capacity"] == self.capacity
+            and header["max_slots"] == self.max_slots
+            and header["variables"] == len(VARIABLES)
+        )
+
+    def _map(self, size: int):
+        self._mm = mmap.mmap(self._fd, size)
+        n_vars = len(VARIABLES)
+        self._header = np.ndarray((), dtype=_HEADER, buffer=self._mm, offset=0)
+        self._slots = np.ndarray((self.max_slots,), dtype=_SLOT, buffer=self._mm, offset=self._off_slots)
+        self._ts = np.ndarray(
+            (self.max_slots, self.capacity), dtype="<f8", buffer=self._mm, offset=self._off_ts
+        )
+        self._values = np.ndarray(
+            (self.max_slots, self.capacity, n_vars), dtype="<f8", buffer=self._mm, offset=self._off_values
+        )
+        self._ids = np.ndarray(
+            (self.max_slots, self.capacity), dtype="<i8", buffer=self._mm, offset=self._off_ids
+        )
+
+    @contextmanager
+    def _write_lock(self):
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    # ========== DIRECTORIO DE SLOTS ==========
+
+    def _lookup(self, key: FloorKey) -> Optional[int]:
+        """Slot del piso; relee el directorio si otro proceso agregó pisos"""
+        slot = self._slot_index.get(key)
+        if slot is not None:
+            return slot
+        n_slots = int(self._header["n_slots"])
+        if n_slots == len(self._slot_index):
+            return None
+        for i in range(len(self._slot_index), n_slots):
+            entry = self._slots[i]
+            self._slot_index[(entry["edificio"].decode("utf-8"), int(entry["piso"]))] = i
+        return self._slot_index.get(key)
+
+    def _allocate(self, key: FloorKey) -> Optional[int]:
+        """Reserva un slot para el piso (con el lock de escritura tomado)"""
+        slot = self._lookup(key)
+        if slot is not None:
+            return slot
+        n_slots = int(self._header["n_slots"])
+        if n_slots >= self.max_slots:
+            if not self._full_warned:
+                logger.warning("Ventana compartida llena (%d pisos); aumente SHARED_WINDOW_SLOTS", n_slots)
+                self._full_warned = True
+            return None
+        edificio = key[0].encode("utf-8")
+        if len(edificio) > EDIFICIO_BYTES:
+            raise ValueError(f"Nombre de edificio demasiado largo para la ventana compartida: {key[0]!r}")
+
+        entry = self._slots[n_slots]
+        entry["edificio"] = edificio
+        entry["piso"] = key[1]
+        entry["head"] = entry["size"] = entry["seq"] = 0
+        # El slot queda completo antes de publicarse en n_slots
+        self._header["n_slots"] = n_slots + 1
+        self._slot_index[key] = n_slots
+        return n_slots
+
+    # ========== ESCRITURA ==========
+
+    def add_rows(self, rows: Iterable[Dict]):
+        """Agrega lecturas (listener del evento SENSOR_DATA)"""
+        groups: Dict[FloorKey, List[Dict]] = {}
+        for row in rows:
+            groups.setdefault((row["edificio"], row["piso"]), []).append(row)
+        if not groups:
+            return
+
+        cap = self.capacity
+        with self._write_lock():
+            for key, group in groups.items():
+                slot = self._allocate(key)
+                if slot is None:
+                    continue
+                n = len(group)
+                ts = np.fromiter((to_epoch(r["timestamp"]) for r in group), dtype=np.float64, count=n)
+                values = np.array(
+                    [(r["temp_c"], r["humedad_pct"], r["energia_kw"]) for r in group], dtype=np.float64
+                )
+                ids = np.fromiter(
+                    (r.get("id") if r.get("id") is not None else -1 for r in group), dtype=np.int64, count=n
+                )
+                if n > cap:
+                    ts, values, ids = ts[-cap:], values[-cap:], ids[-cap:]
+                    n = cap
+
+                entry = self._slots[slot]
+                head = int(entry["head"])
+                positions = (head + np.arange(n)) % cap
+
+                entry["seq"] += 1  # impar: escritura en curso
+                self._ts[slot, positions] = ts
+                self._values[slot, positions] = values
+                self._ids[slot, positions] = ids
+                entry["head"] = (head + n) % cap
+                entry["size"] = min(int(entry["size"]) + n, cap)
+                entry["writes"] += 1
+                entry["seq"] += 1
+
+    def claim_backfill(self, generation: str) -> bool:
+        """
+        True si este proceso debe precargar la ventana desde la base: la
+        ventana pertenece a otra generación (arranque en frío o reinicio del
+        servidor completo). En ese caso se vacían los buffers para no
+        duplicar lecturas. Los demás workers de la misma generación, y los
+        que el master reinicia más tarde, solo leen.
+        """
+        generation = generation.encode("utf-8")[:GENERATION_BYTES]
+        with self._write_lock():
+            if self._header["generation"] == generation:
+                return False
+            for slot in range(int(self._header["n_slots"])):
+                entry = self._slots[slot]
+                entry["seq"] += 1
+                entry["head"] = entry["size"] = 0
+                entry["writes"] += 1
+                entry["seq"] += 1
+            self._header["generation"] = generation
+            return True
+
+    # ========== LECTURA ==========
+
+    def _read(self, slot: int, fn):
+        """Ejecuta `fn(entry)` con una vista consistente del slot (seqlock)"""
+        entry = self._slots[slot]
+        for _ in range(1000):
+            seq = int(entry["seq"])
+            if seq & 1:
+                time.sleep(0)
+                continue
+            result = fn(entry)
+            if int(entry["seq"]) == seq:
+                return result
+        # Escritor muy activo: se lee con el lock tomado
+        with self._write_lock():
+            return fn(entry)
+
+    def _ordered(self, slot: int):
+        def read(entry):
+            size, head = int(entry["size"]), int(entry["head"])
+            if size < self.capacity:
+                return (
+                    self._ts[slot, :size].copy(),
+                    self._values[slot, :size].copy(),
+                    self._ids[slot, :size].copy()
+                )
+            return (
+                np.roll(self._ts[slot], -head),
+                np.roll(self._values[slot], -head, axis=0),
+                np.roll(self._ids[slot], -head)
+            )
+
+        ts, values, ids = self._read(slot, read)
+        # Las lecturas pueden llegar desordenadas (lotes, reintentos)
+        if ts.size > 1 and np.any(ts[1:] < ts[:-1]):
+            order = np.argsort(ts, kind="stable")
+            ts, values, ids = ts[order], values[order], ids[order]
+        return ts, values, ids
+
+    def keys(self) -> List[FloorKey]:
+        self._lookup(("", -1))  # refresca el directorio
+        return list(self._slot_index)
+
+    def has(self, edificio: str, piso: int) -> bool:
+        return self._lookup((edificio, piso)) is not None
+
+    def window(
+        self,
+        edificio: str,
+        piso: int,
+        minutes: int = 60
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Lecturas de los últimos `minutes` minutos como (timestamps, valores).
+        Retorna None si el piso no tiene slot.
+        """
+        slot = self._lookup((edificio, piso))
+        if slot is None:
+            return None
+        ts, values, _ = self._ordered(slot)
+        start = int(np.searchsorted(ts, time.time() - minutes * 60, side="left"))
+        return ts[start:], values[start:]
+
+    def block(
+        self,
+        keys: List[FloorKey],
+        minutes: int = 60
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Igual que `RecentWindowStore.block`"""
+        group_idx, timestamps, values = [], [], []
+        for g, (edificio, piso) in enumerate(keys):
+            window = self.window(edificio, piso, minutes)
+            if window is None or window[0].size == 0:
+                continue
+            ts, vals = window
+            group_idx.append(np.full(ts.size, g, dtype=np.intp))
+            timestamps.append(ts)
+            values.append(vals)
+
+        if not group_idx:
+            return (
+                np.empty(0, dtype=np.intp),
+                np.empty(0, dtype=np.float64),
+                np.empty((0, len(VARIABLES)), dtype=np.float64)
+            )
+        return np.concatenate(group_idx), np.concatenate(timestamps), np.vstack(values)
+
+    def latest(self, edificio: str, piso: int) -> Optional[Dict]:
+        """Última lectura del piso como dict; None si no hay"""
+        slot = self._lookup((edificio, piso))
+        if slot is None:
+            return None
+
+        def read(entry):
+            size = int(entry["size"])
+            if size == 0:
+                return None
+            # La más reciente por timestamp; en empate, la última escrita
+            order = (int(entry["head"]) - size + np.arange(size)) % self.capacity
+            ts = self._ts[slot, order]
+            i = int(order[size - 1 - int(np.argmax(ts[::-1]))])
+            return float(self._ts[slot, i]), self._values[slot, i].tolist(), int(self._ids[slot, i])
+
+        found = self._read(slot, read)
+        if found is None:
+            return None
+        ts, values, row_id = found
+        return {
+            "id": row_id if row_id >= 0 else None,
+            "timestamp": datetime.fromtimestamp(ts, timezone.utc),
+            "edificio": edificio,
+            "piso": piso,
+            **dict(zip(VARIABLES, values)),
+        }
+
+    def latest_rows(self, edificio: str) -> List[Dict]:
+        """Última lectura de cada piso del edificio, ordenadas por piso"""
+        pisos = sorted(piso for e, piso in self.keys() if e == edificio)
+        return [row for row in (self.latest(edificio, piso) for piso in pisos) if row]
+
+    def version(self, edificio: str, piso: Optional[int] = None) -> int:
+        """
+        Contador que cambia con cada escritura en el piso (o en cualquier
+        piso del edificio si piso es None); sirve como parte de la clave de
+        cachés de respuestas en todos los workers.
+        """
+        if piso is not None:
+            slot = self._lookup((edificio, piso))
+            return -1 if slot is None else int(self._slots[slot]["writes"])
+        self._lookup(("", -1))
+        return int(self._header["n_slots"]) + sum(
+            int(self._slots[slot]["writes"])
+            for (e, _), slot in self._slot_index.items() if e == edificio
+        )
+
+    def close(self):
+        self._mm.close()
+        os.close(self._fd)
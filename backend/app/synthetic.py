@@ -0,0 +1,142 @@
+"""
+Generador vectorizado de lecturas sintéticas para pruebas de capacidad.
+
+Reproduce los patrones de `init_db.create_sample_data` (ciclo diario con
+pico a las 14 h, pisos superiores más calientes y con mayor consumo,
+humedad inversa a la temperatura) para N edificios × M pisos, cualquier
+duración e intervalo de muestreo. Inyecta episodios de anomalía de 60
+minutos (calentamiento gradual y pico de energía) en momentos aleatorios.
+
+La generación es por bloques de tiempo con NumPy y una semilla fija: la
+misma semilla y los mismos parámetros producen los mismos datos.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.ml_predictor import to_epoch
+
+# Duración de cada episodio de anomalía
+EPISODIO = timedelta(minutes=60)
+
+
+def building_names(n: int) -> List[str]:
+    """Nombres de edificio estilo columnas de hoja de cálculo: A..Z, AA, AB, ..."""
+    names = []
+    for i in range(n):
+        name = ""
+        i += 1
+        while i:
+            i, r = divmod(i - 1, 26)
+            name = chr(ord("A") + r) + name
+        names.append(name)
+    return names
+
+
+def generate(
+    edificios: int = 1,
+    pisos: int = 3,
+    desde: Optional[datetime] = None,
+    duracion: timedelta = timedelta(hours=2),
+    intervalo: float = 60.0,
+    seed: int = 42,
+    anomalias_por_dia: float = 1.0,
+    filas_por_bloque: int = 1_000_000
+) -> Iterator[pd.DataFrame]:
+    """
+    Genera lecturas por bloques de ~`filas_por_bloque` filas, en orden
+    cronológico. Con `desde` None la serie termina en el momento actual.
+    anomalias_por_dia: episodios esperados por piso y por día
+    """
+    rng = np.random.default_rng(seed)
+    if desde is None:
+        desde = datetime.now(timezone.utc) - duracion
+    start = to_epoch(desde)
+
+    n_series = edificios * pisos
+    n_steps = int(duracion.total_seconds() // intervalo)
+    names = np.array(building_names(edificios), dtype=object)
+
+    serie_edificio = np.repeat(np.arange(edificios), pisos)
+    serie_piso = np.tile(np.arange(1, pisos + 1), edificios)
+
+    # Posición relativa del piso (0 = planta baja, 1 = último piso). Con 3
+    # pisos los desplazamientos son los del ejemplo: piso*1.5 °C y piso*1.2 kW
+    pos = (serie_piso - 1) / (pisos - 1) if pisos > 1 else np.zeros(n_series)
+    temp_offset = 1.5 + 3.0 * pos + rng.normal(0, 0.5, edificios)[serie_edificio]
+    energia_offset = 1.2 + 2.4 * pos
+
+    # Inicio de los episodios como clave serie*n_steps + paso, ordenada
+    dias = n_steps * intervalo / 86400
+    counts = rng.poisson(anomalias_por_dia * dias, n_series)
+    starts = np.sort(
+        np.repeat(np.arange(n_series, dtype=np.int64), counts) * n_steps
+        + rng.integers(0, max(n_steps, 1), counts.sum())
+    )
+    episodio_pasos = max(1, int(EPISODIO.total_seconds() // intervalo))
+
+    steps_per_chunk = max(1, filas_por_bloque // n_series)
+    for first in range(0, n_steps, steps_per_chunk):
+        steps = np.arange(first, min(n_steps, first + steps_per_chunk), dtype=np.int64)
+        shape = (steps.size, n_series)
+        epoch = start + steps * intervalo
+
+        # Ciclo diario: pico de temperatura a las 14 h
+        hora = (epoch % 86400) / 3600
+        factor_tiempo = (np.abs(hora - 14) / 14)[:, None]
+
+        # Minutos transcurridos dentro de un episodio de anomalía (0 si no hay)
+        grid = np.arange(n_series, dtype=np.int64)[None, :] * n_steps + steps[:, None]
+        idx = np.searchsorted(starts, grid, side="right") - 1
+        elapsed = grid - starts[np.maximum(idx, 0)]
+        in_episode = (idx >= 0) & (elapsed < episodio_pasos) & (elapsed <= steps[:, None])
+        minutos = np.where(in_episode, elapsed * intervalo / 60, 0.0)
+
+        temp = 24 + temp_offset - factor_tiempo * 3 + rng.uniform(-1.5, 1.5, shape)
+        temp += minutos * 0.05
+
+        humedad = 60 - (temp - 24) * 2 + rng.uniform(-8, 8, shape)
+        humedad = np.clip(humedad, 15, 85)
+
+        energia = 3 + energia_offset + np.maximum(temp - 26, 0) * 0.5
+        energia += rng.uniform(-0.5, 0.5, shape) + minutos * 0.08
+
+        yield pd.DataFrame({
+            "timestamp": pd.to_datetime(
+                np.repeat(np.round(epoch * 1e6).astype(np.int64), n_series), unit="us", utc=True
+            ),
+            "edificio": np.tile(names[serie_edificio], steps.size),
+            "piso": np.tile(serie_piso, steps.size),
+            "temp_c": np.round(temp.ravel(), 1),
+            "humedad_pct": np.round(humedad.ravel(), 1),
+            "energia_kw": np.round(energia.ravel(), 2),
+        })
+
+
+def write_file(chunks: Iterable[pd.DataFrame], path: str) -> int:
+    """Escribe los bloques a CSV o Parquet (según la extensión). Retorna las filas."""
+    total = 0
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for df in chunks:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                total += len(df)
+        finally:
+            if writer is not None:
+                writer.close()
+        return total
+
+    with open(path, "w", newline="") as f:
+        for df in chunks:
+            df.to_csv(f, header=total == 0, index=False)
+            total += len(df)
+    return total
@@ -0,0 +1,8 @@
+"""
+Benchmarks de la API y del predictor (no son pruebas unitarias).
+
+Uso desde `backend/`:
+    python -m benchmarks.run --escalas small medium --concurrencia 1 8 32
+    python -m benchmarks.compare resultados/antes.json resultados/despues.json
+    python -m benchmarks.startup --presupuesto-import-ms 800
+"""
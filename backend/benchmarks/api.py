@@ -0,0 +1,171 @@
+"""
+Carga concurrente sobre los endpoints de la API.
+
+El servidor corre en un proceso aparte (uvicorn) para que el cliente no
+compita por el GIL con la aplicación; el cliente usa httpx asíncrono con
+`concurrencia` peticiones en vuelo.
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.common import latency_stats
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _lectura(rng: np.random.Generator, piso: Optional[int] = None) -> Dict:
+    return {
+        "edificio": "A",
+        "piso": int(piso or rng.integers(1, 4)),
+        "temp_c": round(float(rng.uniform(20, 30)), 1),
+        "humedad_pct": round(float(rng.uniform(30, 70)), 1),
+        "energia_kw": round(float(rng.uniform(2, 10)), 2),
+    }
+
+
+# (nombre, método, ruta, generador del cuerpo). Las lecturas van primero y
+# la ingesta al final, porque escribir invalida las cachés de lectura.
+ENDPOINTS = [
+    ("dashboard_piso", "GET", "/dashboard/1", None),
+    ("dashboard_edificio", "GET", "/dashboard", None),
+    ("chart_promedio", "GET", "/sensor-data/chart", None),
+    ("chart_piso", "GET", "/sensor-data/chart?piso=1", None),
+    ("chart_rollup_1h", "GET", "/sensor-data/chart?bucket=1h", None),
+    ("historial", "GET", "/sensor-data/?limit=100", None),
+    ("predict", "GET", "/predict/1/temp_c", None),
+    ("alertas", "GET", "/alerts/", None),
+    ("ingesta", "POST", "/sensor-data/", _lectura),
+    ("ingesta_lote_100", "POST", "/sensor-data/batch",
+     lambda rng: {"items": [_lectura(rng) for _ in range(100)]}),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def server(database_url: str, workers: int = 1, env: Optional[Dict] = None):
+    """Levanta uvicorn con la base indicada y retorna su URL base"""
+    port = _free_port()
+    proc_env = {**os.environ, **(env or {}), "DATABASE_URL": database_url}
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=proc_env,
+        stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 120
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError("El servidor terminó antes de arrancar")
+            try:
+                if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("El servidor no respondió a tiempo")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+async def _load(
+    base_url: str,
+    method: str,
+    path: str,
+    body: Optional[Callable],
+    concurrencia: int,
+    peticiones: int,
+    seed: int
+) -> Dict:
+    rng = np.random.default_rng(seed)
+    latencias: List[float] = []
+    errores = 0
+    pendientes = peticiones
+
+    limits = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def worker():
+            nonlocal pendientes, errores
+            while pendientes > 0:
+                pendientes -= 1
+                json_body = body(rng) if body else None
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=json_body)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencias.append(time.perf_counter() - start)
+                if not ok:
+                    errores += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrencia)))
+        total = time.perf_counter() - start
+
+    return {
+        "peticiones": len(latencias),
+        "errores": errores,
+        "rps": round(len(latencias) / total, 1),
+        **latency_stats(latencias),
+    }
+
+
+def run(
+    base_url: str,
+    concurrencias: List[int],
+    peticiones: int,
+    seed: int = 42,
+    solo: Optional[List[str]] = None
+) -> List[Dict]:
+    """Mide cada endpoint con cada nivel de concurrencia"""
+    results = []
+    for nombre, method, path, body in ENDPOINTS:
+        if solo and nombre not in solo:
+            continue
+        for concurrencia in concurrencias:
+            # Calentamiento: caché de respuestas, pronósticos y conexiones
+            asyncio.run(_load(base_url, method, path, body, 1, 3, seed))
+            stats = asyncio.run(
+                _load(base_url, method, path, body, concurrencia, peticiones, seed)
+            )
+            results.append({
+                "endpoint": nombre,
+                "metodo": method,
+                "ruta": path,
+                "concurrencia": concurrencia,
+                **stats,
+            })
+            print(
+                f"   {nombre:<20} c={concurrencia:<3} {stats['rps']:>8} req/s  "
+                f"p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms"
+                + (f"  errores={stats['errores']}" if stats["errores"] else ""),
+                flush=True
+            )
+    return results
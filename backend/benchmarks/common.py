@@ -0,0 +1,90 @@
+"""
+Utilidades compartidas: escalas de datos, carga de datos sintéticos y
+estadísticas de latencia.
+"""
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import bulk_import, migrations, synthetic
+
+# Escalas de datos sintéticos (3 pisos para que los pisos sean válidos en la API)
+ESCALAS = {
+    "small": {"edificios": 1, "pisos": 3, "duracion": timedelta(days=1), "intervalo": 60},
+    "medium": {"edificios": 5, "pisos": 3, "duracion": timedelta(days=30), "intervalo": 60},
+    "large": {"edificios": 20, "pisos": 3, "duracion": timedelta(days=90), "intervalo": 60},
+}
+
+
+def latency_stats(samples: List[float]) -> Dict:
+    """Percentiles de una lista de latencias en segundos, reportados en ms"""
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None, "media_ms": None}
+    ms = np.asarray(samples, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "media_ms": round(float(ms.mean()), 3),
+    }
+
+
+def seed_database(url: str, escala: str, seed: int = 42) -> Dict:
+    """
+    Crea el esquema y carga datos sintéticos de la escala indicada, con la
+    serie terminando en el momento actual (para que haya ventana reciente).
+    """
+    engine = create_engine(url)
+    session_factory = sessionmaker(bind=engine)
+    migrations.upgrade(engine)
+
+    params = ESCALAS[escala]
+    start = time.perf_counter()
+    total = 0
+    for df in synthetic.generate(seed=seed, **params):
+        bulk_import.write_chunk(engine, df)
+        total += len(df)
+    carga = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bulk_import.refresh_after_load(session_factory, None, None)
+    rollups = time.perf_counter() - start
+
+    engine.dispose()
+    return {
+        "filas": total,
+        "carga_s": round(carga, 3),
+        "rollups_s": round(rollups, 3),
+        "edificios": params["edificios"],
+        "pisos": params["pisos"],
+        "duracion_h": params["duracion"].total_seconds() / 3600,
+        "intervalo_s": params["intervalo"],
+    }
+
+
+def metadata() -> Dict:
+    """Contexto de la corrida para poder comparar resultados"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "fecha": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+    }
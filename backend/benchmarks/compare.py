@@ -0,0 +1,52 @@
+"""
+Compara dos corridas de `benchmarks.run` (antes / después).
+
+    python -m benchmarks.compare resultados/antes.json resultados/despues.json
+
+Muestra p50, p95 y throughput de cada medición presente en ambas corridas
+y el cambio relativo (negativo = más rápido en latencia).
+"""
+import argparse
+import json
+
+
+def _index(run):
+    rows = {}
+    for r in run.get("predictor", []):
+        rows[("predictor", r["nombre"])] = r
+    for escala, data in run.get("escalas", {}).items():
+        for r in data.get("consultas", []):
+            rows[(escala, r["nombre"])] = r
+        for r in data.get("endpoints", []):
+            rows[(escala, f"{r['endpoint']} c={r['concurrencia']}")] = r
+    return rows
+
+
+def _delta(before, after):
+    if not before or after is None:
+        return ""
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparar resultados de benchmarks")
+    parser.add_argument("antes")
+    parser.add_argument("despues")
+    args = parser.parse_args()
+
+    with open(args.antes) as f:
+        antes = _index(json.load(f))
+    with open(args.despues) as f:
+        despues = _index(json.load(f))
+
+    print(f"{'medición':<44} {'p50 ms':>18} {'p95 ms':>18} {'req/s':>18}")
+    for key in sorted(antes.keys() & despues.keys()):
+        a, d = antes[key], despues[key]
+        p50 = f"{d['p50_ms']} ({_delta(a['p50_ms'], d['p50_ms'])})"
+        p95 = f"{d['p95_ms']} ({_delta(a['p95_ms'], d['p95_ms'])})"
+        rps = f"{d['rps']} ({_delta(a['rps'], d['rps'])})" if "rps" in d else ""
+        print(f"{' / '.join(key):<44} {p50:>18} {p95:>18} {rps:>18}")
+
+
+if __name__ == "__main__":
+    main()
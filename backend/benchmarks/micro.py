@@ -0,0 +1,127 @@
+"""
+Micro-benchmarks del predictor y de las consultas de `crud`.
+"""
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.forecasts import ForecastCache, ForecastScheduler
+from app.ml_predictor import SimplePredictor, StreamingPredictor, VARIABLES
+from app.recent_window import RecentWindowStore
+from benchmarks.common import latency_stats
+
+
+def _measure(nombre: str, fn: Callable, repeticiones: int) -> Dict:
+    fn()  # calentamiento
+    samples = []
+    for _ in range(repeticiones):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"nombre": nombre, "repeticiones": repeticiones, **latency_stats(samples)}
+
+
+def predictor(repeticiones: int = 200, pisos: int = 30, seed: int = 42) -> List[Dict]:
+    """
+    predict (pandas), predict_many (vectorizado), StreamingPredictor y una
+    pasada completa del scheduler de pronósticos en cada modo
+    """
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    n = 60
+    timestamps = now - np.arange(n)[::-1] * 60.0
+    values = np.column_stack([
+        rng.uniform(20, 30, n), rng.uniform(30, 70, n), rng.uniform(2, 10, n)
+    ])
+    df = pd.DataFrame(values, columns=list(VARIABLES))
+    df["timestamp"] = pd.to_datetime(timestamps, unit="s")
+    records = df.to_dict("records")
+
+    p = SimplePredictor()
+
+    keys = [("A", piso) for piso in range(1, pisos + 1)]
+    group_idx = np.repeat(np.arange(pisos), n)
+    all_ts = np.tile(timestamps, pisos)
+    all_values = np.tile(values, (pisos, 1))
+
+    streaming = StreamingPredictor(p)
+    streaming.update([
+        {"timestamp": ts, "edificio": "A", "piso": piso, **dict(zip(VARIABLES, row))}
+        for piso in range(1, pisos + 1)
+        for ts, row in zip(timestamps, values)
+    ])
+
+    window = RecentWindowStore()
+    window.add_rows([
+        {"timestamp": ts, "edificio": "A", "piso": piso, **dict(zip(VARIABLES, row))}
+        for piso in range(1, pisos + 1)
+        for ts, row in zip(timestamps, values)
+    ])
+
+    batch_scheduler = ForecastScheduler(p, window, ForecastCache())
+    streaming_scheduler = ForecastScheduler(p, window, ForecastCache(), streaming=streaming)
+
+    return [
+        _measure("predict_pandas_1_variable", lambda: p.predict(records, "temp_c"), repeticiones),
+        _measure(
+            "predict_pandas_3_variables",
+            lambda: [p.predict(records, var) for var in VARIABLES],
+            repeticiones
+        ),
+        _measure(
+            f"predict_many_{pisos}_pisos",
+            lambda: p.predict_many(keys, group_idx, all_ts, all_values),
+            repeticiones
+        ),
+        _measure(
+            "streaming_predict_3_variables",
+            lambda: [streaming.predict("A", 1, var) for var in VARIABLES],
+            repeticiones
+        ),
+        _measure(
+            f"recent_window_block_{pisos}_pisos",
+            lambda: window.block(keys, 60),
+            repeticiones
+        ),
+        _measure(f"scheduler_lotes_{pisos}_pisos", batch_scheduler.run, repeticiones),
+        _measure(f"scheduler_streaming_{pisos}_pisos", streaming_scheduler.run, repeticiones),
+    ]
+
+
+def queries(database_url: str, repeticiones: int = 50) -> List[Dict]:
+    """Consultas de `crud` usadas por los endpoints"""
+    engine = create_engine(database_url)
+    db = sessionmaker(bind=engine)()
+    try:
+        page = crud.get_sensor_data(db, "A", 1, 100)
+        cursor = (page[-1].timestamp, page[-1].id) if page else None
+
+        return [
+            _measure("get_sensor_data_100", lambda: crud.get_sensor_data(db, "A", 1, 100), repeticiones),
+            _measure(
+                "get_sensor_data_keyset",
+                lambda: crud.get_sensor_data(db, "A", 1, 100, before=cursor),
+                repeticiones
+            ),
+            _measure("get_latest_per_floor", lambda: crud.get_latest_per_floor(db, "A"), repeticiones),
+            _measure("get_chart_average_60", lambda: crud.get_chart_average(db, "A", 60), repeticiones),
+            _measure(
+                "get_rollup_chart_1h",
+                lambda: crud.get_rollup_chart(db, "A", "1h", None, 60),
+                repeticiones
+            ),
+            _measure(
+                "get_recent_rows_60min",
+                lambda: crud.get_recent_rows_for_prediction(db, 60),
+                repeticiones
+            ),
+            _measure("get_active_alerts", lambda: crud.get_active_alerts(db, "A"), repeticiones),
+        ]
+    finally:
+        db.close()
+        engine.dispose()
@@ -0,0 +1,170 @@
+"""
+Perfil de arranque en frío: tiempo de importar `app.main`, de la fase de
+arranque (lifespan) y de la primera petición, con presupuestos.
+
+Cada medición corre en un intérprete nuevo. El tiempo de importación se
+desglosa por paquete con `python -X importtime`; los módulos pesados que
+la API no debería cargar al arrancar (pandas, pyarrow, prophet) se marcan.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --fast --presupuesto-import-ms 800 --presupuesto-arranque-ms 1500
+    python -m benchmarks.startup --database-url postgresql://... --repeticiones 5
+
+Sale con código 1 si la mediana excede algún presupuesto.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+# No se importa `app` aquí: cada medición debe partir de un intérprete limpio
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que no deberían importarse al arrancar la API
+PESADOS = ("pandas", "pyarrow", "prophet")
+
+_BOOT_SCRIPT = """
+import asyncio, json, time
+import httpx
+
+start = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+
+async def boot():
+    async with main.app.router.lifespan_context(main.app):
+        booted = time.perf_counter()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://local") as client:
+            t = time.perf_counter()
+            await client.get("/health")
+            first = time.perf_counter() - t
+        return booted, first
+
+booted, first = asyncio.run(boot())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "arranque_ms": (booted - imported) * 1000,
+    "primera_peticion_ms": first * 1000,
+    "fases_ms": {k: v * 1000 for k, v in main.startup_timings.items()},
+}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Perfil de arranque de SmartFloors")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--database-url", help="Por defecto una base SQLite temporal")
+    parser.add_argument("--fast", action="store_true", help="Medir con FAST_STARTUP=1")
+    parser.add_argument("--top", type=int, default=12, help="Paquetes a mostrar en el desglose")
+    parser.add_argument("--presupuesto-import-ms", type=float)
+    parser.add_argument("--presupuesto-arranque-ms", type=float)
+    parser.add_argument("--salida", help="Guardar el reporte en JSON")
+    return parser.parse_args()
+
+
+def importtime(env) -> dict:
+    """Desglose de `python -X importtime -c 'import app.main'`"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    por_paquete = defaultdict(float)
+    modulos = set()
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, cumulative_us, name = (p.strip() for p in line.replace("import time:", "|").split("|"))
+        if not self_us.isdigit():
+            continue  # encabezado
+        modulos.add(name)
+        por_paquete[name.split(".")[0]] += int(self_us) / 1000
+        if name == "app.main":
+            total = int(cumulative_us) / 1000
+
+    return {
+        "total_ms": round(total, 1),
+        "por_paquete_ms": {
+            k: round(v, 1) for k, v in sorted(por_paquete.items(), key=lambda kv: -kv[1])
+        },
+        "pesados_cargados": [m for m in PESADOS if m in modulos],
+    }
+
+
+def boot(env) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _BOOT_SCRIPT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url
+    if not database_url:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='smartfloors-startup-'), 'startup.db')}"
+        subprocess.run(
+            [sys.executable, "migrate.py"],
+            cwd=BACKEND_DIR, env={**os.environ, "DATABASE_URL": database_url},
+            stdout=subprocess.DEVNULL, check=True
+        )
+
+    env = {**os.environ, "DATABASE_URL": database_url}
+    if args.fast:
+        env["FAST_STARTUP"] = "1"
+
+    print("⏱  Desglose de importación (-X importtime)...")
+    imports = importtime(env)
+    for paquete, ms in list(imports["por_paquete_ms"].items())[:args.top]:
+        print(f"   {paquete:<28} {ms:>8.1f} ms")
+    if imports["pesados_cargados"]:
+        print(f"   ⚠ Módulos pesados importados al arrancar: {', '.join(imports['pesados_cargados'])}")
+
+    print(f"🚀 Arranque completo ({args.repeticiones} repeticiones)...")
+    corridas = [boot(env) for _ in range(args.repeticiones)]
+    mediana = {
+        key: round(statistics.median(c[key] for c in corridas), 1)
+        for key in ("import_ms", "arranque_ms", "primera_peticion_ms")
+    }
+    fases = {
+        fase: round(statistics.median(c["fases_ms"].get(fase, 0.0) for c in corridas), 1)
+        for fase in corridas[-1]["fases_ms"]
+    }
+    print(f"   importar app.main   {mediana['import_ms']:>8.1f} ms")
+    print(f"   lifespan            {mediana['arranque_ms']:>8.1f} ms")
+    for fase, ms in fases.items():
+        print(f"     - {fase:<17} {ms:>8.1f} ms")
+    print(f"   primera petición    {mediana['primera_peticion_ms']:>8.1f} ms")
+
+    excedidos = []
+    if args.presupuesto_import_ms is not None and mediana["import_ms"] > args.presupuesto_import_ms:
+        excedidos.append(f"importación {mediana['import_ms']} ms > {args.presupuesto_import_ms} ms")
+    if args.presupuesto_arranque_ms is not None and mediana["arranque_ms"] > args.presupuesto_arranque_ms:
+        excedidos.append(f"arranque {mediana['arranque_ms']} ms > {args.presupuesto_arranque_ms} ms")
+
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump({
+                "fast_startup": args.fast,
+                "importacion": imports,
+                "mediana": mediana,
+                "fases_ms": fases,
+                "corridas": corridas,
+                "excedidos": excedidos,
+            }, f, indent=2, ensure_ascii=False)
+
+    if excedidos:
+        for e in excedidos:
+            print(f"❌ Presupuesto excedido: {e}")
+        sys.exit(1)
+    print("✅ Dentro del presupuesto")
+
+
+if __name__ == "__main__":
+    main()
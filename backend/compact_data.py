@@ -0,0 +1,69 @@
+"""
+Script de retención de lecturas de sensores
+
+Compacta en agregados (15m, 1h, 1d) y elimina las lecturas más antiguas
+que --dias. En PostgreSQL, `particionar` convierte `sensor_data` en una
+tabla particionada por mes (una sola vez; la retención pasa a eliminar
+meses completos).
+
+Ejemplos:
+    python compact_data.py compactar --dias 90
+    python compact_data.py compactar --dias 30 --vacuum
+    python compact_data.py particionar
+"""
+import argparse
+import sys
+
+from app.database import engine, SessionLocal
+from app import migrations, partitions, retention
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Retención de datos de SmartFloors")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    compactar = sub.add_parser("compactar", help="Compactar y eliminar lecturas antiguas")
+    compactar.add_argument("--dias", type=float, required=True, help="Días de lecturas crudas a conservar")
+    compactar.add_argument("--vacuum", action="store_true", help="SQLite: VACUUM para achicar el archivo")
+
+    sub.add_parser("particionar", help="PostgreSQL: particionar sensor_data por mes")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    migrations.upgrade(engine)
+
+    if args.comando == "particionar":
+        if not partitions.supported(engine):
+            print("❌ El particionado nativo solo está disponible en PostgreSQL")
+            sys.exit(1)
+        print("🔧 Particionando sensor_data por mes...")
+        try:
+            created = partitions.convert(engine)
+        except Exception as e:
+            print(f"❌ Error al particionar: {e}")
+            sys.exit(1)
+        if not created:
+            print("✅ sensor_data ya estaba particionada")
+        for name in created:
+            print(f"   - Creada: {name}")
+        return
+
+    print(f"🗜  Compactando lecturas de más de {args.dias:g} días...")
+    try:
+        stats = retention.compact(SessionLocal, args.dias, vacuum=args.vacuum)
+    except Exception as e:
+        print(f"❌ Error al compactar: {e}")
+        sys.exit(1)
+
+    print(f"✅ Corte: {stats['corte']}")
+    print(f"   - Recalculados {stats['agregados']:,} agregados")
+    print(f"   - Eliminadas {stats['filas_eliminadas']:,} lecturas")
+    for name in stats.get("particiones_eliminadas", []):
+        print(f"   - Eliminada partición: {name}")
+    print(f"   - Eliminados {stats['agregados_eliminados']:,} agregados de 1 minuto")
+
+
+if __name__ == "__main__":
+    main()
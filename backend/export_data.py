@@ -0,0 +1,67 @@
+"""
+Script para exportar el histórico de sensores o alertas a CSV, NDJSON o Parquet
+
+Ejemplos:
+    python export_data.py sensor_data --formato csv --desde 2024-01-01 --hasta 2024-02-01 > enero.csv
+    python export_data.py sensor_data --formato parquet --edificio A --pisos 1 2 --salida datos.parquet
+    python export_data.py alerts --formato ndjson --salida alertas.ndjson
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from app.database import SessionLocal
+from app import export
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Exportar datos de SmartFloors")
+    parser.add_argument("tabla", choices=list(export.TABLAS))
+    parser.add_argument("--formato", choices=list(export.FORMATOS), default="csv")
+    parser.add_argument("--desde", type=datetime.fromisoformat, help="Inicio del rango (ISO)")
+    parser.add_argument("--hasta", type=datetime.fromisoformat, help="Fin del rango, exclusivo (ISO)")
+    parser.add_argument("--edificio")
+    parser.add_argument("--pisos", type=int, nargs="+")
+    parser.add_argument("--salida", help="Archivo de salida (por defecto stdout; obligatorio para parquet)")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.formato == "parquet" and not args.salida:
+        print("❌ Parquet requiere --salida", file=sys.stderr)
+        sys.exit(1)
+
+    query = export.export_query(args.tabla, args.desde, args.hasta, args.edificio, args.pisos)
+    chunks = export.iter_chunks(SessionLocal, query, args.chunk_size)
+
+    # Contar filas sin materializarlas
+    total = 0
+
+    def counted(chunks):
+        nonlocal total
+        for chunk in chunks:
+            total += len(chunk)
+            yield chunk
+
+    start = time.perf_counter()
+    out = open(args.salida, "wb") if args.salida else sys.stdout.buffer
+    try:
+        if args.formato == "parquet":
+            export.write_parquet(args.tabla, counted(chunks), out)
+        else:
+            writer = export.iter_ndjson if args.formato == "ndjson" else export.iter_csv
+            for block in writer(export.columns(args.tabla), counted(chunks)):
+                out.write(block)
+    finally:
+        if args.salida:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Exportadas {total} filas de {args.tabla} en {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Script para generar datos sintéticos de sensores (pruebas de capacidad)
+
+Escribe directo a la base de datos por la vía masiva (COPY / executemany)
+o a un archivo CSV/Parquet que luego se puede cargar con import_data.py.
+Al escribir en la base no se aplica la validación de la API, así que se
+pueden generar más pisos que los que acepta POST /sensor-data/.
+
+Ejemplos:
+    python generate_data.py --edificios 10 --pisos 20 --dias 30 --intervalo 60
+    python generate_data.py --edificios 100 --pisos 10 --dias 365 --salida carga.parquet
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from app import synthetic
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generar datos sintéticos de SmartFloors")
+    parser.add_argument("--edificios", type=int, default=1)
+    parser.add_argument("--pisos", type=int, default=3)
+    parser.add_argument("--dias", type=float, default=0)
+    parser.add_argument("--horas", type=float, default=0)
+    parser.add_argument("--desde", type=datetime.fromisoformat, help="Inicio (ISO); por defecto termina ahora")
+    parser.add_argument("--intervalo", type=float, default=60, help="Segundos entre lecturas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anomalias", type=float, default=1.0, help="Episodios por piso y por día")
+    parser.add_argument("--filas-por-bloque", type=int, default=1_000_000)
+    parser.add_argument("--salida", help="Archivo .csv o .parquet (por defecto la base de datos)")
+    parser.add_argument("--sin-rollups", action="store_true", help="No recalcular los agregados")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    duracion = timedelta(days=args.dias, hours=args.horas) or timedelta(hours=2)
+
+    chunks = synthetic.generate(
+        edificios=args.edificios,
+        pisos=args.pisos,
+        desde=args.desde,
+        duracion=duracion,
+        intervalo=args.intervalo,
+        seed=args.seed,
+        anomalias_por_dia=args.anomalias,
+        filas_por_bloque=args.filas_por_bloque
+    )
+
+    print(f"🏭 Generando {args.edificios} edificios × {args.pisos} pisos durante {duracion}...")
+    start = time.perf_counter()
+
+    if args.salida:
+        total = synthetic.write_file(chunks, args.salida)
+    else:
+        from app.database import engine, SessionLocal
+        from app import bulk_import, migrations
+
+        migrations.upgrade(engine)
+        total = 0
+        desde = hasta = None
+        for df in chunks:
+            bulk_import.write_chunk(engine, df)
+            total += len(df)
+            desde = desde or df["timestamp"].iloc[0].to_pydatetime()
+            hasta = df["timestamp"].iloc[-1].to_pydatetime()
+            elapsed = time.perf_counter() - start
+            print(f"   ... {total:,} filas ({total / elapsed:,.0f} filas/s)", flush=True)
+
+        if total:
+            buckets = bulk_import.refresh_after_load(
+                SessionLocal, desde, hasta, rebuild_rollups=not args.sin_rollups
+            )
+            print(f"   - Recalculados {buckets:,} agregados")
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {total:,} filas en {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} filas/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Script para importar histórico de sensores desde archivos CSV o Parquet
+
+Columnas requeridas: timestamp, edificio, piso, temp_c, humedad_pct, energia_kw
+
+Ejemplos:
+    python import_data.py historico_2024.csv
+    python import_data.py enero.parquet febrero.parquet --chunk-size 100000
+"""
+import argparse
+import sys
+
+from app.database import engine, SessionLocal
+from app import bulk_import, migrations
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Importar histórico a SmartFloors")
+    parser.add_argument("archivos", nargs="+")
+    parser.add_argument("--formato", choices=["csv", "parquet"], help="Por defecto según la extensión")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--sin-rollups", action="store_true", help="No recalcular los agregados")
+    parser.add_argument("--max-piso", type=int, help="Descartar filas con un piso mayor (por defecto sin límite)")
+    return parser.parse_args()
+
+
+def show_progress(stats):
+    print(
+        f"   ... {stats['insertadas']:,} filas insertadas, {stats['rechazadas']:,} rechazadas "
+        f"({stats['filas_por_segundo']:,.0f} filas/s)",
+        flush=True
+    )
+
+
+def main():
+    args = parse_args()
+    migrations.upgrade(engine)
+
+    for path in args.archivos:
+        print(f"📥 Importando {path}...")
+        try:
+            stats = bulk_import.import_file(
+                engine,
+                SessionLocal,
+                path,
+                chunk_size=args.chunk_size,
+                formato=args.formato,
+                rebuild_rollups=not args.sin_rollups,
+                max_piso=args.max_piso,
+                progress=show_progress
+            )
+        except Exception as e:
+            print(f"❌ Error al importar {path}: {e}")
+            sys.exit(1)
+
+        print(f"✅ {stats['insertadas']:,} de {stats['leidas']:,} filas en {stats['segundos']:.1f}s")
+        if stats["rechazadas"]:
+            print(f"   ⚠ {stats['rechazadas']:,} filas inválidas descartadas")
+        if stats.get("buckets"):
+            print(f"   - Recalculados {stats['buckets']:,} agregados ({stats['desde']} → {stats['hasta']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,20 @@
 Script para inicializar la base de datos y crear datos de prueba
 Configurado según las especificaciones del proyecto SmartFloors
 """
-from app.database import engine, SessionLocal, Base
-from app.models import SensorData, Alert
+from app.database import engine, SessionLocal
+from app.models import SensorData, Alert, SensorRollup
+from app import migrations, rollups
 from datetime import datetime, timedelta
 import random
 
 def init_database():
-    """Crear todas las tablas"""
+    """Crear todas las tablas y las columnas e índices faltantes"""
     print("🔧 Creando tablas en la base de datos...")
     try:
-        Base.metadata.create_all(bind=engine)
+        created = migrations.upgrade(engine)
         print("✅ Tablas creadas exitosamente")
+        for name in created:
+            print(f"   - Agregado: {name}")
         return True
     except Exception as e:
         print(f"❌ Error al crear tablas: {e}")
@@ -26,6 +29,7 @@ def clear_database():
         print("🗑  Limpiando datos existentes...")
         db.query(Alert).delete()
         db.query(SensorData).delete()
+        db.query(SensorRollup).delete()
         db.commit()
         print("✅ Datos limpiados exitosamente")
     except Exception as e:
@@ -149,6 +153,10 @@ def create_sample_data():
         
         db.commit()
         print(f"✅ Creados {120 * 3} registros de sensores (3 pisos × 120 minutos)")
+        
+        # Los datos de ejemplo no pasan por la ingesta: recalcular agregados
+        buckets = rollups.rebuild(db, desde=now - timedelta(minutes=120))
+        print(f"✅ Recalculados {buckets} agregados para gráficas")
         print(f"✅ Creadas {len(alerts)} alertas de ejemplo")
         print(f"   - {sum(1 for a in alerts if not a.resuelta)} alertas activas")
         print(f"   - {sum(1 for a in alerts if a.resuelta)} alertas resueltas")
@@ -0,0 +1,34 @@
+"""
+Script para aplicar el esquema de la base de datos (tablas, columnas e
+índices faltantes y particiones de los meses siguientes).
+
+La API solo migra al arrancar con AUTO_MIGRATE=1 (por defecto, salvo con
+FAST_STARTUP=1); en despliegues con arranque rápido este script se corre
+una vez por despliegue, antes de levantar el servidor.
+
+    python migrate.py
+"""
+import sys
+
+from app.database import engine
+from app import migrations
+
+
+def main():
+    print("🔧 Aplicando esquema de la base de datos...")
+    try:
+        created = migrations.upgrade(engine)
+    except Exception as e:
+        print(f"❌ Error al migrar: {e}")
+        sys.exit(1)
+
+    if not created:
+        print("✅ El esquema ya estaba al día")
+    else:
+        print("✅ Esquema actualizado")
+        for name in created:
+            print(f"   - Agregado: {name}")
+
+
+if __name__ == "__main__":
+    main()
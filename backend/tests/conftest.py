@@ -0,0 +1,55 @@
+"""
+Fixtures de las pruebas: una base SQLite temporal y la API con su ciclo
+de arranque completo (migraciones, precarga y tareas en segundo plano).
+
+DATABASE_URL se fija antes de importar `app`, porque `app.database` crea
+los engines al importarse.
+"""
+import os
+import tempfile
+
+_tmpdir = tempfile.mkdtemp(prefix="smartfloors-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'tests.db')}"
+os.environ.setdefault("AUTO_MIGRATE", "1")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, main
+from app.database import SessionLocal
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def insert_readings(db):
+    """Inserta lecturas de un edificio con timestamps dados; retorna las filas"""
+    def insert(edificio, timestamps, piso=1, temp_c=22.0, humedad_pct=50.0, energia_kw=5.0):
+        rows = [
+            {
+                "timestamp": ts,
+                "edificio": edificio,
+                "piso": piso,
+                "temp_c": temp_c + i,
+                "humedad_pct": humedad_pct,
+                "energia_kw": energia_kw + i,
+            }
+            for i, ts in enumerate(timestamps)
+        ]
+        crud.create_sensor_data_bulk(db, rows)
+        return rows
+
+    return insert
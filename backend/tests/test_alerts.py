@@ -0,0 +1,66 @@
+def _alerta(edificio, piso, tipo, severidad="high"):
+    return {
+        "edificio": edificio,
+        "piso": piso,
+        "tipo": tipo,
+        "severidad": severidad,
+        "mensaje": f"{tipo} fuera de rango",
+    }
+
+
+def test_resolver_en_bloque_aplica_todos_los_filtros(client):
+    ids = {
+        key: client.post("/alerts/", json=_alerta(*key)).json()["id"]
+        for key in [
+            ("RES", 1, "temperatura", "high"),
+            ("RES", 2, "temperatura", "medium"),
+            ("RES", 1, "humedad", "high"),
+            ("OTRO", 1, "temperatura", "high"),
+        ]
+    }
+
+    response = client.post("/alerts/resolver", json={"edificio": "RES", "tipo": "temperatura", "severidad": "high"})
+    assert response.json() == {"resueltas": 1, "ids": [ids[("RES", 1, "temperatura", "high")]]}
+
+    response = client.post("/alerts/resolver", json={"edificio": "RES", "tipo": "temperatura"})
+    assert response.json()["ids"] == [ids[("RES", 2, "temperatura", "medium")]]
+
+    activas = client.get("/alerts/", params={"edificio": "RES"}).json()
+    assert [a["id"] for a in activas] == [ids[("RES", 1, "humedad", "high")]]
+    otras = client.get("/alerts/", params={"edificio": "OTRO"}).json()
+    assert [a["id"] for a in otras] == [ids[("OTRO", 1, "temperatura", "high")]]
+
+
+def test_resolver_en_bloque_exige_un_criterio(client):
+    assert client.post("/alerts/resolver", json={}).status_code == 400
+    assert client.post("/alerts/resolver", json={"ids": []}).json() == {"resueltas": 0, "ids": []}
+
+
+def test_alerta_vencida_expira_en_lugar_de_resolverse(client, db):
+    from app import crud, events, schemas
+
+    acciones = []
+    listener = lambda payload: acciones.append((payload["accion"], payload["alerta"]["id"]))
+    events.subscribe(events.ALERTS, listener)
+    try:
+        alerta = schemas.AlertCreate(**_alerta("EXP", 1, "temperatura"))
+        vieja = crud.create_alert(db, alerta)
+        # Ventana de supresión vencida: se cierra la anterior y se abre otra
+        nueva = crud.create_alert(db, alerta, suppression_seconds=0)
+    finally:
+        events.unsubscribe(events.ALERTS, listener)
+
+    assert nueva["id"] != vieja["id"]
+    assert acciones == [("creada", vieja["id"]), ("expirada", vieja["id"]), ("creada", nueva["id"])]
+
+    historial = {a["id"]: a for a in client.get(
+        "/alerts/", params={"edificio": "EXP", "solo_activas": False}
+    ).json()}
+    assert historial[vieja["id"]]["resuelta"] and historial[vieja["id"]]["expirada"]
+    assert not historial[nueva["id"]]["expirada"]
+
+    # Resuelta por un operador: no queda marcada como expirada
+    client.put(f"/alerts/{nueva['id']}/resolver")
+    historial = client.get("/alerts/", params={"edificio": "EXP", "solo_activas": False}).json()
+    assert {a["id"]: a["expirada"] for a in historial} == {vieja["id"]: True, nueva["id"]: False}
+    assert client.get("/alerts/", params={"edificio": "EXP"}).json() == []
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+from app import crud
+from app.alert_index import OpenAlertIndex
+from app.anomalies import AnomalyDetector
+from app.database import SessionLocal
+
+
+def _lecturas(edificio, energias):
+    base = datetime.now(timezone.utc)
+    return [
+        {"timestamp": base + timedelta(seconds=i), "edificio": edificio, "piso": 1,
+         "temp_c": 22.0, "humedad_pct": 50.0, "energia_kw": energia}
+        for i, energia in enumerate(energias)
+    ]
+
+
+def test_ewma_alerta_un_pico_y_no_el_ruido(db):
+    detector = AnomalyDetector(SessionLocal, OpenAlertIndex(), warmup=20)
+    try:
+        detector.prime(_lecturas("EWMA", [5.0 + 0.1 * (i % 3) for i in range(50)]))
+        detector.on_sensor_data(_lecturas("EWMA", [5.1, 5.0, 5.2]))
+        detector.on_sensor_data(_lecturas("EWMA", [25.0]))
+    finally:
+        detector.stop()
+
+    alertas = crud.get_open_alerts(db)
+    tipos = [(a.tipo, a.severidad) for a in alertas if a.edificio == "EWMA"]
+    assert tipos == [("anomalia_energia_kw", "high")]
+
+
+def test_ewma_sin_alertas_durante_el_calentamiento(db):
+    detector = AnomalyDetector(SessionLocal, OpenAlertIndex(), warmup=20)
+    try:
+        detector.on_sensor_data(_lecturas("WARM", [5.0] * 5 + [50.0]))
+    finally:
+        detector.stop()
+
+    assert not [a for a in crud.get_open_alerts(db) if a.edificio == "WARM"]
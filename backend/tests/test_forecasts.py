@@ -0,0 +1,89 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from app import crud, events, main
+from app.forecasts import ForecastCache, ForecastScheduler
+from app.ml_predictor import SimplePredictor
+from app.recent_window import RecentWindowStore
+
+
+def _lecturas(edificio, piso, temps, desde):
+    return [
+        {"timestamp": desde + i * 60, "edificio": edificio, "piso": piso,
+         "temp_c": t, "humedad_pct": 50.0, "energia_kw": 5.0}
+        for i, t in enumerate(temps)
+    ]
+
+
+def test_scheduler_publica_solo_los_pisos_que_cambiaron():
+    window = RecentWindowStore()
+    desde = time.time() - 1800
+    window.add_rows(_lecturas("FC", 1, [22.0 + 0.1 * i for i in range(10)], desde))
+    window.add_rows(_lecturas("FC", 2, [21.0] * 10, desde))
+    cache = ForecastCache()
+    scheduler = ForecastScheduler(SimplePredictor(), window, cache)
+
+    publicados = []
+    listener = lambda payload: publicados.append((payload["piso"], payload["anteriores"] is None))
+    events.subscribe(events.PREDICTIONS, listener)
+    try:
+        assert scheduler.run() == 2
+        assert sorted(publicados) == [(1, True), (2, True)]
+
+        # Sin lecturas nuevas el pronóstico no cambia: no se publica nada
+        publicados.clear()
+        scheduler.run()
+        assert publicados == []
+        assert cache.get("FC", 1) is not None
+
+        window.add_rows(_lecturas("FC", 1, [30.0], desde + 600 + 1))
+        scheduler.run()
+        assert publicados == [(1, False)]
+    finally:
+        events.unsubscribe(events.PREDICTIONS, listener)
+
+
+def _prediccion(riesgo):
+    return {"prediccion_60min": 30.0, "riesgo": riesgo, "recomendaciones": ["Revisar HVAC"]}
+
+
+def test_alerta_de_riesgo_solo_al_pasar_a_alto(db):
+    def publicar(riesgo, anterior):
+        main._alert_on_high_risk({
+            "edificio": "RISK",
+            "piso": 1,
+            "predicciones": {"temp_c": _prediccion(riesgo)},
+            "anteriores": {"temp_c": _prediccion(anterior)} if anterior else None
+        })
+
+    def ocurrencias():
+        db.expire_all()
+        return [a.ocurrencias for a in crud.get_active_alerts(db, "RISK")]
+
+    publicar("alto", None)
+    assert ocurrencias() == [1]
+    # El riesgo sigue alto en las pasadas siguientes: no cuenta otra ocurrencia
+    publicar("alto", "alto")
+    publicar("alto", "alto")
+    assert ocurrencias() == [1]
+    # Nuevo episodio: baja y vuelve a subir
+    publicar("medio", "alto")
+    publicar("alto", "medio")
+    assert ocurrencias() == [2]
+
+
+def test_dashboard_cacheado_no_congela_la_edad_del_pronostico(client, insert_readings):
+    base = datetime.now(timezone.utc) - timedelta(minutes=20)
+    insert_readings("AGE", [base + timedelta(minutes=i) for i in range(10)], piso=1)
+
+    first = client.get("/dashboard/1", params={"edificio": "AGE"})
+    pronostico = first.json()["pronostico"]
+    assert pronostico is not None
+    assert set(pronostico) == {"version", "calculado"}
+
+    time.sleep(0.05)
+    again = client.get("/dashboard/1", params={"edificio": "AGE"}, headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+
+    edificio = client.get("/dashboard", params={"edificio": "AGE"}).json()
+    assert set(edificio["pisos"][0]["pronostico"]) == {"version", "calculado"}
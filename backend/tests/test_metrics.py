@@ -0,0 +1,65 @@
+import re
+
+from app import metrics
+
+# Una muestra de la exposición de texto: nombre{etiquetas} valor
+# (los valores de las etiquetas pueden traer llaves, p. ej. /alerts/{alert_id})
+SAMPLE = re.compile(
+    r'^([a-zA-Z_:][a-zA-Z0-9_:]*)'
+    r'(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$'
+)
+
+
+def _parse(text):
+    """{nombre: tipo} declarado y lista de (nombre, etiquetas, valor)"""
+    types, samples = {}, []
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            types[name] = kind
+        elif line.startswith("# HELP "):
+            continue
+        else:
+            match = SAMPLE.match(line)
+            assert match, f"Línea inválida: {line!r}"
+            name, labels, value = match.groups()
+            samples.append((name, labels or "", float(value)))
+    return types, samples
+
+
+def test_metrics_content_type_exacto(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    assert response.headers.get_list("content-type") == [metrics.CONTENT_TYPE]
+
+
+def test_metrics_formato_de_exposicion(client):
+    client.get("/health")
+    text = client.get("/metrics").text
+    assert text.endswith("\n")
+
+    types, samples = _parse(text)
+    for name, _, _ in samples:
+        base = re.sub(r"_(bucket|sum|count)$", "", name)
+        assert name in types or types.get(base) == "histogram", name
+
+    health = [
+        (name, labels, value) for name, labels, value in samples
+        if name.startswith("smartfloors_http_request_duration_seconds") and 'route="/health"' in labels
+    ]
+    buckets = [value for name, _, value in health if name.endswith("_bucket")]
+    count = next(value for name, _, value in health if name.endswith("_count"))
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == count >= 1
+    assert any('le="+Inf"' in labels for _, labels, _ in health)
+
+
+def test_metrics_escapa_etiquetas():
+    counter = metrics.Counter("smartfloors_test_escape_total", "Prueba", ("valor",))
+    try:
+        counter.inc(2, ('a "b"\\c\nd',))
+        assert counter.render()[-1] == 'smartfloors_test_escape_total{valor="a \\"b\\"\\\\c\\nd"} 2'
+    finally:
+        metrics._registry.remove(counter)
@@ -0,0 +1,28 @@
+def _alerta(edificio, piso, tipo, severidad="high"):
+    return {
+        "edificio": edificio,
+        "piso": piso,
+        "tipo": tipo,
+        "severidad": severidad,
+        "mensaje": f"{tipo} fuera de rango",
+    }
+
+
+def test_etag_responde_304_hasta_que_cambian_las_alertas(client):
+    client.post("/alerts/", json=_alerta("ETAG", 1, "temperatura"))
+
+    first = client.get("/alerts/", params={"edificio": "ETAG"})
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = client.get("/alerts/", params={"edificio": "ETAG"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+
+    # Una alerta nueva invalida la respuesta guardada
+    client.post("/alerts/", json=_alerta("ETAG", 2, "humedad"))
+    changed = client.get("/alerts/", params={"edificio": "ETAG"}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert {a["piso"] for a in changed.json()} == {1, 2}
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func
+
+from app import models, retention
+from app.database import SessionLocal
+
+
+def test_compactacion_conserva_las_sumas_de_los_agregados(db, insert_readings):
+    inicio = (datetime.now(timezone.utc) - timedelta(days=40)).replace(
+        hour=10, minute=0, second=0, microsecond=0
+    )
+    rows = insert_readings("RET", [inicio + timedelta(minutes=i) for i in range(150)], piso=2)
+
+    stats = retention.compact(SessionLocal, dias=30)
+    assert stats["filas_eliminadas"] >= len(rows)
+
+    db.expire_all()
+    crudas = db.query(models.SensorData).filter(models.SensorData.edificio == "RET").count()
+    assert crudas == 0
+
+    rollup = models.SensorRollup
+    for granularidad in retention.COMPACTAS:
+        muestras, temp_sum, energia_sum, temp_max = db.query(
+            func.sum(rollup.muestras),
+            func.sum(rollup.temp_c_sum),
+            func.sum(rollup.energia_kw_sum),
+            func.max(rollup.temp_c_max),
+        ).filter(rollup.edificio == "RET", rollup.granularidad == granularidad).one()
+        assert muestras == len(rows), granularidad
+        assert temp_sum == pytest.approx(sum(r["temp_c"] for r in rows))
+        assert energia_sum == pytest.approx(sum(r["energia_kw"] for r in rows))
+        assert temp_max == pytest.approx(max(r["temp_c"] for r in rows))
+
+    finos = db.query(rollup).filter(rollup.edificio == "RET", rollup.granularidad.in_(retention.FINAS)).count()
+    assert finos == 0
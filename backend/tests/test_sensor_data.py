@@ -0,0 +1,59 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+from app import crud
+
+
+def test_paginacion_por_cursor_recorre_todo_sin_repetir(client, db, insert_readings):
+    base = datetime.now(timezone.utc) - timedelta(hours=1)
+    # Algunos timestamps repetidos: el desempate es por id
+    timestamps = [base + timedelta(seconds=i // 2) for i in range(25)]
+    insert_readings("PAG", timestamps)
+
+    vistos = []
+    params = {"edificio": "PAG", "limit": 10}
+    paginas = 0
+    while True:
+        response = client.get("/sensor-data/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        vistos += [row["id"] for row in page]
+        paginas += 1
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+        params["before"] = cursor
+
+    assert paginas == 3
+    assert len(vistos) == len(set(vistos)) == 25
+
+    todas = client.get("/sensor-data/", params={"edificio": "PAG", "limit": 100}).json()
+    assert vistos == [row["id"] for row in todas]
+
+
+def test_cursor_invalido_responde_400(client):
+    response = client.get("/sensor-data/", params={"edificio": "PAG", "before": "ayer"})
+    assert response.status_code == 400
+
+
+def test_cursor_del_header_sirve_sin_codificar(client, insert_readings):
+    base = datetime.now(timezone.utc) - timedelta(hours=1)
+    insert_readings("RAW", [base + timedelta(microseconds=123457 * i) for i in range(15)])
+
+    first = client.get("/sensor-data/?edificio=RAW&limit=10")
+    cursor = first.headers["x-next-cursor"]
+    assert re.fullmatch(r"[A-Za-z0-9_-]+", cursor)
+
+    # El valor del header tal cual en la URL, como lo haría un cliente sin escapar
+    second = client.get(f"/sensor-data/?edificio=RAW&limit=10&before={cursor}")
+    assert second.status_code == 200
+    ids = [row["id"] for row in first.json() + second.json()]
+    assert len(ids) == len(set(ids)) == 15
+
+
+def test_cursor_conserva_microsegundos_y_zona_horaria():
+    ts = datetime(2026, 1, 1, 0, 0, 0, 123456, tzinfo=timezone(timedelta(hours=-3)))
+    assert crud.decode_cursor(crud.encode_cursor(ts, 42)) == (ts, 42)
+    # Los timestamps naive (SQLite) se interpretan como UTC
+    naive = datetime(2026, 1, 1, 3, 0, 0, 123456)
+    assert crud.decode_cursor(crud.encode_cursor(naive, 7)) == (ts, 7)
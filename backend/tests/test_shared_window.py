@@ -0,0 +1,74 @@
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+from app.shared_window import SharedWindowStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SharedWindowStore(str(tmp_path / "window.bin"), capacity=64, max_slots=4)
+    yield store
+    store.close()
+
+
+def _lote(k, n, now):
+    return [
+        {"timestamp": now - (n - i), "edificio": "SW", "piso": 1,
+         "temp_c": float(k), "humedad_pct": float(k), "energia_kw": float(k)}
+        for i in range(n)
+    ]
+
+
+def test_version_y_ultima_lectura(store, tmp_path):
+    now = time.time()
+    assert store.version("SW", 1) == -1
+
+    store.add_rows(_lote(1, 10, now))
+    store.add_rows(_lote(2, 1, now))
+    assert store.version("SW", 1) == 2
+    assert store.latest("SW", 1)["temp_c"] == 2.0
+
+    # Otro proceso ve lo mismo a través del archivo
+    other = SharedWindowStore(store.path, capacity=64, max_slots=4)
+    try:
+        ts, values = other.window("SW", 1)
+        assert ts.size == 11
+        assert other.version("SW", 1) == 2
+    finally:
+        other.close()
+
+
+def _writer(path, capacity, stop):
+    """Proceso escritor: cada lote reemplaza la ventana completa con un único valor"""
+    store = SharedWindowStore(path, capacity=capacity, max_slots=4)
+    now = time.time()
+    k = 1
+    while not stop.is_set():
+        store.add_rows(_lote(k, capacity, now))
+        k += 1
+    store.close()
+
+
+def test_seqlock_no_entrega_ventanas_a_medio_escribir(store):
+    capacity = store.capacity
+    store.add_rows(_lote(0, capacity, time.time()))
+
+    # Otro proceso escribe en paralelo, como los demás workers
+    ctx = multiprocessing.get_context("spawn")
+    stop = ctx.Event()
+    process = ctx.Process(target=_writer, args=(store.path, capacity, stop))
+    process.start()
+    try:
+        deadline = time.time() + 10
+        while store.version("SW", 1) < 50 and time.time() < deadline:
+            time.sleep(0.01)
+        for _ in range(5000):
+            _, values = store.window("SW", 1)
+            assert values.shape == (capacity, 3)
+            assert np.all(values == values[0, 0])
+    finally:
+        stop.set()
+        process.join(10)